@@ -32,7 +32,17 @@ def create_app(config_class=None):
 
             app.config.from_object(Config)
 
+    # Réplicas de lectura como binds de Flask-SQLAlchemy (ver app/replicas.py)
+    from app.replicas import configure_replica_binds, init_replicas
+    configure_replica_binds(app)
+
+    # Pool de conexiones (tamaño, overflow, recycle, pre-ping) y sus métricas
+    from app.pool import configure_pool_options, init_pool
+    configure_pool_options(app)
+
     db.init_app(app)
+    init_replicas(app, db)
+    init_pool(app, db)
     migrate.init_app(app, db)
     jwt.init_app(app)
     ma.init_app(app)
@@ -42,11 +52,38 @@ def create_app(config_class=None):
     def user_identity_lookup(user_id):
         return str(user_id)
 
+    # Caché de usuarios para el lookup de JWT (se invalida al cambiar rol, is_active o contraseña)
+    from app.auth.user_cache import user_cache, load_user
+    user_cache.configure(
+        maxsize=app.config.get('USER_CACHE_SIZE', 10000),
+        ttl=app.config.get('USER_CACHE_TTL', 60),
+    )
+
+    # Caché de categorías de los templates (se invalida en las escrituras de la API de categorías)
+    from app.category_cache import category_cache
+    category_cache.configure(ttl=app.config.get('CATEGORY_CACHE_TTL', 300))
+
+    # Pool de procesos para hashing de contraseñas (login/registro) con backpressure
+    from app.auth.hashing import password_hasher, HashingBusy
+    password_hasher.configure(
+        method=app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 32),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10),
+    )
+
+    @app.errorhandler(HashingBusy)
+    def hashing_busy(error):
+        # Saturado: se falla rápido para que el cliente reintente más tarde
+        response = jsonify({"msg": str(error)})
+        response.headers['Retry-After'] = str(int(error.retry_after))
+        return response, 503
+
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         from app.auth.models import User
         identity = jwt_data["sub"]
-        return db.session.get(User, identity)
+        return load_user(User, identity)
 
     @jwt.invalid_token_loader
     def invalid_token(error):
@@ -71,4 +108,21 @@ def create_app(config_class=None):
 
     commands.register_commands(app)
 
+    # Contador de vistas de posts con escritura diferida (ver view_counts.py)
+    from .view_counts import init_view_counts
+    init_view_counts(app)
+
+    # Métricas Prometheus (GET /metrics); antes de la instrumentación y la compresión
+    # para que la latencia medida incluya sus after_request
+    from .metrics import init_metrics
+    init_metrics(app)
+
+    # Métricas SQL por request (X-DB-Queries, Server-Timing y log de queries lentas)
+    from .instrumentation import init_sql_instrumentation
+    init_sql_instrumentation(app)
+
+    # Compresión gzip de respuestas (negociada con Accept-Encoding)
+    from .compression import init_compression
+    init_compression(app)
+
     return app
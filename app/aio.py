@@ -0,0 +1,365 @@
+import gzip
+import time
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date, parse_accept_header, parse_cookie, parse_date, parse_etags, quote_etag
+
+from .models import Post, Comment, Category, Usuario, post_schema, posts_schema, comments_schema
+from .loading import loader_options
+from .pagination import keyset_paginate_async, parse_page_args, page_response, InvalidCursor
+from .fieldsets import fieldset_from_args, fieldset_tag, InvalidFieldset
+from .conditional import make_etag, latest, match_validators, _as_http_date
+from .metrics import registry
+from .compression import COMPRESSIBLE_MIMETYPES, GZIP_ETAG_SUFFIX
+from .instrumentation import (RequestSQLStats, async_sql_stats, init_async_sql_instrumentation,
+                              log_slow_request, sql_headers)
+from .replicas import (PRIMARY_COOKIE, REPLICA_BIND_PREFIX, replica_set, replica_uris,
+                       wrote_recently, _set_read_only)
+from .view_counts import record_view
+from . import serializers
+
+# Camino de lectura asíncrono (ASGI + SQLAlchemy asyncio).
+#
+# Las vistas de Flask son síncronas: cada request ocupa un hilo/worker mientras
+# espera a la base. Para los GET públicos más pedidos (listado y detalle de
+# posts, comentarios de un post) AsyncReadApp los atiende con una AsyncSession
+# sobre un driver async (aiomysql, aiosqlite), de modo que un solo worker ASGI
+# multiplexa muchas lecturas concurrentes en su event loop. Todo lo demás
+# (escrituras, auth, streaming NDJSON, HTML) pasa sin cambios a la app Flask a
+# través de WsgiToAsgi.
+#
+# El contrato JSON es el mismo: mismos schemas (serializadores compilados),
+# mismos sparse fieldsets, misma paginación por cursor y mismos ETag/304. Estas
+# respuestas no pasan por los after_request de Flask, así que _send aplica a
+# mano los que les corresponden: gzip y `Vary: Accept-Encoding` (misma
+# configuración COMPRESS_* que compression.py), X-DB-Queries / X-DB-Time /
+# Server-Timing (instrumentation.py) y X-DB-Replica. Con las mismas réplicas de
+# SQLALCHEMY_REPLICA_URIS (con driver async), la misma salud que ReplicaSet y
+# el mismo read-your-writes (cookie o token) que replicas.py. Un after_request
+# nuevo en la app Flask no se aplica acá hasta agregarlo en _send.
+# Las respuestas llevan `X-Read-Path: async`.
+#
+#     uvicorn asgi:application     (ver asgi.py)
+
+# Drivers async de requirements.txt; para otro motor, SQLALCHEMY_ASYNC_DATABASE_URI
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_uri(config):
+    """SQLALCHEMY_ASYNC_DATABASE_URI, o la URI principal con el driver async equivalente."""
+    uri = config.get('SQLALCHEMY_ASYNC_DATABASE_URI')
+    if uri:
+        return uri
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No hay driver async conocido para '{backend}': definí SQLALCHEMY_ASYNC_DATABASE_URI.")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _engine_options(uri, config):
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_POOL_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+
+
+class AsyncRequest:
+    """Lo mínimo de un request HTTP que usan los handlers async."""
+
+    def __init__(self, scope):
+        self.path = scope['path']
+        self.args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.if_none_match = parse_etags(self.headers.get('if-none-match'))
+        self.if_modified_since = parse_date(self.headers.get('if-modified-since'))
+        self.cookies = parse_cookie(self.headers.get('cookie', ''))
+
+    def accepts_gzip(self):
+        return parse_accept_header(self.headers.get('accept-encoding'))['gzip'] > 0
+
+    def wants_stream(self):
+        if self.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return True
+        return 'application/x-ndjson' in self.headers.get('accept', '')
+
+
+class AsyncResponse:
+    def __init__(self, data, status=200, etag=None, last_modified=None, weak=False):
+        self.data = data
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self.weak = weak
+
+
+def _not_modified(req, etag, last_modified, weak=False):
+    matched = match_validators(req.if_none_match, req.if_modified_since, etag, last_modified)
+    if matched is None:
+        return None
+    return AsyncResponse(None, 304, matched, last_modified, weak)
+
+
+# --- Handlers (mismo comportamiento que las vistas de post_views / comment_views)
+
+async def post_list(session, req):
+    try:
+        schema = fieldset_from_args(posts_schema, req.args)
+    except InvalidFieldset as e:
+        return AsyncResponse({"msg": str(e)}, 400)
+
+    limit, cursor = parse_page_args(req.args)
+    try:
+        posts, next_cursor, prev_cursor = await keyset_paginate_async(
+            session,
+            select(Post).options(*loader_options(schema, narrow=True, keep=(Post.timestamp,))),
+            keys=[(Post.timestamp, True), (Post.id, True)],
+            key_fn=lambda p: (p.timestamp, p.id),
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursor as e:
+        return AsyncResponse({"msg": str(e)}, 400)
+    return AsyncResponse(page_response(serializers.dump(schema, posts), next_cursor, prev_cursor, limit))
+
+
+async def post_detail(session, req, post_id):
+    try:
+        schema = fieldset_from_args(post_schema, req.args)
+    except InvalidFieldset as e:
+        return AsyncResponse({"msg": str(e)}, 400)
+
+    version = (await session.execute(
+        select(Post.timestamp, Post.updated_at,
+               Usuario.updated_at.label('author_updated_at'),
+               Category.updated_at.label('category_updated_at'))
+        .outerjoin(Usuario, Usuario.id == Post.user_id)
+        .outerjoin(Category, Category.id == Post.category_id)
+        .where(Post.id == post_id)
+    )).first()
+    if version is None:
+        return AsyncResponse({"msg": "Post no encontrado"}, 404)
+
+    record_view(post_id)
+
+    last_modified = latest(version.updated_at or version.timestamp,
+                           version.author_updated_at, version.category_updated_at)
+    tag = fieldset_tag(schema, post_schema)
+    etag = make_etag('post', post_id, version.updated_at or version.timestamp,
+                     version.author_updated_at, version.category_updated_at, *([tag] if tag else []))
+    # ETag débil, como PostDetailAPI (view_count)
+    cached = _not_modified(req, etag, last_modified, weak=True)
+    if cached is not None:
+        return cached
+
+    post = await session.get(Post, post_id, options=loader_options(schema, narrow=True))
+    if post is None:
+        return AsyncResponse({"msg": "Post no encontrado"}, 404)
+    return AsyncResponse(serializers.dump(schema, post), 200, etag, last_modified, weak=True)
+
+
+async def comment_list(session, req, post_id):
+    if await session.get(Post, post_id) is None:
+        return AsyncResponse({"msg": "Post no encontrado"}, 404)
+
+    limit, cursor = parse_page_args(req.args)
+    count, last_modified, commenters_updated_at = (await session.execute(
+        select(
+            func.count(Comment.id),
+            func.max(func.coalesce(Comment.updated_at, Comment.timestamp)),
+            func.max(Usuario.updated_at),
+        )
+        .outerjoin(Usuario, Usuario.id == Comment.user_id)
+        .where(Comment.post_id == post_id)
+    )).one()
+    # Sólo ETag, como CommentListAPI (MAX(updated_at) no es monótono ante borrados;
+    # incluye a los autores, que se anidan en cada comentario)
+    etag = make_etag('comments', post_id, count, last_modified, commenters_updated_at, limit, cursor)
+    cached = _not_modified(req, etag, None)
+    if cached is not None:
+        return cached
+
+    try:
+        comments, next_cursor, prev_cursor = await keyset_paginate_async(
+            session,
+            select(Comment).where(Comment.post_id == post_id).options(*loader_options(comments_schema)),
+            keys=[(Comment.timestamp, False), (Comment.id, False)],
+            key_fn=lambda c: (c.timestamp, c.id),
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursor as e:
+        return AsyncResponse({"msg": str(e)}, 400)
+
+    data = page_response(serializers.dump(comments_schema, comments), next_cursor, prev_cursor, limit)
+    return AsyncResponse(data, 200, etag)
+
+
+# (segmentos del path, handler, nombre para las métricas); int = parámetro numérico
+ROUTES = [
+    (('api', 'v1', 'posts'), post_list, 'aio.post_list'),
+    (('api', 'v1', 'posts', int), post_detail, 'aio.post_detail'),
+    (('api', 'v1', 'posts', int, 'comments'), comment_list, 'aio.comment_list'),
+]
+
+
+def _match(path):
+    parts = path.strip('/').split('/')
+    for pattern, handler, name in ROUTES:
+        if len(parts) != len(pattern):
+            continue
+        args = []
+        for part, expected in zip(parts, pattern):
+            if expected is int:
+                if not part.isdigit():
+                    break
+                args.append(int(part))
+            elif part != expected:
+                break
+        else:
+            return handler, args, name
+    return None, None, None
+
+
+class AsyncReadApp:
+    """App ASGI: GET públicos con AsyncSession; el resto a la app Flask (WSGI)."""
+
+    def __init__(self, flask_app):
+        config = flask_app.config
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.uri = async_database_uri(config)
+        # Mismos nombres que los binds de réplica de Flask-SQLAlchemy ('replica_0', ...)
+        self.replica_uris = {
+            f'{REPLICA_BIND_PREFIX}{i}': async_database_uri({'SQLALCHEMY_DATABASE_URI': uri})
+            for i, uri in enumerate(replica_uris(config))
+        }
+        self.engines = {}           # None (primario) o nombre de réplica -> AsyncEngine
+        self.sessionmakers = {}
+        self.compress = config.get('COMPRESS_ENABLED', True)
+        self.compress_level = config.get('COMPRESS_LEVEL', 6)
+        self.compress_min_size = config.get('COMPRESS_MIN_SIZE', 500)
+        self.sql_instrumentation = config.get('SQL_INSTRUMENTATION', True)
+        self.keep_slowest = config.get('SQL_KEEP_SLOWEST', 5)
+
+    def _ensure_engine(self, replica=None):
+        # Se crea dentro del event loop del servidor (las conexiones quedan atadas a él)
+        if replica not in self.sessionmakers:
+            uri = self.uri if replica is None else self.replica_uris[replica]
+            engine = create_async_engine(uri, **_engine_options(uri, self.flask_app.config))
+            if replica is not None:
+                event.listen(engine.sync_engine, 'connect', _set_read_only)
+            init_async_sql_instrumentation(self.flask_app, engine)
+            self.engines[replica] = engine
+            self.sessionmakers[replica] = async_sessionmaker(engine, expire_on_commit=False)
+        return self.sessionmakers[replica]
+
+    def _choose_replica(self, req):
+        """Réplica sana para este GET (como @read_replica), o None para leer del primario."""
+        if not self.replica_uris:
+            return None
+        if wrote_recently(req.cookies.get(PRIMARY_COOKIE), req.headers.get('authorization')):
+            return None
+        name, _ = replica_set.choose()
+        return name if name in self.replica_uris else None
+
+    async def dispose(self):
+        engines, self.engines, self.sessionmakers = self.engines, {}, {}
+        for engine in engines.values():
+            await engine.dispose()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            handler, args, name = _match(scope['path'])
+            if handler is not None:
+                req = AsyncRequest(scope)
+                if not req.wants_stream():
+                    return await self._handle(scope, send, req, handler, args, name)
+
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _handle(self, scope, send, req, handler, args, name):
+        start = time.perf_counter()
+        registry.request_started()
+        stats = RequestSQLStats(self.keep_slowest) if self.sql_instrumentation else None
+        token = async_sql_stats.set(stats)
+        replica = self._choose_replica(req)
+        try:
+            async with self._ensure_engine(replica)() as session:
+                try:
+                    response = await handler(session, req, *args)
+                except Exception as e:
+                    await session.rollback()
+                    response = AsyncResponse({"msg": f"Error al recuperar datos: {e}"}, 500)
+        except Exception as e:
+            # Base no disponible (no se pudo abrir la conexión)
+            response = AsyncResponse({"msg": f"Error al recuperar datos: {e}"}, 500)
+        finally:
+            async_sql_stats.reset(token)
+
+        await self._send(scope, send, req, response, replica, stats)
+        registry.request_finished(
+            name, scope['method'], response.status, time.perf_counter() - start,
+            db_seconds=stats.total_ms / 1000 if stats is not None else None,
+            db_queries=stats.count if stats is not None else 0,
+        )
+        if stats is not None:
+            log_slow_request(self.flask_app, stats, name, scope['method'], scope['path'])
+
+    async def _send(self, scope, send, req, response, replica=None, stats=None):
+        headers = [(b'x-read-path', b'async')]
+        body = b''
+        etag = response.etag
+        if response.status != 304:
+            # Mismos bytes que jsonify() en la app Flask; gzip como compression.py
+            flask_response = self.flask_app.json.response(response.data)
+            body = flask_response.get_data()
+            if self.compress and flask_response.mimetype in COMPRESSIBLE_MIMETYPES:
+                headers.append((b'vary', b'Accept-Encoding'))
+                if req.accepts_gzip() and len(body) >= self.compress_min_size:
+                    body = gzip.compress(body, compresslevel=self.compress_level, mtime=0)
+                    headers.append((b'content-encoding', b'gzip'))
+                    if etag is not None and not etag.endswith(GZIP_ETAG_SUFFIX):
+                        etag += GZIP_ETAG_SUFFIX
+            headers.append((b'content-type', flask_response.content_type.encode('latin-1')))
+            headers.append((b'content-length', str(len(body)).encode()))
+        if replica is not None:
+            headers.append((b'x-db-replica', replica.encode('latin-1')))
+        if stats is not None:
+            headers.extend((name.lower().encode('latin-1'), value.encode('latin-1'))
+                           for name, value in sql_headers(stats))
+        if etag is not None:
+            headers.append((b'etag', quote_etag(etag, response.weak).encode('latin-1')))
+            if response.last_modified is not None:
+                headers.append((b'last-modified', http_date(_as_http_date(response.last_modified)).encode('latin-1')))
+            headers.append((b'cache-control', b'no-cache'))
+
+        await send({'type': 'http.response.start', 'status': response.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
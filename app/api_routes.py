@@ -4,9 +4,11 @@ from .views.auth_views import RegisterAPI, LoginAPI, UserDetailAPI, UserListAPI
 # 2. Importar las vistas de Categorías
 from .views.category_views import CategoryListAPI, CategoryDetailAPI
 # 3. Importar las vistas de Posts
-from .views.post_views import PostListAPI, PostDetailAPI
+from .views.post_views import PostListAPI, PostDetailAPI, PostSearchAPI, PostBulkAPI
 # 4. Importar las vistas de Comentarios
 from .views.comment_views import CommentListAPI, CommentDetailAPI
+# 5. Importar las vistas de Administración
+from .views.admin_views import PoolStatsAPI
 
 
 # Definición del Blueprint para las rutas de la API
@@ -77,6 +79,20 @@ api_bp.add_url_rule(
     methods=['GET', 'POST']
 )
 
+# POST: Carga masiva (array JSON o NDJSON, Solo ADMIN/EDITOR) -> /api/v1/posts/bulk
+api_bp.add_url_rule(
+    '/posts/bulk',
+    view_func=PostBulkAPI.as_view('post_bulk_api'),
+    methods=['POST']
+)
+
+# GET: Búsqueda full-text (?q=, paginada por cursor) -> /api/v1/posts/search
+api_bp.add_url_rule(
+    '/posts/search',
+    view_func=PostSearchAPI.as_view('post_search_api'),
+    methods=['GET']
+)
+
 # GET: Detalle, PUT: Editar, DELETE: Eliminar (Control de Roles/Autoría) -> /api/v1/posts/<int:post_id>
 api_bp.add_url_rule(
     '/posts/<int:post_id>',
@@ -101,4 +117,16 @@ api_bp.add_url_rule(
     '/comments/<int:comment_id>',
     view_func=CommentDetailAPI.as_view('comment_detail_api'),
     methods=['PUT', 'DELETE']
-)
\ No newline at end of file
+)
+
+
+# ----------------------------------------------------------------------
+# 5. RUTAS DE ADMINISTRACIÓN
+# ----------------------------------------------------------------------
+
+# GET: Estado del pool de conexiones, réplicas y cachés (Solo ADMIN) -> /api/v1/admin/pool
+api_bp.add_url_rule(
+    '/admin/pool',
+    view_func=PoolStatsAPI.as_view('pool_stats_api'),
+    methods=['GET']
+)
@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Hashing de contraseñas fuera del hilo del request.
+#
+# scrypt/pbkdf2 son deliberadamente caros (decenas a cientos de ms de CPU).
+# Hechos en el hilo del request, una ráfaga de logins ocupa todos los workers
+# y las lecturas baratas quedan en cola detrás. Aquí se ejecutan en un pool de
+# procesos acotado:
+#   - hay un máximo de operaciones en vuelo (ejecutándose + en cola); si se
+#     supera, se falla enseguida con HashingBusy (la API responde 503 con
+#     Retry-After) en vez de encolar sin límite;
+#   - si una operación tarda más que el timeout también se responde 503.
+# Al pool se le envían directamente las funciones de werkzeug, así los procesos
+# hijos no necesitan importar la aplicación.
+#
+# Los procesos del pool se crean con 'forkserver' y no con fork: el servidor ya
+# tiene hilos (requests, jobs, réplicas) y un fork copiaría locks tomados por
+# otros hilos. El pool se crea en configure() (create_app), no en un request.
+#
+# Rehash transparente: si el hash guardado fue generado con otro método o con
+# otros parámetros que los configurados (PASSWORD_HASH_METHOD), después de un
+# login correcto se recalcula con los actuales y el modelo queda modificado
+# para que la vista lo guarde.
+
+
+class HashingBusy(RuntimeError):
+    """El pool de hashing está saturado (o no respondió a tiempo)."""
+
+    def __init__(self, msg, retry_after=1):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt', workers=2, max_pending=32, timeout=10):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.method = method
+        self._prefix = None
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.timeout = timeout
+        self.rejected = 0
+
+    def configure(self, method=None, workers=None, max_pending=None, timeout=None):
+        with self._lock:
+            if method is not None:
+                self.method = method
+                self._prefix = None
+            if workers is not None:
+                self.workers = workers
+            if max_pending is not None:
+                self.max_pending = max_pending
+                self._slots = threading.BoundedSemaphore(max_pending)
+            if timeout is not None:
+                self.timeout = timeout
+            self._shutdown_locked()
+            self._start_locked()
+            self.rejected = 0
+
+    # --- Pool
+
+    def _shutdown_locked(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _start_locked(self):
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('forkserver'))
+            self._pid = os.getpid()
+
+    def _get_executor(self):
+        """Pool por proceso: un worker forkeado del servidor (preload) no puede usar el del padre."""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._start_locked()
+            return self._executor
+
+    def _run(self, fn, *args):
+        # Backpressure: sin lugar libre se rechaza enseguida, sin esperar
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy("Demasiadas operaciones de autenticación en curso. Intente nuevamente.")
+
+        if self.workers <= 0:
+            # Modo sin pool (desarrollo / CLI): mismo límite de concurrencia, en el hilo actual
+            try:
+                return fn(*args)
+            finally:
+                slots.release()
+
+        try:
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                # Un proceso hijo murió: se recrea el pool y se reintenta una vez
+                with self._lock:
+                    self._shutdown_locked()
+                future = self._get_executor().submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        # El lugar se libera cuando el proceso termina, aunque el request ya haya desistido
+        future.add_done_callback(lambda _f: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy("El servicio de autenticación no respondió a tiempo.", retry_after=self.timeout)
+
+    # --- API
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Retorna (ok, nuevo_hash). nuevo_hash no es None sólo si ok y hace falta rehash."""
+        if not pwhash:
+            return False, None
+        ok = self._run(check_password_hash, pwhash, password)
+        if ok and self.needs_rehash(pwhash):
+            return True, self.hash(password)
+        return ok, None
+
+    def needs_rehash(self, pwhash):
+        """True si `pwhash` no usa el método y los parámetros configurados."""
+        if self._prefix is None:
+            # werkzeug completa los parámetros por defecto ('scrypt' -> 'scrypt:32768:8:1');
+            # se obtienen una vez hasheando con un salt mínimo
+            self._prefix = generate_password_hash('', self.method, salt_length=1).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def stats(self):
+        return {"workers": self.workers, "max_pending": self.max_pending, "rejected": self.rejected}
+
+
+password_hasher = PasswordHasher()
+
+
+def hash_password(password):
+    return password_hasher.hash(password)
+
+
+def verify_password(pwhash, password):
+    return password_hasher.verify(pwhash, password)
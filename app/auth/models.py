@@ -1,7 +1,8 @@
 from app.extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.auth.hashing import hash_password, verify_password
 from flask_login import UserMixin
 from enum import Enum 
+from datetime import datetime
 from sqlalchemy.exc import NoResultFound
 
 # Constantes de Roles (IDs) para la lógica de permisos
@@ -29,16 +30,23 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128))
     role_id = db.Column(db.Integer, db.ForeignKey('roles.id'),
                         default=RoleEnum.READER.value)
+    # Versión para ETag / Last-Modified (los posts serializan el nombre del autor)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relación con Post (modelo en app/content/models.py)
     posts = db.relationship('Post', backref='author', lazy='dynamic')
 
     # Métodos de contraseña
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        # Se calcula en el pool de hashing (puede lanzar HashingBusy)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        ok, new_hash = verify_password(self.password_hash, password)
+        if new_hash:
+            # Rehash con los parámetros actuales: lo persiste el commit de la vista
+            self.password_hash = new_hash
+        return ok
 
     # Permisos
     def can(self, required_role_id: int):
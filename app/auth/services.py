@@ -64,6 +64,10 @@ def verify_user_service(username_or_email, password):
     if user is None or not user.check_password(password):
         return jsonify({"msg": "Credenciales inválidas."}), 401
 
+    # Si el hash se recalculó con los parámetros actuales, guardarlo
+    if db.session.is_modified(user):
+        db.session.commit()
+
     # Generar token JWT para el usuario autenticado
     token = jwt.encode(
         {'user_id': user.id, 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)},
@@ -0,0 +1,88 @@
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.cache import TTLCache, MISSING
+from app.extensions import db
+
+# Caché de usuarios para el `user_lookup_loader` de JWT.
+# Cada request autenticado resolvía el usuario con db.session.get(); aquí se
+# guardan sólo los valores de columnas (un dict inmutable, seguro entre hilos)
+# y en cada acierto se reconstruye una instancia adjunta a la sesión actual
+# con merge(load=False), sin ir a la base de datos.
+#
+# Se invalida explícitamente cuando se modifica una columna del usuario
+# (rol, flag is_active, contraseña, email...) o se lo elimina, además de la
+# expiración por TTL. Los UPDATE de Core (p. ej. usuarios.post_count en
+# counters.py) no pasan por el flush del ORM: esos llaman a
+# invalidate_user_on_commit().
+
+user_cache = TTLCache('jwt_users', maxsize=10000, ttl=60)
+
+_PENDING_KEY = 'user_cache_invalidate'
+
+
+def _cache_key(model, identity):
+    return (model.__tablename__, int(identity))
+
+
+def load_user(model, identity):
+    """Devuelve la instancia de `model` con id `identity` (o None), usando el caché."""
+    try:
+        key = _cache_key(model, identity)
+    except (TypeError, ValueError):
+        return None
+
+    cached = user_cache.get(key)
+    if cached is not MISSING and cached[0] is model:
+        instance = model(**cached[1])
+        make_transient_to_detached(instance)
+        return db.session.merge(instance, load=False)
+
+    user = db.session.get(model, key[1])
+    if user is not None:
+        columns = {attr.key: getattr(user, attr.key) for attr in sa_inspect(model).column_attrs}
+        user_cache.set(key, (model, columns))
+    return user
+
+
+def _is_user_instance(obj):
+    return getattr(obj, '__tablename__', None) == 'usuarios'
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_user_changes(session, flush_context, instances):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in session.dirty:
+        if _is_user_instance(obj) and session.is_modified(obj, include_collections=False):
+            pending.add(_cache_key(type(obj), obj.id))
+    for obj in session.deleted:
+        if _is_user_instance(obj):
+            pending.add(_cache_key(type(obj), obj.id))
+    # Invalidamos ya para que ningún request repueble el caché con el valor viejo
+    # mientras se completa la transacción; después del commit se invalida de nuevo.
+    for key in pending:
+        user_cache.invalidate(key)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    for key in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate(key)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def invalidate_user_on_commit(user_id, session=None):
+    """Para UPDATEs de la fila del usuario fuera del ORM: se invalida ya y de nuevo después del commit."""
+    session = session if session is not None else db.session
+    key = ('usuarios', int(user_id))
+    session.info.setdefault(_PENDING_KEY, set()).add(key)
+    user_cache.invalidate(key)
+
+
+def invalidate_user(user_id):
+    """Invalidación manual (por ejemplo, tras un UPDATE masivo fuera del ORM)."""
+    user_cache.invalidate(('usuarios', int(user_id)))
@@ -0,0 +1,50 @@
+import threading
+from collections import namedtuple
+
+from .cache import TTLCache, MISSING
+from .extensions import db
+
+# Caché del listado de categorías para las páginas renderizadas en el servidor.
+# El context processor `inject_categorias` se ejecuta en cada render (incluso
+# login y register); con este caché la query se hace una sola vez por proceso
+# hasta que una escritura (CategoryListAPI.post, CategoryDetailAPI.put/delete)
+# lo invalida. El TTL acota lo que puede tardar en verse un cambio hecho por
+# otro proceso/worker.
+
+# Copia inmutable de cada fila: se puede compartir entre hilos y no depende de
+# ninguna sesión (un objeto ORM expirado fallaría fuera de su sesión).
+CategoryRow = namedtuple('CategoryRow', ['id', 'name', 'description'])
+
+category_cache = TTLCache('categories', maxsize=1, ttl=300)
+
+_KEY = 'all'
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def get_cached_categories():
+    """Lista de CategoryRow ordenada por nombre, desde el caché si está vigente."""
+    categories = category_cache.get(_KEY)
+    if categories is not MISSING:
+        return categories
+
+    from .models import Category
+
+    generation = _generation
+    rows = db.session.execute(db.select(Category).order_by(Category.name)).scalars().all()
+    categories = tuple(CategoryRow(c.id, c.name, c.description) for c in rows)
+
+    # Si hubo una invalidación mientras consultábamos, el resultado puede ser
+    # anterior a la escritura: lo devolvemos pero no lo guardamos.
+    with _generation_lock:
+        if generation == _generation:
+            category_cache.set(_KEY, categories)
+    return categories
+
+
+def invalidate_categories():
+    """Debe llamarse después de confirmar (commit) una escritura sobre categorías."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        category_cache.invalidate(_KEY)
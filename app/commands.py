@@ -1,4 +1,5 @@
 import click
+import json
 from flask import current_app
 # Importamos db desde nuestro archivo local de extensiones
 from .extensions import db
@@ -54,4 +55,265 @@ def register_commands(app):
                 print(f"!!! Error al commitear los roles (ej. conflicto de ID): {e}")
                 print("Asegúrate de que la tabla 'roles' esté vacía si quieres garantizar los IDs 1, 2, 3.")
 
-            print("\nPara ejecutar este comando, usa: flask create-roles")
\ No newline at end of file
+            print("\nPara ejecutar este comando, usa: flask create-roles")
+
+    # ----------------------------------------------------
+    # Comando CLI para crear/reconstruir el índice full-text
+    # ----------------------------------------------------
+    @app.cli.command("search-reindex")
+    def search_reindex_command():
+        """Crea el índice full-text de posts (y sus triggers en SQLite) si no existe y lo reconstruye completo.
+        SQLite: tabla FTS5 'posts_fts'. MySQL: índice FULLTEXT (title, body).
+        """
+        from .search import rebuild_index, SearchUnavailable
+
+        try:
+            rebuild_index()
+            print("--- Índice full-text reconstruido. ---")
+        except SearchUnavailable as e:
+            print(f"!!! {e}")
+
+    # ----------------------------------------------------
+    # Comando CLI para recalcular los contadores desnormalizados
+    # ----------------------------------------------------
+    @app.cli.command("repair-counters")
+    @click.option("--enqueue", is_flag=True, help="Encolar el recálculo para `flask worker` en vez de hacerlo ahora.")
+    def repair_counters_command(enqueue):
+        """Recalcula posts.comment_count, usuarios.post_count y categories.post_count
+        a partir de las tablas reales (sólo reescribe las filas desalineadas).
+        """
+        from .counters import repair_counters
+
+        if enqueue:
+            from . import jobs
+            queued = jobs.enqueue('repair_counters', key='repair_counters')
+            db.session.commit()
+            print("Recálculo encolado." if queued else "Ya hay un recálculo pendiente en la cola.")
+            return
+
+        print("--- Recalculando contadores ---")
+        for name, fixed in repair_counters().items():
+            print(f"-> {name}: {fixed} fila(s) corregida(s)")
+
+    # ----------------------------------------------------
+    # Comandos CLI de exportación / importación (NDJSON)
+    # ----------------------------------------------------
+    @app.cli.command("export")
+    @click.argument("path")
+    @click.option("--gzip", "compress", is_flag=True, help="Comprimir con gzip (implícito si PATH termina en .gz).")
+    @click.option("--batch-size", default=1000, show_default=True, help="Filas por vuelta del cursor.")
+    def export_command(path, compress, batch_size):
+        """Exporta usuarios, categorías, posts y comentarios a NDJSON ('-' = stdout).
+        Lee con cursores del lado del servidor: la memoria no crece con el tamaño de la base.
+        """
+        from .dataset import export_dataset
+
+        # Con '-' el NDJSON va a stdout: los mensajes de progreso van a stderr
+        log = (lambda msg: click.echo(msg, err=True))
+        log("--- Exportando dataset ---")
+        export_dataset(path, compress=compress, batch_size=batch_size, log=log)
+        log("--- Exportación completa. ---")
+
+    @app.cli.command("import")
+    @click.argument("path")
+    @click.option("--gzip", "compress", is_flag=True, help="Entrada comprimida con gzip (implícito si PATH termina en .gz).")
+    @click.option("--batch-size", default=1000, show_default=True, help="Filas por INSERT/commit.")
+    @click.option("--checkpoint", default=None, help="Archivo de checkpoint para retomar una importación interrumpida.")
+    def import_command(path, compress, batch_size, checkpoint):
+        """Importa un NDJSON generado por 'flask export' ('-' = stdin).
+        Inserta por lotes respetando el orden de FKs; con --checkpoint se puede retomar.
+        """
+        from .dataset import import_dataset
+
+        print("--- Importando dataset ---")
+        try:
+            import_dataset(path, compress=compress, batch_size=batch_size, checkpoint=checkpoint)
+        except Exception as e:
+            db.session.rollback()
+            print(f"!!! Error al importar: {e}")
+            if checkpoint:
+                print(f"Volvé a ejecutar el comando con --checkpoint {checkpoint} para retomar.")
+            raise SystemExit(1)
+        print("--- Importación completa. ---")
+
+    # ----------------------------------------------------
+    # Comando CLI para generar datos sintéticos a escala
+    # ----------------------------------------------------
+    @app.cli.command("seed")
+    @click.option("--scale", default=1.0, show_default=True, type=float, help="Multiplicador de volumen (1 = ~1.000 posts).")
+    @click.option("--seed", "rng_seed", default=42, show_default=True, help="Semilla del RNG (mismos datos para la misma semilla).")
+    @click.option("--batch-size", default=5000, show_default=True, help="Filas por INSERT.")
+    @click.option("--reset", is_flag=True, help="Borra y recrea todas las tablas antes de generar.")
+    @click.option("--yes", is_flag=True, help="No pedir confirmación con --reset.")
+    def seed_command(scale, rng_seed, batch_size, reset, yes):
+        """Genera usuarios, categorías, posts y comentarios sintéticos con inserts masivos.
+        Las contraseñas de todos los usuarios generados son 'password'.
+        """
+        from .seed import seed_database
+
+        if reset:
+            if not yes:
+                click.confirm("Esto borra TODOS los datos de la base. ¿Continuar?", abort=True)
+            db.drop_all()
+            db.create_all()
+
+        print(f"--- Generando datos (scale={scale}, seed={rng_seed}) ---")
+        seed_database(scale=scale, seed=rng_seed, batch_size=batch_size)
+        print("--- Datos generados. ---")
+
+    # ----------------------------------------------------
+    # Comando CLI de benchmarks de endpoints con presupuestos
+    # ----------------------------------------------------
+    @app.cli.command("bench")
+    @click.option("--scale", default=1.0, show_default=True, type=float, help="Tamaño del dataset sembrado (ver 'flask seed').")
+    @click.option("--seed", "rng_seed", default=42, show_default=True, help="Semilla del dataset.")
+    @click.option("--iterations", default=50, show_default=True, help="Requests medidos por endpoint.")
+    @click.option("--warmup", default=5, show_default=True, help="Requests previos no medidos por endpoint.")
+    @click.option("--only", multiple=True, help="Patrón de nombres a medir (ej. 'posts.*'); repetible.")
+    @click.option("--report", default=None, help="Guardar los resultados en un archivo JSON.")
+    @click.option("--no-budgets", is_flag=True, help="Sólo reportar: no terminar con error al superar presupuestos.")
+    @click.option("--enforce-latency", is_flag=True, help="Un p95 fuera de presupuesto también hace fallar (por defecto sólo advierte).")
+    @click.option("--latency-scale", default=1.0, show_default=True, type=float, help="Multiplicador de los presupuestos de latencia (runners lentos).")
+    def bench_command(scale, rng_seed, iterations, warmup, only, report, no_budgets, enforce_latency, latency_scale):
+        """Mide latencia (p50/p95/p99), throughput y queries SQL por request de cada endpoint
+        sobre una base SQLite temporal sembrada. Termina con código 1 si se supera algún presupuesto
+        de queries o un status no es el esperado (los fallos conocidos, XFAIL, no cuentan).
+        """
+        from .benchmarks import run_benchmarks, write_report, gate_failures
+
+        print(f"--- Benchmarks (scale={scale}, {iterations} iteraciones por endpoint) ---")
+        results = run_benchmarks(scale=scale, seed=rng_seed, iterations=iterations, warmup=warmup, only=only,
+                                 enforce_latency=enforce_latency, latency_scale=latency_scale)
+        if report:
+            write_report(results, report)
+            print(f"-> Resultados guardados en {report}")
+
+        xpassed = [r["name"] for r in results if r["status"] == 'XPASS']
+        if xpassed:
+            print(f"-> Funcionan de nuevo (quitar la marca xfail): {', '.join(xpassed)}")
+
+        failed = [r["name"] for r in gate_failures(results)]
+        if failed:
+            print(f"!!! {len(failed)} endpoint(s) fuera de presupuesto: {', '.join(failed)}")
+            if not no_budgets:
+                raise SystemExit(1)
+        else:
+            print("--- Todos los endpoints dentro de presupuesto. ---")
+
+    # ----------------------------------------------------
+    # Comando CLI de prueba de carga concurrente
+    # ----------------------------------------------------
+    @app.cli.command("loadtest")
+    @click.option("--users", default=10, show_default=True, help="Usuarios virtuales (un hilo cada uno).")
+    @click.option("--duration", default=30.0, show_default=True, help="Segundos de prueba.")
+    @click.option("--mix", default=None, help="Mezcla 'op=peso,...' (login, post_list, post_detail, comment_list, comment_post).")
+    @click.option("--base-url", default=None, help="Servidor a probar (ej. http://127.0.0.1:5000). Sin esto se usa el test client.")
+    @click.option("--password", default="password", show_default=True, help="Contraseña de las cuentas usadas (las del seeder).")
+    @click.option("--seed", "rng_seed", default=42, show_default=True, help="Semilla de la secuencia de operaciones.")
+    @click.option("--max-requests", default=None, type=int, help="Tope de requests por usuario virtual.")
+    @click.option("--report", default=None, help="Guardar el reporte en un archivo JSON.")
+    def loadtest_command(users, duration, mix, base_url, password, rng_seed, max_requests, report):
+        """Carga concurrente con mezcla de lecturas/escrituras y JWTs reales. Reporta throughput,
+        errores, histograma de latencias y esperas por locks de la base.
+        Las cuentas se toman de la base configurada (usar la misma que el servidor con --base-url).
+        """
+        from .loadtest import run_loadtest, format_report, DEFAULT_MIX
+
+        print(f"--- Prueba de carga: {users} usuario(s), {duration}s ---")
+        try:
+            result = run_loadtest(
+                current_app._get_current_object(), users=users, duration=duration, mix=mix or DEFAULT_MIX,
+                base_url=base_url, password=password, seed=rng_seed, max_requests=max_requests,
+            )
+        except (ValueError, RuntimeError) as e:
+            print(f"!!! {e}")
+            raise SystemExit(1)
+        print(format_report(result))
+        if report:
+            with open(report, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+            print(f"-> Reporte guardado en {report}")
+
+    # ----------------------------------------------------
+    # Comando CLI: equivalencia y velocidad de los serializadores compilados
+    # ----------------------------------------------------
+    @app.cli.command("serializers-check")
+    @click.option("--limit", default=2000, show_default=True, help="Filas por modelo a serializar.")
+    @click.option("--repeat", default=5, show_default=True, help="Repeticiones de la medición (se toma la mejor).")
+    def serializers_check_command(limit, repeat):
+        """Compara la salida de los serializadores compilados con schema.dump() (la referencia)
+        sobre filas reales de la base y mide la mejora. Termina con código 1 si alguna salida difiere.
+        """
+        from .models import (Post, Comment, Category, Usuario,
+                             posts_schema, comments_schema, categories_schema, usuarios_schema)
+        from .loading import loader_options
+        from .serializers import check_equivalence, benchmark
+
+        failed = False
+        print("--- Serializadores compilados vs schema.dump() ---")
+        for model, schema in ((Post, posts_schema), (Comment, comments_schema),
+                              (Category, categories_schema), (Usuario, usuarios_schema)):
+            objects = db.session.execute(
+                db.select(model).options(*loader_options(schema)).order_by(model.id).limit(limit)
+            ).unique().scalars().all()
+            mismatches = check_equivalence(schema, objects)
+            reference, compiled = benchmark(schema, objects, repeat)
+            speedup = reference / compiled if compiled else 0
+            status = "OK  " if not mismatches else "FAIL"
+            print(f"{status} {type(schema).__name__:<16} {len(objects):>6} fila(s)  "
+                  f"dump={reference * 1000:8.2f}ms  compilado={compiled * 1000:8.2f}ms  x{speedup:.1f}")
+            for index, expected, got in mismatches[:3]:
+                print(f"       fila {index}: esperado {expected!r}")
+                print(f"       {'':>{len(str(index)) + 5}} obtenido {got!r}")
+            failed = failed or bool(mismatches)
+
+        if failed:
+            raise SystemExit(1)
+
+    # ----------------------------------------------------
+    # Comando CLI: sincronizar réplicas SQLite (pruebas locales)
+    # ----------------------------------------------------
+    @app.cli.command("replica-sync")
+    def replica_sync_command():
+        """Copia la base SQLite primaria en cada réplica SQLite de SQLALCHEMY_REPLICA_URIS.
+
+        Sustituye a la replicación del motor para probar el ruteo de lecturas en local.
+        """
+        from .replicas import sync_sqlite_replicas, replica_set
+
+        try:
+            copied = sync_sqlite_replicas(current_app, db)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            raise SystemExit(1)
+        if not copied:
+            print("No hay réplicas SQLite configuradas (SQLALCHEMY_REPLICA_URIS).")
+            return
+        print(f"Réplicas sincronizadas: {', '.join(copied)}")
+        for name, state in replica_set.stats().items():
+            print(f"  {name}: {'sana' if state['healthy'] else 'caída'}")
+
+    # ----------------------------------------------------
+    # Comando CLI: worker de la cola de trabajos
+    # ----------------------------------------------------
+    @app.cli.command("worker")
+    @click.option("--threads", type=int, default=None, help="Hilos del pool (por defecto JOBS_WORKER_THREADS).")
+    @click.option("--poll-interval", type=float, default=None, help="Segundos entre consultas con la cola vacía.")
+    @click.option("--once", is_flag=True, help="Procesar los jobs vencidos y terminar.")
+    def worker_command(threads, poll_interval, once):
+        """Ejecuta los jobs encolados (tabla `jobs`) hasta recibir SIGINT/SIGTERM."""
+        import signal
+        from .jobs import Worker, job_counts
+
+        worker = Worker(
+            current_app._get_current_object(),
+            threads=threads or current_app.config.get('JOBS_WORKER_THREADS', 4),
+            poll_interval=poll_interval or current_app.config.get('JOBS_POLL_INTERVAL', 1.0),
+        )
+        if not once:
+            signal.signal(signal.SIGTERM, worker.stop)
+            signal.signal(signal.SIGINT, worker.stop)
+
+        print(f"Worker {worker.worker_id}: {worker.threads} hilo(s), cola: {job_counts() or 'vacía'}")
+        executed = worker.run(once=once)
+        print(f"Worker detenido: {executed} job(s) ejecutado(s). Cola: {job_counts() or 'vacía'}")
@@ -0,0 +1,150 @@
+import gzip
+import os
+import zlib
+
+from flask import request
+from werkzeug.security import safe_join
+
+from .cache import TTLCache, MISSING
+
+# Compresión gzip de respuestas (JSON, HTML, NDJSON, CSS/JS).
+#
+# - Se negocia con Accept-Encoding; las respuestas compresibles llevan siempre
+#   `Vary: Accept-Encoding` para que los caches intermedios no mezclen versiones.
+# - Las respuestas con cuerpo completo se comprimen sólo si superan un tamaño
+#   mínimo (en cuerpos chicos gzip no ahorra nada y cuesta CPU).
+# - Las respuestas en streaming (NDJSON) se comprimen de a pedazos con un
+#   compresor incremental y un flush cada tantos bytes, así el cliente sigue
+#   recibiendo datos a medida que se generan.
+# - Los archivos estáticos se comprimen una sola vez y se guardan en un caché
+#   LRU (clave: ruta + mtime + tamaño), así los más pedidos no se recomprimen.
+# - La representación comprimida es otra representación: su ETag lleva el
+#   sufijo '-gzip' (ver conditional.py, que acepta ambas variantes).
+
+GZIP_ETAG_SUFFIX = '-gzip'
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/javascript',
+    'image/svg+xml',
+}
+
+static_gzip_cache = TTLCache('static_gzip', maxsize=256, ttl=24 * 3600)
+
+
+def accepts_gzip():
+    return request.accept_encodings['gzip'] > 0
+
+
+def _is_candidate(response):
+    return (
+        response.status_code not in (204, 206, 304)
+        and response.status_code >= 200
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+        and 'Content-Encoding' not in response.headers
+    )
+
+
+def _mark_gzip(response):
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not etag.endswith(GZIP_ETAG_SUFFIX):
+        response.set_etag(etag + GZIP_ETAG_SUFFIX, weak=weak)
+
+
+def _gzip_stream(chunks, level, flush_bytes):
+    """Comprime un iterable de chunks; hace flush cada `flush_bytes` sin comprimir."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            pending += len(chunk)
+            if pending >= flush_bytes:
+                data += compressor.flush(zlib.Z_SYNC_FLUSH)
+                pending = 0
+            if data:
+                yield data
+        yield compressor.flush(zlib.Z_FINISH)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def _static_gzip(app, level, min_size):
+    """Versión comprimida (cacheada) del archivo estático del request, o None."""
+    filename = (request.view_args or {}).get('filename')
+    folder = app.static_folder
+    if request.blueprint:
+        blueprint = app.blueprints.get(request.blueprint)
+        folder = getattr(blueprint, 'static_folder', None) or folder
+    path = safe_join(folder, filename) if folder and filename else None
+    if path is None or not os.path.isfile(path):
+        return None
+
+    stat = os.stat(path)
+    if stat.st_size < min_size:
+        return None
+    key = (path, stat.st_mtime_ns, stat.st_size, level)
+    data = static_gzip_cache.get(key)
+    if data is MISSING:
+        with open(path, 'rb') as f:
+            data = gzip.compress(f.read(), compresslevel=level, mtime=0)
+        static_gzip_cache.set(key, data)
+    return data
+
+
+def init_compression(app):
+    """Registra el after_request de compresión (si COMPRESS_ENABLED)."""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    level = app.config.get('COMPRESS_LEVEL', 6)
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+    flush_bytes = app.config.get('COMPRESS_STREAM_FLUSH_BYTES', 16 * 1024)
+    static_gzip_cache.configure(maxsize=app.config.get('COMPRESS_STATIC_CACHE_SIZE', 256))
+
+    @app.after_request
+    def compress_response(response):
+        if not _is_candidate(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        if not accepts_gzip():
+            return response
+
+        # Archivos estáticos (send_file): comprimidos una vez y servidos desde el caché
+        if response.direct_passthrough:
+            if request.endpoint is None or not request.endpoint.endswith('static') or response.status_code != 200:
+                return response
+            data = _static_gzip(app, level, min_size)
+            if data is None:
+                return response
+            close = getattr(response.response, 'close', None)
+            if close is not None:
+                close()
+            response.direct_passthrough = False
+            response.set_data(data)
+            _mark_gzip(response)
+            return response
+
+        # Streaming: compresión incremental, sin Content-Length
+        if response.is_streamed:
+            response.response = _gzip_stream(response.response, level, flush_bytes)
+            response.headers.pop('Content-Length', None)
+            _mark_gzip(response)
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(gzip.compress(data, compresslevel=level, mtime=0))
+        _mark_gzip(response)
+        return response
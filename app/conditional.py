@@ -0,0 +1,85 @@
+import hashlib
+from datetime import timezone
+
+from flask import request, make_response
+
+from .compression import GZIP_ETAG_SUFFIX
+
+# GET condicional (ETag / Last-Modified).
+# La idea es decidir el 304 con una query barata (sólo las columnas de versión)
+# antes de cargar la fila completa con sus relaciones y serializarla.
+#
+# Los recursos cuyo cuerpo incluye un dato que cambia sin cambiar la versión
+# (view_count de los posts, ver view_counts.py) usan ETag débil (W/"..."): dos
+# respuestas con el mismo ETag son equivalentes, no idénticas byte a byte.
+# If-None-Match se compara siempre en forma débil (RFC 9110, 13.1.2).
+
+
+def make_etag(*parts):
+    """ETag calculado a partir de las partes que definen la versión del recurso."""
+    raw = '|'.join('' if p is None else (p.isoformat() if hasattr(p, 'isoformat') else str(p)) for p in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def latest(*timestamps):
+    """El más reciente de los timestamps no nulos (None si no hay ninguno).
+
+    Para recursos que serializan filas relacionadas: la versión es la de la
+    fila más recientemente modificada.
+    """
+    present = [t for t in timestamps if t is not None]
+    return max(present) if present else None
+
+
+def _as_http_date(dt):
+    """Los timestamps se guardan en UTC sin zona horaria; HTTP usa resolución de segundos."""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.replace(microsecond=0)
+
+
+def not_modified(etag, last_modified=None, weak=False):
+    """
+    Si la petición condicional coincide con la versión actual, devuelve una
+    respuesta 304 lista para retornar; si no, None.
+
+    If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110).
+    """
+    matched_etag = match_validators(request.if_none_match, request.if_modified_since, etag, last_modified)
+    if matched_etag is None:
+        return None
+
+    response = make_response('', 304)
+    return set_validators(response, matched_etag, last_modified, weak=weak)
+
+
+def match_validators(if_none_match, if_modified_since, etag, last_modified=None):
+    """
+    Evalúa los headers condicionales ya parseados (werkzeug ETags / datetime).
+    Retorna el ETag a devolver con el 304, o None si hay que responder completo.
+    """
+    last_modified = _as_http_date(last_modified)
+
+    if if_none_match:
+        # El cliente puede tener la versión comprimida (ETag con sufijo '-gzip', ver
+        # compression.py): es el mismo recurso, así que también vale para el 304.
+        if if_none_match.contains_weak(etag + GZIP_ETAG_SUFFIX):
+            return etag + GZIP_ETAG_SUFFIX
+        matches = if_none_match.contains_weak(etag) or if_none_match.star_tag
+    elif if_modified_since and last_modified is not None:
+        matches = last_modified <= if_modified_since
+    else:
+        matches = False
+    return etag if matches else None
+
+
+def set_validators(response, etag, last_modified=None, weak=False):
+    """Agrega ETag (débil con `weak`) y Last-Modified a la respuesta (200 o 304)."""
+    response.set_etag(etag, weak=weak)
+    if last_modified is not None:
+        response.last_modified = _as_http_date(last_modified)
+    # El cliente puede cachear pero debe revalidar siempre
+    response.headers.setdefault('Cache-Control', 'no-cache')
+    return response
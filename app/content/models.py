@@ -13,5 +13,7 @@ class Post(db.Model):
 
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     last_edited = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Vistas, con escritura diferida por lotes (ver app/view_counts.py)
+    view_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     author_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
@@ -4,6 +4,11 @@ from app.extensions import db
 from app.auth.models import User, RoleEnum # <<-- CORREGIDO: Usamos RoleEnum
 from .models import Post
 from .schemas import post_schema, posts_schema, post_input_schema
+from app.loading import loader_options
+from app.replicas import read_replica
+from app import serializers
+from app.conditional import make_etag, latest, not_modified, set_validators
+from app.view_counts import record_view
 from app.auth.decorators import require_permission
 from sqlalchemy.exc import NoResultFound
 
@@ -16,6 +21,7 @@ bp = Blueprint('content', __name__, url_prefix='/content')
 # -------------------------------------------------------------------
 @bp.route('/posts', methods=['GET'])
 @jwt_required()
+@read_replica
 def list_posts():
     """Permite a cualquier usuario autenticado (READER o superior)
     listar todos los posts publicados."""
@@ -35,9 +41,10 @@ def list_posts():
         else:
             q = db.select(Post).order_by(Post.timestamp.desc())
 
-        posts = db.session.execute(q).scalars().all()
+        # Precarga del autor según el schema (evita una query por post)
+        posts = db.session.execute(q.options(*loader_options(posts_schema))).scalars().all()
         
-        return jsonify(posts_schema.dump(posts)), 200
+        return jsonify(serializers.dump(posts_schema, posts)), 200
     
     except Exception as e:
         # Esto captura errores de base de datos o de Marshmallow
@@ -88,13 +95,20 @@ def create_post():
 # -------------------------------------------------------------------
 @bp.route('/posts/<int:post_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_post(post_id):
     """Permite a cualquier usuario autenticado ver los detalles de un post.
     Si el post NO está publicado, solo su autor o un ADMIN/EDITOR puede verlo.
+    Soporta GET condicional (If-None-Match / If-Modified-Since -> 304).
     """
     
-    # Obtener el post
-    post = db.session.get(Post, post_id)
+    # Obtener sólo las columnas necesarias para permisos y versión (query barata)
+    post = db.session.execute(
+        db.select(Post.id, Post.status, Post.author_id, Post.timestamp, Post.last_edited,
+                  User.updated_at.label('author_updated_at'))
+        .outerjoin(User, User.id == Post.author_id)
+        .where(Post.id == post_id)
+    ).first()
     
     if post is None:
         return jsonify({"msg": "Post no encontrado"}), 404
@@ -116,8 +130,22 @@ def get_post(post_id):
         if not is_author and not is_editor_or_admin:
             return jsonify({"msg": "Acceso denegado: El post no está publicado."}), 403
 
-    # Si pasa las comprobaciones, serializar y devolver
-    return jsonify(post_schema.dump(post)), 200
+    # La vista se cuenta también en las revalidaciones (304)
+    record_view(post.id)
+
+    # El 304 se decide después del control de visibilidad para no revelar el post
+    # El autor se anida en la respuesta: su versión también cuenta
+    last_modified = latest(post.last_edited or post.timestamp, post.author_updated_at)
+    etag = make_etag('content-post', post.id, post.last_edited or post.timestamp,
+                     post.author_updated_at, post.status)
+    # ETag débil: el cuerpo incluye view_count, que cambia sin cambiar la versión
+    cached = not_modified(etag, last_modified, weak=True)
+    if cached is not None:
+        return cached
+
+    # Si pasa las comprobaciones y cambió, cargar el post completo, serializar y devolver
+    full_post = db.session.get(Post, post_id, options=loader_options(post_schema))
+    return set_validators(jsonify(serializers.dump(post_schema, full_post)), etag, last_modified, weak=True), 200
 
 
 # -------------------------------------------------------------------
@@ -27,6 +27,7 @@ class PostSchema(ma.SQLAlchemySchema):
             "status", 
             "timestamp", 
             "last_edited", 
+            "view_count", 
             "author_id", 
             "author"
         )
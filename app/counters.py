@@ -0,0 +1,91 @@
+from sqlalchemy import func, update, select
+
+from .extensions import db
+from .auth.user_cache import invalidate_user_on_commit, user_cache
+
+# Contadores desnormalizados:
+#   posts.comment_count, categories.post_count, usuarios.post_count
+#
+# Se mantienen en la misma transacción que la escritura que los modifica, con
+# UPDATE ... SET x = x + delta (atómico en la base, sin leer-modificar-escribir),
+# así los schemas pueden mostrarlos sin queries extra. Además, cada comentario
+# encola 'refresh_comment_count' (tasks.py), que recuenta el post sólo como
+# reconciliación: el contador no depende de que haya un worker. Si alguna vez se
+# desalinean (cargas masivas, borrados manuales), `repair_counters()` los
+# recalcula en bloque: `flask repair-counters`.
+
+
+def comments_changed(post_id, delta):
+    """Suma `delta` al comment_count del post."""
+    from .models import Post
+    db.session.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(comment_count=Post.comment_count + delta)
+    )
+
+
+def posts_changed(user_id, category_id, delta):
+    """Suma `delta` al post_count del autor y de la categoría."""
+    from .models import Usuario, Category
+    if user_id is not None:
+        db.session.execute(
+            update(Usuario)
+            .where(Usuario.id == user_id)
+            .values(post_count=Usuario.post_count + delta)
+        )
+        # El caché de usuarios de JWT guarda post_count: no se entera de un UPDATE de Core
+        invalidate_user_on_commit(user_id)
+    if category_id is not None:
+        db.session.execute(
+            update(Category)
+            .where(Category.id == category_id)
+            .values(post_count=Category.post_count + delta)
+        )
+
+
+def post_category_changed(old_category_id, new_category_id):
+    """Mueve un post de categoría: resta en la vieja y suma en la nueva."""
+    if old_category_id == new_category_id:
+        return
+    posts_changed(None, old_category_id, -1)
+    posts_changed(None, new_category_id, 1)
+
+
+def repair_counters():
+    """Recalcula todos los contadores con UPDATEs correlacionados (uno por tabla).
+
+    Retorna la cantidad de filas actualizadas por tabla.
+    """
+    from .models import Post, Comment, Usuario, Category
+
+    comments_per_post = (
+        select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    )
+    posts_per_user = (
+        select(func.count(Post.id)).where(Post.user_id == Usuario.id).scalar_subquery()
+    )
+    posts_per_category = (
+        select(func.count(Post.id)).where(Post.category_id == Category.id).scalar_subquery()
+    )
+
+    # synchronize_session=False: es una operación masiva, no hay objetos que refrescar.
+    # Sólo se tocan las filas desalineadas, para no reescribir (ni cambiar updated_at) de más.
+    result = {}
+    for name, model, column, subquery in (
+        ('posts.comment_count', Post, Post.comment_count, comments_per_post),
+        ('usuarios.post_count', Usuario, Usuario.post_count, posts_per_user),
+        ('categories.post_count', Category, Category.post_count, posts_per_category),
+    ):
+        res = db.session.execute(
+            update(model)
+            .where(column != subquery)
+            .values({column.key: subquery})
+            .execution_options(synchronize_session=False)
+        )
+        result[name] = res.rowcount
+    db.session.commit()
+    # No se sabe qué usuarios cambiaron: se descarta el caché de usuarios completo
+    if result['usuarios.post_count']:
+        user_cache.clear()
+    return result
@@ -0,0 +1,170 @@
+import gzip
+import io
+import json
+import os
+import sys
+from datetime import datetime
+import enum
+
+from sqlalchemy import DateTime
+
+from .extensions import db
+
+# Exportación / importación de todo el dataset del blog en NDJSON.
+#
+# Formato: la primera línea es una cabecera y luego una línea por fila,
+#   {"format": "miniblog-ndjson", "version": 1}
+#   {"table": "roles", "row": {...}}
+#   {"table": "usuarios", "row": {...}}
+#   ...
+# Las tablas se escriben en orden de dependencias (padres antes que hijos),
+# así la importación puede insertar en el mismo orden sin violar FKs.
+# Ambos sentidos trabajan en streaming con memoria acotada: la exportación lee
+# con cursores del lado del servidor (stream_results + yield_per) y la
+# importación inserta por lotes con executemany.
+
+FORMAT_NAME = 'miniblog-ndjson'
+FORMAT_VERSION = 1
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def export_tables():
+    """Tablas a exportar, en orden de dependencias (FK)."""
+    from .models import Role, Usuario, Category, Post, Comment
+    return [m.__table__ for m in (Role, Usuario, Category, Post, Comment)]
+
+
+def _open(path, mode, compress):
+    """Abre `path` en modo texto; '-' es stdin/stdout. Gzip si compress o si termina en .gz."""
+    if path == '-':
+        stream = sys.stdout.buffer if 'w' in mode else sys.stdin.buffer
+        if compress:
+            stream = gzip.GzipFile(fileobj=stream, mode=mode)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    if compress or path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value
+
+
+def _decoder_for(table):
+    """Función que convierte un dict del archivo a los tipos de las columnas de `table`."""
+    datetime_columns = {c.name for c in table.columns if isinstance(c.type, DateTime)}
+    known = {c.name for c in table.columns}
+
+    def decode(row):
+        # Columnas que no existen en el destino (otra versión del esquema) se ignoran
+        decoded = {k: v for k, v in row.items() if k in known}
+        for name in datetime_columns:
+            if decoded.get(name) is not None:
+                decoded[name] = datetime.fromisoformat(decoded[name])
+        return decoded
+
+    return decode
+
+
+def export_dataset(path, compress=False, batch_size=DEFAULT_BATCH_SIZE, log=print):
+    """Escribe todas las tablas en `path`. Retorna {tabla: filas exportadas}."""
+    counts = {}
+    with _open(path, 'w', compress) as out, db.engine.connect() as conn:
+        out.write(json.dumps({"format": FORMAT_NAME, "version": FORMAT_VERSION}) + '\n')
+        # Cursor del lado del servidor: el driver no trae toda la tabla a memoria
+        conn = conn.execution_options(stream_results=True, yield_per=batch_size)
+        for table in export_tables():
+            n = 0
+            result = conn.execute(table.select().order_by(*table.primary_key.columns))
+            for row in result.mappings():
+                record = {"table": table.name, "row": {k: _encode(v) for k, v in row.items()}}
+                out.write(json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n')
+                n += 1
+            counts[table.name] = n
+            log(f"-> {table.name}: {n} fila(s)")
+    return counts
+
+
+def _read_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return int(json.load(f)["line"])
+    return 0
+
+
+def _write_checkpoint(path, line_no):
+    """Escritura atómica: un corte a mitad de escritura no deja el checkpoint corrupto."""
+    if not path:
+        return
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"line": line_no}, f)
+    os.replace(tmp, path)
+
+
+def import_dataset(path, compress=False, batch_size=DEFAULT_BATCH_SIZE, checkpoint=None, log=print):
+    """
+    Inserta el contenido de `path` en la base actual, por lotes (un commit por lote).
+
+    Si se indica `checkpoint`, después de cada commit se guarda la última línea
+    confirmada; al volver a ejecutar con el mismo archivo se retoma desde ahí.
+    Retorna {tabla: filas insertadas en esta ejecución}.
+    """
+    tables = {t.name: t for t in export_tables()}
+    order = list(tables)
+    decoders = {name: _decoder_for(t) for name, t in tables.items()}
+
+    resume_from = _read_checkpoint(checkpoint)
+    if resume_from:
+        log(f"-> Retomando desde la línea {resume_from + 1}")
+
+    counts = {}
+    batch, batch_table, last_line = [], None, resume_from
+    current_position = -1
+
+    def flush(line_no):
+        nonlocal batch
+        if not batch:
+            return
+        db.session.execute(tables[batch_table].insert(), batch)
+        db.session.commit()
+        counts[batch_table] = counts.get(batch_table, 0) + len(batch)
+        _write_checkpoint(checkpoint, line_no)
+        batch = []
+
+    with _open(path, 'r', compress) as src:
+        header = json.loads(src.readline())
+        if header.get("format") != FORMAT_NAME:
+            raise ValueError("El archivo no es una exportación de miniblog.")
+
+        for line_no, line in enumerate(src, start=1):
+            if line_no <= resume_from or not line.strip():
+                continue
+            record = json.loads(line)
+            table_name = record["table"]
+            if table_name not in tables:
+                raise ValueError(f"Línea {line_no}: tabla desconocida '{table_name}'.")
+
+            # Las tablas deben venir en orden de dependencias
+            position = order.index(table_name)
+            if position < current_position:
+                raise ValueError(f"Línea {line_no}: '{table_name}' aparece después de tablas que dependen de ella.")
+            current_position = position
+
+            if table_name != batch_table or len(batch) >= batch_size:
+                flush(last_line)
+                batch_table = table_name
+            batch.append(decoders[table_name](record["row"]))
+            last_line = line_no
+
+        flush(last_line)
+
+    for name, n in counts.items():
+        log(f"-> {name}: {n} fila(s)")
+
+    return counts
@@ -1,6 +1,71 @@
+from collections import namedtuple
 from functools import wraps
-from flask import abort, jsonify
-from flask_jwt_extended import get_jwt, jwt_required, get_jwt_identity
+from flask import abort, jsonify, g, current_app
+from flask_jwt_extended import get_jwt, jwt_required, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy.orm import joinedload
+from ..extensions import db
+
+# Identidad resuelta a partir de los claims verificados del JWT (sin tocar la DB)
+ClaimsIdentity = namedtuple('ClaimsIdentity', ['id', 'role'])
+
+# --- Resolución de identidad y usuario actual ---
+
+def current_user_id():
+    """ID (int) del usuario del token. El identity del JWT viaja como string."""
+    return int(get_jwt_identity())
+
+def get_current_user():
+    """
+    Devuelve el Usuario autenticado, cargándolo (con su rol) una sola vez por request.
+    El resultado queda memoizado en flask.g para el resto del request.
+    """
+    if '_current_usuario' not in g:
+        from ..models import Usuario
+        g._current_usuario = db.session.get(
+            Usuario, current_user_id(), options=[joinedload(Usuario.role)]
+        )
+    return g._current_usuario
+
+# --- Verificación de roles (capa única de autorización) ---
+
+def is_allowed(allowed_roles=None, check_revocation=None):
+    """
+    Verifica si el usuario autenticado tiene uno de los roles permitidos.
+
+    El rol se toma del claim 'role' del JWT (ya verificado por firma), por lo que
+    el camino normal no hace ninguna query. Sólo se consulta la base de datos si:
+      - el token no trae el claim 'role' (tokens emitidos antes de agregarlo), o
+      - se pide chequeo de revocación (usuario borrado o desactivado), ya sea con
+        `check_revocation=True` o con AUTH_CHECK_REVOCATION en la config.
+
+    :param allowed_roles: lista de valores de RoleName; None acepta cualquier rol.
+    Retorna (True, ClaimsIdentity, None) si el rol es suficiente.
+    Retorna (False, response, status_code) si falla la autenticación o la autorización.
+    """
+    try:
+        verify_jwt_in_request()
+        user_id = current_user_id()
+    except Exception:
+        # Errores de JWT (token expirado, inválido, etc.)
+        return False, jsonify({"msg": "Token inválido o requerido."}), 401
+
+    if check_revocation is None:
+        check_revocation = current_app.config.get('AUTH_CHECK_REVOCATION', False)
+
+    role = get_jwt().get('role')
+
+    if role is None or check_revocation:
+        current_user = get_current_user()
+        if not current_user:
+            return False, jsonify({"msg": "Usuario no encontrado."}), 404
+        if not current_user.is_active:
+            return False, jsonify({"msg": "Usuario desactivado."}), 401
+        # La DB es la fuente de verdad cuando la consultamos
+        role = current_user.role.name.value
+
+    if allowed_roles is None or role in allowed_roles:
+        return True, ClaimsIdentity(id=user_id, role=role), None
+    return False, jsonify({"msg": "Acceso denegado. Rol insuficiente."}), 403
 
 # --- Decorador de Verificación de Roles ---
 
@@ -3,8 +3,10 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_marshmallow import Marshmallow
 
+from .replicas import RoutingSession  # lecturas de los GET @read_replica hacia una réplica
+
     # Inicialización de extensiones (sin pasar 'app')
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager() 
 ma = Marshmallow()
\ No newline at end of file
@@ -0,0 +1,83 @@
+from flask import request
+from marshmallow import fields
+
+# Sparse fieldsets: `?fields=id,title,timestamp&include=author`.
+#
+# - `fields`: campos a devolver (si falta, todos los campos simples del schema).
+# - `include`: relaciones anidadas a devolver (si falta y hay `fields`, sólo las
+#   que aparezcan en `fields`; si faltan ambos, la representación completa).
+#
+# El resultado es otra instancia del mismo schema con `only=...`. Se cachean por
+# (schema, campos), así loading.loader_options() y serializers.compile_schema()
+# -que cachean por instancia- trabajan una sola vez por combinación. Como
+# loader_options() arma las opciones a partir de dump_fields, las relaciones que
+# no se piden no se cargan (sin JOIN) y con narrow=True las columnas que no se
+# serializan no se leen de la base (load_only).
+
+_sparse_cache = {}
+
+
+class InvalidFieldset(ValueError):
+    """`fields` / `include` nombran campos que el recurso no tiene."""
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def sparse_schema(schema, only=None, include=None):
+    """Instancia (cacheada) de `schema` restringida a `only` + `include`.
+
+    Retorna el mismo `schema` si no se pidió ninguna restricción.
+    """
+    if only is None and include is None:
+        return schema
+
+    available = schema.dump_fields
+    nested = {name for name, field in available.items() if isinstance(field, fields.Nested)}
+
+    unknown = sorted(set(only or ()) - set(available))
+    if unknown:
+        raise InvalidFieldset(f"Campos desconocidos en 'fields': {', '.join(unknown)}.")
+    unknown = sorted(set(include or ()) - nested)
+    if unknown:
+        raise InvalidFieldset(f"Relaciones desconocidas en 'include': {', '.join(unknown)}. "
+                              f"Disponibles: {', '.join(sorted(nested))}.")
+
+    wanted = set(only) if only is not None else set(available) - nested
+    wanted |= set(include or ())
+    if not wanted:
+        raise InvalidFieldset("'fields' no puede estar vacío.")
+
+    # Mismo orden que el schema original
+    selected = tuple(name for name in available if name in wanted)
+    if selected == tuple(available):
+        return schema
+
+    key = (id(schema), selected)
+    if key not in _sparse_cache:
+        _sparse_cache[key] = type(schema)(many=schema.many, only=selected)
+    return _sparse_cache[key]
+
+
+def fieldset_from_request(schema):
+    """Schema a usar según `?fields=` e `?include=` (lanza InvalidFieldset)."""
+    return fieldset_from_args(schema, request.args)
+
+
+def fieldset_from_args(schema, args):
+    """Igual que fieldset_from_request() pero con un mapping de query string cualquiera."""
+    only = args.get('fields')
+    include = args.get('include')
+    return sparse_schema(
+        schema,
+        _split(only) if only is not None else None,
+        _split(include) if include is not None else None,
+    )
+
+
+def fieldset_tag(schema, base):
+    """Identifica la representación para el ETag: None si es la completa (`base`)."""
+    if schema is base:
+        return None
+    return ','.join(schema.dump_fields)
@@ -0,0 +1,170 @@
+import heapq
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from .extensions import db
+
+# Instrumentación de SQL por request.
+# Se engancha a los eventos del engine de SQLAlchemy y acumula en `flask.g`:
+#   - cantidad de sentencias ejecutadas
+#   - tiempo total en la base de datos
+#   - las sentencias más lentas
+# Los resultados se exponen como headers (X-DB-Queries, X-DB-Time, Server-Timing)
+# y las sentencias que superan el umbral se registran en el logger 'app.sql.slow'.
+
+slow_query_logger = logging.getLogger('app.sql.slow')
+
+# Lecturas async (app/aio.py): no hay request de Flask, las estadísticas del
+# request van en un ContextVar (los eventos del engine corren en la misma tarea)
+async_sql_stats = ContextVar('async_sql_stats', default=None)
+
+
+class RequestSQLStats:
+    """Acumulador de estadísticas SQL de un request."""
+
+    def __init__(self, keep_slowest):
+        self.count = 0
+        self.total_ms = 0.0
+        self.keep_slowest = keep_slowest
+        # min-heap de (duración, orden, sentencia) con las N más lentas
+        self._slowest = []
+
+    def record(self, statement, duration_ms):
+        self.count += 1
+        self.total_ms += duration_ms
+        item = (duration_ms, self.count, statement)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, item)
+        elif duration_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    @property
+    def slowest(self):
+        return [(ms, stmt) for ms, _, stmt in sorted(self._slowest, reverse=True)]
+
+
+def get_request_sql_stats():
+    """Estadísticas del request actual (o None fuera de un request)."""
+    if not has_request_context():
+        return async_sql_stats.get()
+    return g.get('_sql_stats')
+
+
+def sql_headers(stats):
+    """Headers X-DB-Queries, X-DB-Time y Server-Timing de un request."""
+    return [
+        ('X-DB-Queries', str(stats.count)),
+        ('X-DB-Time', f"{stats.total_ms:.2f}"),
+        ('Server-Timing', f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"'),
+    ]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+    if context is not None:
+        context._query_timed = True
+
+
+def _handle_error(exception_context):
+    # Si la sentencia falla no hay after_cursor_execute: se descarta su inicio para
+    # que no quede en la conexión (vuelve al pool) y desfase las mediciones siguientes
+    conn = exception_context.connection
+    if conn is None or not getattr(exception_context.execution_context, '_query_timed', False):
+        return
+    starts = conn.info.get('_query_start')
+    if starts:
+        starts.pop()
+
+
+def _make_after_cursor_execute(app):
+    threshold_ms = app.config.get('SQL_SLOW_QUERY_MS', 200)
+
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('_query_start')
+        if not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+
+        stats = get_request_sql_stats()
+        if stats is not None:
+            stats.record(statement, duration_ms)
+
+        if duration_ms >= threshold_ms:
+            # Log estructurado (una línea JSON) para poder filtrarlo/agregarlo
+            slow_query_logger.warning(json.dumps({
+                "event": "slow_query",
+                "duration_ms": round(duration_ms, 2),
+                "threshold_ms": threshold_ms,
+                "endpoint": request.endpoint if has_request_context() else None,
+                "method": request.method if has_request_context() else None,
+                "path": request.path if has_request_context() else None,
+                "executemany": executemany,
+                "statement": statement,
+            }))
+
+    return _after_cursor_execute
+
+
+def init_sql_instrumentation(app):
+    """Registra los eventos del engine y los hooks de request en `app`.
+
+    Aplica a todos los blueprints (/api/v1, /api/content, /auth) porque se
+    engancha a nivel de aplicación y de engine.
+    """
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+
+    after_cursor_execute = _make_after_cursor_execute(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
+
+    keep_slowest = app.config.get('SQL_KEEP_SLOWEST', 5)
+
+    @app.before_request
+    def _start_sql_stats():
+        g._sql_stats = RequestSQLStats(keep_slowest)
+
+    @app.after_request
+    def _add_sql_headers(response):
+        stats = get_request_sql_stats()
+        if stats is None:
+            return response
+
+        for name, value in sql_headers(stats):
+            response.headers.add(name, value)
+        log_slow_request(app, stats, request.endpoint, request.method, request.path)
+        return response
+
+
+def log_slow_request(app, stats, endpoint, method, path):
+    """Resumen del request si alguna sentencia superó el umbral."""
+    threshold_ms = app.config.get('SQL_SLOW_QUERY_MS', 200)
+    if stats.slowest and stats.slowest[0][0] >= threshold_ms:
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_request_sql",
+            "endpoint": endpoint,
+            "method": method,
+            "path": path,
+            "query_count": stats.count,
+            "db_time_ms": round(stats.total_ms, 2),
+            "slowest": [{"duration_ms": round(ms, 2), "statement": stmt} for ms, stmt in stats.slowest],
+        }))
+
+
+def init_async_sql_instrumentation(app, engine):
+    """Los mismos eventos sobre un AsyncEngine (app/aio.py); las estadísticas van en async_sql_stats."""
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return False
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _make_after_cursor_execute(app))
+    event.listen(sync_engine, 'handle_error', _handle_error)
+    return True
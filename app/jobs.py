@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+
+# Cola de trabajos en segundo plano respaldada por la tabla `jobs`.
+#
+# Los efectos secundarios que el cliente no necesita esperar se encolan con
+# enqueue() DENTRO de la transacción del request: el job se confirma (o se
+# descarta) junto con la escritura que lo originó, sin perder trabajos si el
+# proceso muere entre el commit y el encolado.
+#
+# `flask worker` los ejecuta en un pool de hilos:
+#   - toma los pendientes vencidos con un UPDATE condicional (status='pending'),
+#     así varios workers pueden compartir la tabla sin ejecutar dos veces un job;
+#   - si el handler falla se reintenta con backoff exponencial + jitter hasta
+#     max_attempts, después queda en 'failed' con el último error;
+#   - los jobs 'running' de un worker que murió vuelven a 'pending' pasado
+#     JOBS_STALE_AFTER segundos (ejecución "al menos una vez": los handlers
+#     deben ser idempotentes).
+#
+# Idempotencia: con `key`, mientras haya un job pendiente con esa clave no se
+# encola otro (p. ej. muchos comentarios seguidos en un post -> un solo
+# recálculo de su contador). La clave se libera cuando el worker toma el job,
+# así un cambio posterior vuelve a encolar. El job pendiente no se consulta con
+# un SELECT sino que se toca con un UPDATE dentro de la transacción del
+# llamador: la fila queda bloqueada hasta su commit, así el worker no puede
+# tomarlo (y calcular sin este cambio) antes de que el cambio sea visible. Si
+# el worker lo tomó primero, el UPDATE no encuentra la fila y se encola otro.
+#
+# Sin JOBS_INLINE los jobs sólo avanzan con `flask worker` corriendo, así que
+# sólo se encola trabajo que el cliente no necesita ver reflejado en la
+# respuesta (p. ej. la reconciliación de contadores).
+
+logger = logging.getLogger('app.jobs')
+
+_handlers = {}
+
+
+def job(name, max_attempts=None):
+    """Registra `fn(**payload)` como handler del job `name`."""
+    def decorator(fn):
+        _handlers[name] = (fn, max_attempts)
+        return fn
+    return decorator
+
+
+def enqueue(name, payload=None, key=None, delay=0, max_attempts=None):
+    """Agrega un job a la sesión actual (lo confirma el commit del llamador).
+
+    Retorna el Job, o None si ya había uno pendiente con la misma `key` (o con
+    JOBS_INLINE, donde el handler se ejecuta en el momento).
+    """
+    from flask import current_app
+    from .models import Job
+
+    if name not in _handlers:
+        raise KeyError(f"Job desconocido: '{name}'")
+    if current_app.config.get('JOBS_INLINE', False):
+        # Sin worker (desarrollo): se ejecuta ya, dentro de la transacción del llamador
+        _handlers[name][0](**(payload or {}))
+        return None
+    if max_attempts is None:
+        max_attempts = _handlers[name][1] or current_app.config.get('JOBS_MAX_ATTEMPTS', 5)
+
+    if key is not None and _touch_pending(key):
+        return None
+
+    new_job = Job(
+        name=name,
+        payload=json.dumps(payload or {}),
+        status='pending',
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        dedupe_key=key,
+        created_at=datetime.utcnow(),
+    )
+    if key is None:
+        db.session.add(new_job)
+        return new_job
+
+    # Dos requests concurrentes pueden no encontrar pendiente a la vez: la
+    # restricción UNIQUE decide, y el perdedor descarta sólo su INSERT (savepoint)
+    # y toca el job del ganador (o encola de nuevo si el worker ya lo tomó)
+    for _ in range(3):
+        try:
+            with db.session.begin_nested():
+                db.session.add(new_job)
+            return new_job
+        except IntegrityError:
+            if _touch_pending(key):
+                return None
+    raise RuntimeError(f"No se pudo encolar el job '{name}' con clave '{key}'")
+
+
+def _touch_pending(key):
+    """Bloquea el job pendiente con `key` hasta el commit del llamador. ¿Había uno?"""
+    from .models import Job
+    result = db.session.execute(
+        update(Job)
+        .where(Job.dedupe_key == key, Job.status == 'pending')
+        .values(dedupe_key=key)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def backoff_seconds(attempts, base, cap):
+    """Espera antes del reintento `attempts` (1, 2, ...): exponencial con jitter y tope."""
+    delay = min(cap, base * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+# --- Ejecución
+
+def claim(worker_id, limit):
+    """Marca como 'running' hasta `limit` jobs vencidos y retorna sus ids."""
+    from .models import Job
+
+    now = datetime.utcnow()
+    candidates = db.session.execute(
+        select(Job.id)
+        .where(Job.status == 'pending', Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+    ).scalars().all()
+
+    claimed = []
+    for job_id in candidates:
+        # UPDATE condicional: si otro worker lo tomó primero, rowcount es 0
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'pending')
+            .values(status='running', locked_by=worker_id, locked_at=now, dedupe_key=None)
+        )
+        if result.rowcount:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+
+def run_job(job_id, backoff_base=5, backoff_cap=3600):
+    """Ejecuta un job ya tomado y registra el resultado. Retorna el estado final."""
+    from .models import Job
+
+    current = db.session.get(Job, job_id)
+    if current is None or current.status != 'running':
+        return None
+    name, payload = current.name, json.loads(current.payload or '{}')
+    handler = _handlers.get(name, (None, None))[0]
+
+    error = None
+    start = time.perf_counter()
+    try:
+        if handler is None:
+            raise KeyError(f"Job desconocido: '{name}'")
+        handler(**payload)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        error = f"{type(e).__name__}: {e}"
+
+    current = db.session.get(Job, job_id)
+    current.attempts += 1
+    current.locked_by = None
+    current.locked_at = None
+    if error is None:
+        current.status = 'done'
+        current.finished_at = datetime.utcnow()
+        current.last_error = None
+    elif current.attempts >= current.max_attempts:
+        current.status = 'failed'
+        current.finished_at = datetime.utcnow()
+        current.last_error = error
+    else:
+        current.status = 'pending'
+        current.last_error = error
+        current.run_at = datetime.utcnow() + timedelta(
+            seconds=backoff_seconds(current.attempts, backoff_base, backoff_cap))
+    db.session.commit()
+
+    logger.log(logging.INFO if error is None else logging.WARNING, json.dumps({
+        "event": "job", "id": job_id, "name": name, "status": current.status,
+        "attempts": current.attempts, "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        "error": error,
+    }))
+    return current.status
+
+
+def requeue_stale(stale_after):
+    """Devuelve a 'pending' los jobs 'running' de workers que dejaron de responder."""
+    from .models import Job
+    limit = datetime.utcnow() - timedelta(seconds=stale_after)
+    result = db.session.execute(
+        update(Job).where(Job.status == 'running', Job.locked_at < limit)
+        .values(status='pending', locked_by=None, locked_at=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def purge_finished(older_than_hours):
+    """Borra los jobs terminados ('done') más viejos que `older_than_hours`."""
+    from .models import Job
+    limit = datetime.utcnow() - timedelta(hours=older_than_hours)
+    result = db.session.execute(delete(Job).where(Job.status == 'done', Job.finished_at < limit))
+    db.session.commit()
+    return result.rowcount
+
+
+def job_counts():
+    """{status: cantidad} de la tabla de jobs."""
+    from .models import Job
+    rows = db.session.execute(select(Job.status, db.func.count(Job.id)).group_by(Job.status)).all()
+    return {status: n for status, n in rows}
+
+
+class Worker:
+    """Pool de hilos que consume la tabla de jobs (ver `flask worker`)."""
+
+    def __init__(self, app, threads=4, poll_interval=1.0):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"[:64]
+        self._stop = threading.Event()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        config = app.config
+        self.backoff_base = config.get('JOBS_BACKOFF_BASE', 5)
+        self.backoff_cap = config.get('JOBS_BACKOFF_MAX', 3600)
+        self.stale_after = config.get('JOBS_STALE_AFTER', 600)
+        self.retention_hours = config.get('JOBS_RETENTION_HOURS', 24)
+
+    def stop(self, *_args):
+        self._stop.set()
+
+    def _execute(self, job_id):
+        try:
+            with self.app.app_context():
+                run_job(job_id, self.backoff_base, self.backoff_cap)
+        except Exception:
+            logger.exception("Error inesperado ejecutando el job %s", job_id)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def run(self, once=False):
+        """Procesa jobs hasta stop() (o, con once=True, hasta vaciar la cola). Retorna los ejecutados."""
+        executed = 0
+        last_maintenance = 0.0
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job') as pool:
+            while not self._stop.is_set():
+                with self.app.app_context():
+                    if time.monotonic() - last_maintenance > 60:
+                        requeue_stale(self.stale_after)
+                        purge_finished(self.retention_hours)
+                        last_maintenance = time.monotonic()
+                    with self._lock:
+                        free = self.threads - self._in_flight
+                    job_ids = claim(self.worker_id, free) if free > 0 else []
+
+                for job_id in job_ids:
+                    with self._lock:
+                        self._in_flight += 1
+                    pool.submit(self._execute, job_id)
+                executed += len(job_ids)
+
+                if not job_ids:
+                    with self._lock:
+                        idle = self._in_flight == 0
+                    if once and idle:
+                        break
+                    self._stop.wait(self.poll_interval)
+        return executed
+
+
+# Registra los handlers incluidos en la app
+from . import tasks  # noqa: E402,F401
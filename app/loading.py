@@ -0,0 +1,83 @@
+import weakref
+
+from marshmallow import fields
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import configure_mappers, joinedload, load_only, selectinload
+from sqlalchemy.orm.interfaces import MANYTOONE
+
+# Estrategias de carga derivadas de los schemas de Marshmallow.
+# Cada campo Nested del schema corresponde a una relación del modelo; si la
+# dejamos en lazy loading, `schema.dump(lista)` dispara una query por fila
+# (problema N+1). Aquí recorremos el schema y armamos las opciones de carga
+# para que cada listado cueste un número fijo de queries.
+# Con narrow=True además se leen sólo las columnas que el schema serializa
+# (load_only), en la entidad principal y en cada relación anidada.
+
+# schema -> {(narrow, keep): opciones}. Débil: no mantiene vivos los schemas
+# (p. ej. los de fieldsets) y un id() reciclado no puede devolver otra entrada.
+_options_cache = weakref.WeakKeyDictionary()
+
+
+def _column_attributes(schema, mapper):
+    """Columnas del modelo que corresponden a campos simples del schema."""
+    columns = []
+    for name, field in schema.dump_fields.items():
+        prop = mapper.column_attrs.get(field.attribute or name)
+        if prop is not None and not isinstance(field, fields.Nested):
+            columns.append(prop.class_attribute)
+    # load_only() necesita al menos una columna; la PK se carga siempre
+    return columns or [mapper.get_property_by_column(mapper.primary_key[0]).class_attribute]
+
+
+def _nested_schema_options(schema, model, narrow=False):
+    options = []
+    mapper = sa_inspect(model)
+
+    # dump_fields ya respeta `only`/`exclude`, así que sólo cargamos lo que se serializa
+    for name, field in schema.dump_fields.items():
+        if not isinstance(field, fields.Nested):
+            continue
+
+        relationship = mapper.relationships.get(field.attribute or name)
+        # Las relaciones 'dynamic' devuelven una query, no se pueden precargar
+        if relationship is None or relationship.lazy == 'dynamic':
+            continue
+
+        # Muchos-a-uno (author, category, role): un JOIN no multiplica filas.
+        # Colecciones: selectinload hace una sola query extra con IN (...).
+        if relationship.direction is MANYTOONE:
+            option = joinedload(relationship.class_attribute)
+        else:
+            option = selectinload(relationship.class_attribute)
+
+        if narrow:
+            option = option.load_only(*_column_attributes(field.schema, relationship.mapper))
+        nested = _nested_schema_options(field.schema, relationship.mapper.class_, narrow)
+        if nested:
+            option = option.options(*nested)
+        options.append(option)
+
+    return options
+
+
+def loader_options(schema, model=None, narrow=False, keep=()):
+    """Opciones de carga (joinedload/selectinload) para serializar con `schema`.
+
+    :param narrow: leer sólo las columnas que se serializan (load_only).
+    :param keep: columnas de la entidad principal que se necesitan aunque no se
+                 serialicen (p. ej. las claves del cursor de paginación).
+
+    Se calculan una sola vez por instancia de schema.
+    """
+    cached = _options_cache.setdefault(schema, {})
+    key = (narrow, tuple(keep))
+    if key not in cached:
+        configure_mappers()
+        model = model or schema.opts.model
+        options = _nested_schema_options(schema, model, narrow)
+        if narrow:
+            columns = _column_attributes(schema, sa_inspect(model))
+            columns += [column for column in keep if not any(column is c for c in columns)]
+            options.insert(0, load_only(*columns))
+        cached[key] = options
+    return cached[key]
@@ -0,0 +1,329 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from sqlalchemy import event, text
+
+from .benchmarks import percentile
+from .extensions import db
+
+# Generador de carga concurrente (`flask loadtest`).
+#
+# N usuarios virtuales (un hilo cada uno) ejecutan una mezcla de operaciones
+# de lectura/escritura durante un tiempo fijo, contra el test client de la app
+# (en proceso) o contra un servidor real (--base-url). Cada usuario inicia
+# sesión con LoginAPI y usa su JWT real. Al final se reporta throughput, tasa
+# de errores, histograma de latencias por operación y esperas por locks de la
+# base, para dimensionar cantidad de workers y el pool de conexiones.
+#
+# Cada hilo acumula sus propias estadísticas (sin locks en el camino caliente)
+# y se combinan al terminar.
+
+# Todas las operaciones de la mezcla por defecto deben responder bien sin
+# carga (tests/test_loadtest.py): los errores del reporte son de la carga.
+DEFAULT_MIX = "post_list=40,post_detail=40,comment_list=15,login=3,comment_post=2"
+
+# Límites superiores (ms) de los buckets del histograma
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+
+
+def parse_mix(spec):
+    """'op=peso,op=peso' -> [(op, peso)]; valida que las operaciones existan."""
+    mix = []
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida '{name}'. Disponibles: {', '.join(OPERATIONS)}")
+        mix.append((name, float(weight or 1)))
+    if not mix or sum(w for _, w in mix) <= 0:
+        raise ValueError("La mezcla debe tener al menos una operación con peso positivo.")
+    return mix
+
+
+# --- Clientes HTTP: misma interfaz para el test client y un servidor real
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        resp = self.client.open(path, method=method, json=body, headers=headers or {})
+        return resp.status_code, resp.get_json(silent=True)
+
+
+class HTTPTransport:
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers or {})
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                status, raw = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, raw = e.code, e.read()
+        try:
+            return status, json.loads(raw) if raw else None
+        except ValueError:
+            return status, None
+
+
+# --- Operaciones de un usuario virtual
+
+class VirtualUser:
+    def __init__(self, transport, email, password, rng):
+        self.transport = transport
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.token = None
+        self.post_ids = []
+
+    def call(self, method, path, body=None, auth=False):
+        headers = {"Authorization": f"Bearer {self.token}"} if auth and self.token else {}
+        return self.transport.request(method, path, body, headers)
+
+    def random_post(self):
+        return self.rng.choice(self.post_ids) if self.post_ids else 1
+
+    def remember_posts(self, payload):
+        if isinstance(payload, dict):
+            ids = [p.get('id') for p in payload.get('items', []) if isinstance(p, dict)]
+            if ids:
+                # Conjunto acotado de posts "conocidos" por el usuario
+                self.post_ids = (self.post_ids + ids)[-200:]
+
+
+def op_login(vu):
+    status, payload = vu.call('POST', '/api/v1/auth/login', {"email": vu.email, "password": vu.password})
+    if status == 200 and payload:
+        vu.token = payload.get('access_token')
+    return status
+
+
+def op_post_list(vu):
+    status, payload = vu.call('GET', '/api/v1/posts?limit=20')
+    vu.remember_posts(payload)
+    return status
+
+
+def op_post_detail(vu):
+    return vu.call('GET', f'/api/v1/posts/{vu.random_post()}')[0]
+
+
+def op_comment_list(vu):
+    return vu.call('GET', f'/api/v1/posts/{vu.random_post()}/comments?limit=20')[0]
+
+
+def op_comment_post(vu):
+    body = {"body": f"loadtest {vu.rng.randint(0, 10**9)}"}
+    return vu.call('POST', f'/api/v1/posts/{vu.random_post()}/comments', body, auth=True)[0]
+
+
+OPERATIONS = {
+    'login': op_login,
+    'post_list': op_post_list,
+    'post_detail': op_post_detail,
+    'comment_list': op_comment_list,
+    'comment_post': op_comment_post,
+}
+
+
+# --- Estadísticas
+
+class OpStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = Counter()
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.errors.update(other.errors)
+
+
+def histogram(latencies):
+    """[(límite_ms, cantidad)] con los buckets de HISTOGRAM_BUCKETS_MS (None = sin límite)."""
+    counts = [0] * len(HISTOGRAM_BUCKETS_MS)
+    for ms in latencies:
+        for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if ms <= bound:
+                counts[i] += 1
+                break
+    return [(None if bound == float('inf') else bound, n) for bound, n in zip(HISTOGRAM_BUCKETS_MS, counts)]
+
+
+# --- Esperas por locks de la base
+
+class LockWaitProbe:
+    """
+    Mide esperas por locks durante la prueba.
+    - MySQL/InnoDB: delta de Innodb_row_lock_waits / Innodb_row_lock_time (global,
+      sirve también con --base-url si el servidor usa la misma base).
+    - SQLite: errores 'database is locked' vistos por el engine de este proceso
+      (sólo en modo test client).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.sqlite_locked = 0
+        self._lock = threading.Lock()
+        self._before = None
+
+    def _on_error(self, context):
+        if 'database is locked' in str(context.original_exception):
+            with self._lock:
+                self.sqlite_locked += 1
+
+    def _innodb_status(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_%'")).all()
+        return {name: float(value) for name, value in rows}
+
+    def start(self):
+        if self.engine.dialect.name == 'mysql':
+            self._before = self._innodb_status()
+        elif self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'handle_error', self._on_error)
+
+    def stop(self):
+        dialect = self.engine.dialect.name
+        if dialect == 'mysql':
+            after = self._innodb_status()
+            return {
+                "row_lock_waits": after.get('Innodb_row_lock_waits', 0) - self._before.get('Innodb_row_lock_waits', 0),
+                "row_lock_time_ms": after.get('Innodb_row_lock_time', 0) - self._before.get('Innodb_row_lock_time', 0),
+            }
+        if dialect == 'sqlite':
+            event.remove(self.engine, 'handle_error', self._on_error)
+            return {"database_locked_errors": self.sqlite_locked}
+        return {}
+
+
+# --- Ejecución
+
+def _pick_accounts(n):
+    """Emails de usuarios activos de la base configurada (los del seeder usan 'password')."""
+    from .models import Usuario
+    return list(db.session.execute(
+        db.select(Usuario.email).where(Usuario.is_active.is_(True)).order_by(Usuario.id).limit(n)
+    ).scalars())
+
+
+def _run_user(vu, mix, deadline, stats, max_requests):
+    names = [name for name, _ in mix]
+    weights = [w for _, w in mix]
+    op_login(vu)
+    op_post_list(vu)
+    done = 0
+    while time.monotonic() < deadline and (not max_requests or done < max_requests):
+        name = vu.rng.choices(names, weights=weights)[0]
+        start = time.perf_counter()
+        try:
+            status = OPERATIONS[name](vu)
+            error = None if status < 400 else str(status)
+        except Exception as e:
+            error = type(e).__name__
+        stats[name].latencies.append((time.perf_counter() - start) * 1000)
+        if error:
+            stats[name].errors[error] += 1
+        done += 1
+
+
+def run_loadtest(app, users=10, duration=30, mix=DEFAULT_MIX, base_url=None,
+                 password='password', seed=42, max_requests=None):
+    """Ejecuta la prueba y retorna el reporte (dict). Necesita contexto de aplicación."""
+    mix = parse_mix(mix) if isinstance(mix, str) else mix
+    accounts = _pick_accounts(users)
+    if not accounts:
+        raise RuntimeError("No hay usuarios activos en la base: ejecutá 'flask seed' primero.")
+
+    probe = LockWaitProbe(db.engine)
+    probe.start()
+
+    per_user_stats = []
+    threads = []
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    for i in range(users):
+        transport = HTTPTransport(base_url) if base_url else TestClientTransport(app)
+        vu = VirtualUser(transport, accounts[i % len(accounts)], password, random.Random(seed + i))
+        stats = {name: OpStats() for name in OPERATIONS}
+        per_user_stats.append(stats)
+        t = threading.Thread(target=_run_user, args=(vu, mix, deadline, stats, max_requests), daemon=True)
+        threads.append(t)
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    locks = probe.stop()
+
+    # Combinar las estadísticas de todos los hilos
+    totals = {name: OpStats() for name in OPERATIONS}
+    for stats in per_user_stats:
+        for name, s in stats.items():
+            totals[name].merge(s)
+
+    report = {"users": users, "duration_s": round(elapsed, 2), "target": base_url or 'test-client',
+              "operations": {}, "locks": locks}
+    all_latencies, all_errors = [], 0
+    for name, s in totals.items():
+        if not s.latencies:
+            continue
+        lat = sorted(s.latencies)
+        errors = sum(s.errors.values())
+        all_latencies.extend(lat)
+        all_errors += errors
+        report["operations"][name] = {
+            "requests": len(lat),
+            "rps": round(len(lat) / elapsed, 1),
+            "error_rate": round(errors / len(lat), 4),
+            "errors": dict(s.errors),
+            "p50_ms": round(percentile(lat, 50), 2),
+            "p95_ms": round(percentile(lat, 95), 2),
+            "p99_ms": round(percentile(lat, 99), 2),
+            "histogram": histogram(lat),
+        }
+    all_latencies.sort()
+    report["total"] = {
+        "requests": len(all_latencies),
+        "rps": round(len(all_latencies) / elapsed, 1) if elapsed else 0,
+        "error_rate": round(all_errors / len(all_latencies), 4) if all_latencies else 0,
+        "p50_ms": round(percentile(all_latencies, 50), 2),
+        "p95_ms": round(percentile(all_latencies, 95), 2),
+        "p99_ms": round(percentile(all_latencies, 99), 2),
+        "histogram": histogram(all_latencies),
+    }
+    return report
+
+
+def format_report(report):
+    lines = [f"Usuarios: {report['users']}  Duración: {report['duration_s']}s  Destino: {report['target']}", ""]
+    lines.append(f"{'operación':<14} {'reqs':>7} {'req/s':>8} {'errores':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    rows = list(report["operations"].items()) + [("TOTAL", report["total"])]
+    for name, op in rows:
+        lines.append(
+            f"{name:<14} {op['requests']:>7} {op['rps']:>8.1f} {op['error_rate'] * 100:>7.2f}% "
+            f"{op['p50_ms']:>7.2f}ms {op['p95_ms']:>7.2f}ms {op['p99_ms']:>7.2f}ms"
+        )
+        for code, n in sorted(op.get("errors", {}).items()):
+            lines.append(f"{'':<14}   -> {code}: {n}")
+
+    lines.append("")
+    lines.append("Histograma de latencias (total):")
+    total = report["total"]["requests"] or 1
+    for bound, count in report["total"]["histogram"]:
+        label = f"<= {bound:g}ms" if bound is not None else f"> {HISTOGRAM_BUCKETS_MS[-2]:g}ms"
+        lines.append(f"  {label:>10} {count:>7} {'#' * int(50 * count / total)}")
+
+    if report["locks"]:
+        lines.append("")
+        lines.append("Locks de la base: " + ", ".join(f"{k}={v:g}" for k, v in report["locks"].items()))
+    return '\n'.join(lines)
@@ -0,0 +1,418 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin consolidación de archivos de procesos terminados
+    fcntl = None
+
+from flask import Response, g, has_request_context, request
+
+from .cache import cache_stats
+
+# Métricas de la aplicación en formato de exposición de Prometheus (GET /metrics).
+#
+# Camino caliente sin locks: cada hilo acumula en su propio objeto
+# (_ThreadMetrics) y sólo el scrape recorre y suma los de todos los hilos. Los
+# acumuladores de hilos que ya terminaron se pliegan en uno "retirado" en cada
+# scrape, así la lista no crece con servidores que crean un hilo por request.
+# Se registran por objeto Thread y no por ident: el ident de un hilo terminado
+# se reutiliza enseguida y pisaría sus contadores antes del scrape.
+#
+# Varios procesos (gunicorn -w N): con METRICS_MULTIPROC_DIR cada proceso vuelca
+# sus totales a <dir>/<pid>-<token>.json cada METRICS_FLUSH_INTERVAL segundos (y
+# al salir), y /metrics suma los archivos de todos los procesos. El token es
+# único por proceso, así un pid reutilizado no pisa el archivo de otro. El
+# scrape consolida los archivos de procesos terminados en <dir>/retired.json
+# (con flock) y los borra: los contadores se conservan sin que el directorio
+# crezca, y el gauge de requests en curso sólo cuenta procesos vivos.
+#
+# La latencia se mide hasta que la vista devuelve la respuesta (en streaming,
+# hasta el primer byte). El tiempo de DB sale de instrumentation.py.
+
+RETIRED_FILE = 'retired.json'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _ThreadMetrics:
+    """Acumuladores de un hilo. Sólo los modifica su hilo; el scrape los lee."""
+
+    def __init__(self):
+        self.requests = {}       # (endpoint, method, status) -> n
+        self.latency = {}        # endpoint -> [n por bucket..., suma, cantidad]
+        self.db = {}             # endpoint -> [segundos, queries]
+        self.serialization = {}  # endpoint -> [segundos, llamadas]
+        self.started = 0
+        self.finished = 0
+
+    def merge(self, other):
+        _add_counts(self.requests, other.requests)
+        _add_lists(self.latency, other.latency)
+        _add_lists(self.db, other.db)
+        _add_lists(self.serialization, other.serialization)
+        self.started += other.started
+        self.finished += other.finished
+
+
+def _add_counts(target, source):
+    for key, n in source.copy().items():
+        target[key] = target.get(key, 0) + n
+
+
+def _add_lists(target, source):
+    for key, values in source.copy().items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(values)
+        else:
+            for i, v in enumerate(values):
+                current[i] += v
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = []          # [(thread, _ThreadMetrics)]
+        self._retired = _ThreadMetrics()
+        self.multiproc_dir = None
+        self.flush_interval = 10
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+        self._file_pid = None
+        self._file_name = None
+
+    def configure(self, multiproc_dir=None, flush_interval=None):
+        self.multiproc_dir = multiproc_dir
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+
+    def local(self):
+        metrics = getattr(self._local, 'metrics', None)
+        if metrics is None:
+            metrics = self._local.metrics = _ThreadMetrics()
+            with self._lock:
+                self._threads.append((threading.current_thread(), metrics))
+        return metrics
+
+    # --- Registro (camino caliente)
+
+    def request_started(self):
+        self.local().started += 1
+
+    def request_finished(self, endpoint, method, status, seconds, db_seconds=None, db_queries=0):
+        m = self.local()
+        m.finished += 1
+        key = (endpoint, method, status)
+        m.requests[key] = m.requests.get(key, 0) + 1
+
+        hist = m.latency.get(endpoint)
+        if hist is None:
+            hist = m.latency[endpoint] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+                break
+        hist[-2] += seconds
+        hist[-1] += 1
+
+        if db_seconds is not None:
+            db = m.db.get(endpoint)
+            if db is None:
+                db = m.db[endpoint] = [0.0, 0]
+            db[0] += db_seconds
+            db[1] += db_queries
+
+    def observe_serialization(self, endpoint, seconds):
+        m = self.local()
+        ser = m.serialization.get(endpoint)
+        if ser is None:
+            ser = m.serialization[endpoint] = [0.0, 0]
+        ser[0] += seconds
+        ser[1] += 1
+
+    # --- Agregación
+
+    def collect(self):
+        """Totales de este proceso (suma de todos los hilos)."""
+        total = _ThreadMetrics()
+        with self._lock:
+            running = []
+            for thread, metrics in self._threads:
+                if thread.is_alive():
+                    running.append((thread, metrics))
+                else:
+                    self._retired.merge(metrics)
+            self._threads = running
+            total.merge(self._retired)
+            for _, metrics in running:
+                total.merge(metrics)
+        return total
+
+    def snapshot(self):
+        """Totales del proceso en un dict serializable a JSON."""
+        m = self.collect()
+        return {
+            "pid": os.getpid(),
+            "requests": [[e, meth, s, n] for (e, meth, s), n in m.requests.items()],
+            "latency": m.latency,
+            "db": m.db,
+            "serialization": m.serialization,
+            "in_flight": m.started - m.finished,
+            "caches": {name: {"hits": s["hits"], "misses": s["misses"]} for name, s in cache_stats().items()},
+        }
+
+    def _process_file(self):
+        """<pid>-<token>.json de este proceso (un hijo de fork elige su propio token)."""
+        pid = os.getpid()
+        if self._file_pid != pid:
+            self._file_pid = pid
+            self._file_name = f'{pid}-{uuid.uuid4().hex[:12]}.json'
+        return self._file_name
+
+    def flush(self, force=False):
+        """Vuelca los totales del proceso a METRICS_MULTIPROC_DIR (escritura atómica)."""
+        if not self.multiproc_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        # Un solo hilo vuelca a la vez; los demás siguen sin esperar
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = now
+            _write_json(os.path.join(self.multiproc_dir, self._process_file()), self.snapshot())
+        finally:
+            self._flush_lock.release()
+
+    def aggregate(self):
+        """Snapshot de este proceso sumado al de los demás procesos (si hay directorio compartido)."""
+        snapshots = [self.snapshot()]
+        if self.multiproc_dir:
+            self.flush(force=True)
+            self.retire_dead_processes()
+            own = self._process_file()
+            for name in os.listdir(self.multiproc_dir):
+                if not name.endswith('.json') or name == own:
+                    continue
+                try:
+                    with open(os.path.join(self.multiproc_dir, name)) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if not _pid_alive(snapshot.get("pid")):
+                    snapshot["in_flight"] = 0
+                snapshots.append(snapshot)
+        return _merge_snapshots(snapshots)
+
+    def retire_dead_processes(self):
+        """Suma los archivos de procesos terminados a retired.json y los borra."""
+        if not self.multiproc_dir or fcntl is None:
+            return 0
+        dead = [name for name in os.listdir(self.multiproc_dir)
+                if name.endswith('.json') and name != RETIRED_FILE
+                and not _pid_alive(_file_pid(name))]
+        if not dead:
+            return 0
+        retired_path = os.path.join(self.multiproc_dir, RETIRED_FILE)
+        with open(os.path.join(self.multiproc_dir, '.retired.lock'), 'w') as lock:
+            # Un solo scrape (de cualquier proceso) consolida a la vez
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                snapshots = [s for s in (_read_json(retired_path),) if s is not None]
+                paths = []
+                for name in dead:
+                    path = os.path.join(self.multiproc_dir, name)
+                    snapshot = _read_json(path)
+                    if snapshot is not None:
+                        snapshots.append(snapshot)
+                        paths.append(path)
+                if not paths:
+                    return 0
+                _write_json(retired_path, _as_snapshot(_merge_snapshots(snapshots)))
+                for path in paths:
+                    os.unlink(path)
+                return len(paths)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _file_pid(name):
+    try:
+        return int(name[:-len('.json')].split('-')[0])
+    except ValueError:
+        return None
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _as_snapshot(merged):
+    """Resultado de _merge_snapshots() en el formato de snapshot() (procesos terminados)."""
+    return {
+        "pid": None,
+        "requests": [[e, meth, s, n] for (e, meth, s), n in merged["requests"].items()],
+        "latency": merged["latency"],
+        "db": merged["db"],
+        "serialization": merged["serialization"],
+        "in_flight": 0,
+        "caches": {name: {"hits": hits, "misses": misses} for name, (hits, misses) in merged["caches"].items()},
+    }
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+
+def _merge_snapshots(snapshots):
+    requests, latency, db, serialization, caches = {}, {}, {}, {}, {}
+    in_flight = 0
+    for s in snapshots:
+        _add_counts(requests, {tuple(r[:3]): r[3] for r in s["requests"]})
+        _add_lists(latency, s["latency"])
+        _add_lists(db, s["db"])
+        _add_lists(serialization, s["serialization"])
+        _add_lists(caches, {name: [c["hits"], c["misses"]] for name, c in s["caches"].items()})
+        in_flight += s["in_flight"]
+    return {"requests": requests, "latency": latency, "db": db, "serialization": serialization,
+            "caches": caches, "in_flight": in_flight,
+            "processes": sum(1 for s in snapshots if s.get("pid") is not None)}
+
+
+registry = MetricsRegistry()
+
+
+# --- Formato de exposición
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def render(data):
+    lines = []
+
+    def header(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    header('http_requests_total', 'counter', 'Requests atendidos por endpoint, método y status.')
+    for (endpoint, method, status), n in sorted(data["requests"].items()):
+        lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {n}')
+
+    header('http_request_duration_seconds', 'histogram', 'Latencia de los requests por endpoint.')
+    for endpoint, hist in sorted(data["latency"].items()):
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, hist):
+            cumulative += n
+            lines.append(f'http_request_duration_seconds_bucket{_labels(endpoint=endpoint, le=f"{bound:g}")} {cumulative}')
+        lines.append(f'http_request_duration_seconds_bucket{_labels(endpoint=endpoint, le="+Inf")} {hist[-1]}')
+        lines.append(f'http_request_duration_seconds_sum{_labels(endpoint=endpoint)} {hist[-2]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{_labels(endpoint=endpoint)} {hist[-1]}')
+
+    header('http_requests_in_flight', 'gauge', 'Requests en curso.')
+    lines.append(f'http_requests_in_flight {data["in_flight"]}')
+
+    header('db_time_seconds_total', 'counter', 'Tiempo en la base de datos por endpoint.')
+    for endpoint, (seconds, _) in sorted(data["db"].items()):
+        lines.append(f'db_time_seconds_total{_labels(endpoint=endpoint)} {seconds:.6f}')
+    header('db_queries_total', 'counter', 'Sentencias SQL ejecutadas por endpoint.')
+    for endpoint, (_, queries) in sorted(data["db"].items()):
+        lines.append(f'db_queries_total{_labels(endpoint=endpoint)} {queries}')
+
+    header('serialization_seconds_total', 'counter', 'Tiempo serializando respuestas por endpoint.')
+    for endpoint, (seconds, _) in sorted(data["serialization"].items()):
+        lines.append(f'serialization_seconds_total{_labels(endpoint=endpoint)} {seconds:.6f}')
+    header('serialization_calls_total', 'counter', 'Llamadas al serializador por endpoint.')
+    for endpoint, (_, calls) in sorted(data["serialization"].items()):
+        lines.append(f'serialization_calls_total{_labels(endpoint=endpoint)} {calls}')
+
+    header('cache_hits_total', 'counter', 'Aciertos de los cachés en memoria.')
+    for name, (hits, _) in sorted(data["caches"].items()):
+        lines.append(f'cache_hits_total{_labels(cache=name)} {hits}')
+    header('cache_misses_total', 'counter', 'Fallos de los cachés en memoria.')
+    for name, (_, misses) in sorted(data["caches"].items()):
+        lines.append(f'cache_misses_total{_labels(cache=name)} {misses}')
+    header('cache_hit_ratio', 'gauge', 'Aciertos / consultas de cada caché.')
+    for name, (hits, misses) in sorted(data["caches"].items()):
+        ratio = hits / (hits + misses) if hits + misses else 0.0
+        lines.append(f'cache_hit_ratio{_labels(cache=name)} {ratio:.4f}')
+
+    header('app_metrics_processes', 'gauge', 'Procesos cuyas métricas se agregaron.')
+    lines.append(f'app_metrics_processes {data["processes"]}')
+    return '\n'.join(lines) + '\n'
+
+
+# --- Integración con Flask
+
+def _endpoint():
+    return request.endpoint or 'none'
+
+
+def observe_serialization(seconds):
+    """Llamado por serializers.dump(); fuera de un request no se registra."""
+    if has_request_context():
+        registry.observe_serialization(_endpoint(), seconds)
+
+
+def init_metrics(app):
+    """Hooks de request y endpoint GET /metrics (si METRICS_ENABLED)."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    registry.configure(
+        multiproc_dir=app.config.get('METRICS_MULTIPROC_DIR') or None,
+        flush_interval=app.config.get('METRICS_FLUSH_INTERVAL', 10),
+    )
+    atexit.register(registry.flush, True)
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        registry.request_started()
+
+    @app.after_request
+    def _metrics_finish(response):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return response
+        sql = g.get('_sql_stats')
+        registry.request_finished(
+            _endpoint(), request.method, response.status_code, time.perf_counter() - start,
+            db_seconds=sql.total_ms / 1000 if sql is not None else None,
+            db_queries=sql.count if sql is not None else 0,
+        )
+        registry.flush()
+        return response
+
+    def metrics_view():
+        return Response(render(registry.aggregate()), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
@@ -1,8 +1,8 @@
 from datetime import datetime
 from . import db, ma
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from marshmallow import fields
+from .auth.hashing import hash_password, verify_password
+from marshmallow import fields, validate
 import enum
 
 # --- Modelos de Base de Datos ---
@@ -38,6 +38,11 @@ class Usuario(db.Model, UserMixin):
     # NEW
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Versión para ETag / Last-Modified (los posts serializan nombre, email y rol del autor)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Contador desnormalizado (ver app/counters.py)
+    post_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
 
     # Relaciones
     posts = db.relationship('Post', backref='author', lazy='dynamic')
@@ -48,10 +53,15 @@ class Usuario(db.Model, UserMixin):
 
     # Utilidades para password
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        # Se calcula en el pool de hashing (puede lanzar HashingBusy)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        ok, new_hash = verify_password(self.password_hash, password)
+        if new_hash:
+            # Rehash con los parámetros actuales: lo persiste el commit de la vista
+            self.password_hash = new_hash
+        return ok
 
 # Tabla de Categorías
 class Category(db.Model):
@@ -59,6 +69,10 @@ class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), unique=True)
     description = db.Column(db.String(256), nullable=True)
+    # Versión para ETag / Last-Modified
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Contador desnormalizado (ver app/counters.py)
+    post_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     posts = db.relationship('Post', backref='category', lazy='dynamic')
 
 # Tabla de Posts
@@ -68,10 +82,17 @@ class Post(db.Model):
     title = db.Column(db.String(128))
     body = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    # Versión para ETag / Last-Modified (cambia en cada UPDATE de la fila)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'))
 
+    # Contador desnormalizado (ver app/counters.py)
+    comment_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Vistas, con escritura diferida por lotes (ver app/view_counts.py)
+    view_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
     comments = db.relationship('Comment', backref='post', lazy='dynamic', cascade="all, delete-orphan")
 
 # Tabla de Comentarios
@@ -80,12 +101,46 @@ class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     body = db.Column(db.String(256))
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    # Versión para ETag / Last-Modified
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'))
 
     is_visible = db.Column(db.Boolean, default=True, nullable=False)
 
+    # Índice compuesto para la paginación por cursor de los comentarios de un post
+    __table_args__ = (
+        db.Index('ix_comments_post_id_timestamp', 'post_id', 'timestamp', 'id'),
+    )
+
+# Cola de trabajos en segundo plano (ver app/jobs.py)
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    # pending -> running -> done | failed (agotó los reintentos)
+    status = db.Column(db.String(16), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Clave de idempotencia: única mientras el job está pendiente (se libera al tomarlo)
+    dedupe_key = db.Column(db.String(128), unique=True, nullable=True)
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # El worker busca los pendientes vencidos por (status, run_at)
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} {self.status}>'
+
 # --- Esquemas de Marshmallow ---
 
 class RoleSchema(ma.SQLAlchemyAutoSchema):
@@ -102,7 +157,7 @@ class UsuarioSchema(ma.SQLAlchemyAutoSchema):
         model = Usuario
         load_instance = True
         include_relationships = True
-        fields = ('id', 'username', 'email', 'role')
+        fields = ('id', 'username', 'email', 'role', 'post_count')
 
 class PostSchema(ma.SQLAlchemyAutoSchema):
     author = fields.Nested(UsuarioSchema, only=("id", "username", "email", "role"))
@@ -115,7 +170,26 @@ class PostSchema(ma.SQLAlchemyAutoSchema):
         model = Post
         load_instance = True
         include_fk = True
-        fields = ('id', 'title', 'body', 'timestamp', 'author', 'category')
+        fields = ('id', 'title', 'body', 'timestamp', 'comment_count', 'view_count', 'author', 'category')
+
+# Esquemas de entrada (sólo validación): load() devuelve un dict, no una instancia.
+# PostSchema/CommentSchema tienen load_instance=True y sus Meta.fields no incluyen
+# category_id, así que las vistas de alta y edición validan con estos.
+class PostInputSchema(ma.Schema):
+    title = fields.Str(required=True, validate=validate.Length(min=1, max=128))
+    body = fields.Str(required=True, validate=validate.Length(min=1))
+    category_id = fields.Int(required=True)
+    # Se acepta por compatibilidad pero se ignora: el autor es siempre el usuario autenticado
+    user_id = fields.Int(load_only=True)
+
+class CommentInputSchema(ma.Schema):
+    body = fields.Str(required=True, validate=validate.Length(min=1, max=256))
+
+# Esquema de entrada (sólo validación) para la carga masiva de posts
+class PostBulkItemSchema(ma.Schema):
+    title = fields.Str(required=True, validate=validate.Length(min=1, max=128))
+    body = fields.Str(required=True, validate=validate.Length(min=1))
+    category_id = fields.Int(required=True, strict=True)
 
 class CommentSchema(ma.SQLAlchemyAutoSchema):
     commenter = fields.Nested(UsuarioSchema, only=("id", "username", "role"))
@@ -131,7 +205,7 @@ class CategorySchema(ma.SQLAlchemyAutoSchema):
         model = Category
         load_instance = True
         include_relationships = True
-        fields = ('id', 'name', 'description')
+        fields = ('id', 'name', 'description', 'post_count')
 
 # Instancias
 usuario_schema = UsuarioSchema()
@@ -142,9 +216,12 @@ roles_schema = RoleSchema(many=True)
 
 post_schema = PostSchema()
 posts_schema = PostSchema(many=True)
+post_bulk_item_schema = PostBulkItemSchema()
+post_input_schema = PostInputSchema()
 
 comment_schema = CommentSchema()
 comments_schema = CommentSchema(many=True)
+comment_input_schema = CommentInputSchema()
 
 category_schema = CategorySchema()
 categories_schema = CategorySchema(many=True)
@@ -0,0 +1,151 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import and_, or_
+
+# Paginación por cursor (keyset / "seek method").
+# En lugar de OFFSET, cada página se pide "a partir de" la última fila vista,
+# usando las mismas columnas del ORDER BY. El costo de cada página es
+# O(tamaño de página) sin importar qué tan profundo navegue el cliente.
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no se pudo decodificar o no corresponde al listado."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values, direction):
+    """Codifica los valores de la clave de orden en un token opaco (base64 url-safe)."""
+    payload = {"v": [_encode_value(v) for v in values], "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, expected_len):
+    """Decodifica un cursor. Retorna (valores, dirección) o lanza InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(v) for v in payload["v"]]
+        direction = payload["d"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Cursor inválido.")
+
+    if direction not in ("next", "prev") or len(values) != expected_len:
+        raise InvalidCursor("Cursor inválido.")
+    return values, direction
+
+
+def parse_page_args(args):
+    """(limit, cursor) a partir de un mapping de query string (limit acotado a MAX_PAGE_SIZE)."""
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return limit, args.get("cursor") or None
+
+
+def get_page_args():
+    """Lee ?limit= y ?cursor= de la query string (limit acotado a MAX_PAGE_SIZE)."""
+    return parse_page_args(request.args)
+
+
+def _seek_condition(keys, values, forward):
+    """Construye (k1, k2, ...) > / < (v1, v2, ...) expandido con OR/AND.
+
+    Se expande a mano en vez de usar tuple_() porque la comparación de tuplas
+    respeta una sola dirección y aquí cada columna puede tener la suya.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        # Avanzar en una columna DESC significa buscar valores menores
+        go_lower = descending if forward else not descending
+        step = column < values[i] if go_lower else column > values[i]
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def keyset_paginate(session, stmt, keys, key_fn, limit, cursor=None):
+    """Ejecuta `stmt` paginado por cursor.
+
+    :param keys: lista de (columna, descendente) que define el orden total.
+                 La última columna debe ser única (normalmente el id).
+    :param key_fn: función que extrae la tupla de valores de orden de cada fila.
+    :return: (filas, next_cursor, prev_cursor)
+    """
+    stmt, forward = _seek_statement(stmt, keys, limit, cursor)
+    rows = session.execute(stmt).all()
+    return _page(rows, key_fn, limit, cursor, forward)
+
+
+async def keyset_paginate_async(session, stmt, keys, key_fn, limit, cursor=None):
+    """Igual que keyset_paginate() pero con una AsyncSession (ver app/aio.py)."""
+    stmt, forward = _seek_statement(stmt, keys, limit, cursor)
+    rows = (await session.execute(stmt)).all()
+    return _page(rows, key_fn, limit, cursor, forward)
+
+
+def _seek_statement(stmt, keys, limit, cursor):
+    """Aplica el cursor, el ORDER BY y el LIMIT a `stmt`. Retorna (stmt, forward)."""
+    direction = "next"
+    if cursor:
+        values, direction = decode_cursor(cursor, len(keys))
+        stmt = stmt.where(_seek_condition(keys, values, forward=direction == "next"))
+
+    forward = direction == "next"
+    order = []
+    for column, descending in keys:
+        # Para la página anterior recorremos el índice en sentido inverso
+        # y luego damos vuelta el resultado.
+        use_desc = descending if forward else not descending
+        order.append(column.desc() if use_desc else column.asc())
+
+    # Pedimos una fila extra para saber si hay más páginas en esa dirección.
+    return stmt.order_by(*order).limit(limit + 1), forward
+
+
+def _page(rows, key_fn, limit, cursor, forward):
+    """Recorta la fila extra, ordena y calcula los cursores. Retorna (filas, next, prev)."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    items = [row[0] if len(row) == 1 else row for row in rows]
+    if not items:
+        return items, None, None
+
+    has_next = has_more if forward else True
+    has_prev = cursor is not None if forward else has_more
+
+    next_cursor = encode_cursor(key_fn(items[-1]), "next") if has_next else None
+    prev_cursor = encode_cursor(key_fn(items[0]), "prev") if has_prev else None
+    return items, next_cursor, prev_cursor
+
+
+def page_response(data, next_cursor, prev_cursor, limit):
+    """Sobre (envelope) común para las respuestas paginadas."""
+    return {
+        "items": data,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+# Pool de conexiones: tamaño, overflow, recycle, pre-ping, warm-up y métricas.
+#
+# Sin SQLALCHEMY_ENGINE_OPTIONS el engine usa los valores por defecto de
+# SQLAlchemy (5 + 10 de overflow, sin pre-ping ni recycle): con MySQL eso
+# significa errores "MySQL server has gone away" después de wait_timeout y
+# requests que esperan en silencio cuando el pool se agota.
+#
+# InstrumentedQueuePool mide cuánto espera cada checkout (incluye abrir una
+# conexión nueva si hace falta), cuenta los timeouts y registra en el logger
+# 'app.sql.pool' las esperas que superan DB_POOL_WAIT_WARN_MS. Los números se
+# ven con pool_stats() (endpoint /api/v1/admin/pool).
+
+pool_logger = logging.getLogger('app.sql.pool')
+
+
+class PoolMetrics:
+    """Contadores de un pool (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.slow_waits = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.warn_ms = 100
+        # init_pool ya agregó los listeners de este pool (sobrevive a recreate())
+        self.listening = False
+
+    def record_wait(self, ms):
+        with self._lock:
+            self.checkouts += 1
+            self.waits_ms += ms
+            if ms > self.max_wait_ms:
+                self.max_wait_ms = ms
+            slow = ms >= self.warn_ms
+            if slow:
+                self.slow_waits += 1
+        return slow
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(self.waits_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "slow_waits": self.slow_waits,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidated": self.invalidated,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide el tiempo de espera de cada checkout."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            self.metrics.incr('timeouts')
+            pool_logger.warning(json.dumps({"event": "pool_timeout", "status": self.status()}))
+            raise
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            if self.metrics.record_wait(ms):
+                pool_logger.warning(json.dumps({
+                    "event": "pool_wait", "wait_ms": round(ms, 2), "status": self.status(),
+                }))
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: se conservan las métricas acumuladas
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+def _uses_queue_pool(uri):
+    """SQLite en memoria usa StaticPool/SingletonThreadPool: no admite opciones de tamaño."""
+    url = make_url(uri)
+    return not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'))
+
+
+def configure_pool_options(app):
+    """Completa SQLALCHEMY_ENGINE_OPTIONS con la configuración DB_POOL_* (antes de db.init_app).
+
+    Las opciones que ya estén en SQLALCHEMY_ENGINE_OPTIONS tienen prioridad.
+    """
+    if not _uses_queue_pool(app.config.get('SQLALCHEMY_DATABASE_URI') or 'sqlite://'):
+        return
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': app.config.get('DB_POOL_SIZE', 10),
+        'max_overflow': app.config.get('DB_POOL_MAX_OVERFLOW', 10),
+        'pool_timeout': app.config.get('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': app.config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': app.config.get('DB_POOL_PRE_PING', True),
+    }
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def warm_up(engine, n):
+    """Abre `n` conexiones a la vez y las devuelve al pool (quedan listas para los requests)."""
+    n = min(n, getattr(engine.pool, 'size', lambda: n)())
+    connections = []
+    try:
+        for _ in range(n):
+            connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+# Engines a los que hay que hacer dispose en el hijo después de un fork. Un único
+# hook por proceso (os.register_at_fork no permite quitar hooks) y referencias
+# débiles: un engine descartado no queda vivo por el hook.
+_fork_engines = weakref.WeakSet()
+_fork_hook_installed = False
+
+
+def _dispose_after_fork():
+    for engine in list(_fork_engines):
+        engine.dispose(close=False)
+
+
+def _dispose_on_fork(engine):
+    global _fork_hook_installed
+    if not hasattr(os, 'register_at_fork'):
+        return
+    if not _fork_hook_installed:
+        os.register_at_fork(after_in_child=_dispose_after_fork)
+        _fork_hook_installed = True
+    _fork_engines.add(engine)
+
+
+def init_pool(app, db):
+    """Métricas de pool, dispose después de fork y warm-up de los engines."""
+    warn_ms = app.config.get('DB_POOL_WAIT_WARN_MS', 100)
+    warmup = app.config.get('DB_POOL_WARMUP', 0)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        pool = engine.pool
+        if not isinstance(pool, InstrumentedQueuePool):
+            continue
+        pool.metrics.warn_ms = warn_ms
+        if not pool.metrics.listening:
+            pool.metrics.listening = True
+            event.listen(engine, 'connect', lambda *_a, m=pool.metrics: m.incr('connects'))
+            # Conexiones descartadas por pre-ping fallido, recycle o errores de desconexión
+            event.listen(engine, 'invalidate', lambda *_a, m=pool.metrics: m.incr('invalidated'))
+
+        # Un worker creado con fork no debe reutilizar los sockets del proceso padre
+        _dispose_on_fork(engine)
+
+        if warmup:
+            opened = warm_up(engine, warmup)
+            app.logger.info("Pool %s: %d conexiones precalentadas", engine.url.render_as_string(hide_password=True), opened)
+
+
+def pool_stats(db):
+    """Estado actual de cada engine: {bind: {size, checked_out, overflow, ..., métricas}}."""
+    result = {}
+    for key, engine in db.engines.items():
+        pool = engine.pool
+        stats = {"class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+                timeout_s=pool.timeout(),
+            )
+        metrics = getattr(pool, 'metrics', None)
+        if metrics is not None:
+            stats.update(metrics.snapshot())
+        result[key or 'primary'] = stats
+    return result
@@ -0,0 +1,277 @@
+import itertools
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+from .cache import TTLCache, MISSING
+
+# Réplicas de lectura.
+#
+# Las réplicas se declaran en SQLALCHEMY_REPLICA_URIS y se registran como binds
+# de Flask-SQLAlchemy ('replica_0', 'replica_1', ...), así comparten la
+# configuración de engines del resto de la app. Ningún modelo usa esos binds:
+# el ruteo lo hace RoutingSession.get_bind() según el request.
+#
+# - Los GET marcados con @read_replica leen de una réplica elegida en round-robin
+#   entre las sanas (una por request, así todo el request ve el mismo snapshot).
+# - Salud: un hilo en segundo plano verifica cada réplica con SELECT 1 cada
+#   REPLICA_HEALTH_INTERVAL segundos; si falla (o el engine reporta una
+#   desconexión) queda fuera de la rotación hasta el próximo chequeo exitoso.
+#   Los requests sólo leen el estado: una réplica caída nunca los hace esperar
+#   el timeout de conexión. Sin réplicas sanas se lee del primario.
+# - Las conexiones a las réplicas se abren en modo sólo lectura, y cualquier
+#   flush o sentencia DML va al primario aunque el request esté en una réplica.
+# - Read-your-writes: después de una escritura exitosa el mismo cliente lee del
+#   primario durante REPLICA_READ_YOUR_WRITES_SECONDS (cookie para clientes con
+#   cookies, y por token Bearer en memoria del proceso para los que no).
+
+REPLICA_BIND_PREFIX = 'replica_'
+PRIMARY_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+recent_writers = TTLCache('replica_recent_writers', maxsize=10000, ttl=5)
+
+
+def replica_uris(config):
+    uris = config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if isinstance(uris, str):
+        uris = [uri.strip() for uri in uris.split(',') if uri.strip()]
+    return list(uris)
+
+
+def configure_replica_binds(app):
+    """Agrega las réplicas a SQLALCHEMY_BINDS (antes de db.init_app)."""
+    uris = replica_uris(app.config)
+    if uris:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        for i, uri in enumerate(uris):
+            binds[f'{REPLICA_BIND_PREFIX}{i}'] = uri
+        app.config['SQLALCHEMY_BINDS'] = binds
+    return uris
+
+
+def _set_read_only(dbapi_connection, connection_record):
+    """Sesión de la réplica en sólo lectura (defensa ante escrituras accidentales)."""
+    # También las conexiones adaptadas de los drivers async (aiosqlite, aiomysql)
+    module = type(dbapi_connection).__module__
+    cursor = dbapi_connection.cursor()
+    try:
+        if 'sqlite' in module:
+            cursor.execute('PRAGMA query_only = ON')
+        elif 'mysql' in module:
+            cursor.execute('SET SESSION TRANSACTION READ ONLY')
+    finally:
+        cursor.close()
+
+
+def _on_replica_error(context):
+    """Una desconexión en una réplica la saca de la rotación hasta el próximo chequeo."""
+    if context.is_disconnect:
+        replica_set.mark_down_engine(context.engine, context.original_exception)
+
+
+class ReplicaSet:
+    def __init__(self, health_interval=5):
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self.health_interval = health_interval
+        self._engines = {}
+        self._health = {}
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def configure(self, engines, health_interval=None):
+        """`engines`: {bind_key: engine} de las réplicas."""
+        with self._lock:
+            if health_interval is not None:
+                self.health_interval = health_interval
+            self._engines = dict(engines)
+            self._health = {name: {"healthy": True, "checked_at": None, "error": None, "reads": 0}
+                            for name in self._engines}
+        # Listeners a nivel de módulo: configurar dos veces el mismo engine no los duplica
+        for engine in self._engines.values():
+            if not event.contains(engine, 'connect', _set_read_only):
+                event.listen(engine, 'connect', _set_read_only)
+            if not event.contains(engine, 'handle_error', _on_replica_error):
+                event.listen(engine, 'handle_error', _on_replica_error)
+
+    def mark_down(self, name, error=None):
+        with self._lock:
+            state = self._health.get(name)
+            if state is not None:
+                state.update(healthy=False, checked_at=time.monotonic(), error=str(error) if error else None)
+
+    def mark_down_engine(self, engine, error=None):
+        for name, candidate in list(self._engines.items()):
+            if candidate is engine:
+                self.mark_down(name, error)
+
+    # --- Chequeos de salud (fuera del camino del request)
+
+    def check_health(self):
+        """SELECT 1 contra cada réplica y actualiza su estado. Lo llama el hilo de chequeos."""
+        for name, engine in list(self._engines.items()):
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+                healthy, error = True, None
+            except Exception as e:
+                healthy, error = False, str(e)
+            with self._lock:
+                state = self._health.get(name)
+                if state is not None:
+                    state.update(healthy=healthy, error=error, checked_at=time.monotonic())
+
+    def _ensure_checker(self):
+        # Un hilo por proceso (un fork del servidor no hereda el hilo del padre)
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._check_loop, name='replica-health', daemon=True)
+            self._thread.start()
+
+    def _check_loop(self):
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception:
+                pass
+
+    def choose(self):
+        """(nombre, engine) de la próxima réplica sana en round-robin, o (None, None). No hace I/O."""
+        names = list(self._engines)
+        if not names:
+            return None, None
+        self._ensure_checker()
+        start = next(self._counter)
+        with self._lock:
+            for offset in range(len(names)):
+                name = names[(start + offset) % len(names)]
+                state = self._health.get(name)
+                if state is not None and state["healthy"]:
+                    state["reads"] += 1
+                    return name, self._engines[name]
+        return None, None
+
+    def stats(self):
+        with self._lock:
+            return {name: {k: v for k, v in state.items() if k != "checked_at"}
+                    for name, state in self._health.items()}
+
+
+replica_set = ReplicaSet()
+
+
+class RoutingSession(Session):
+    """Session de Flask-SQLAlchemy que, en los requests de lectura, usa una réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not getattr(clause, 'is_dml', False):
+            engine = _request_replica()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _request_replica():
+    if not has_request_context() or not g.get('_db_read_replica'):
+        return None
+    if '_db_replica_engine' not in g:
+        g._db_replica_name, g._db_replica_engine = replica_set.choose()
+    return g._db_replica_engine
+
+
+def _client_key(auth=None):
+    if auth is None:
+        auth = request.headers.get('Authorization')
+    return auth if auth and auth.startswith('Bearer ') else None
+
+
+def wrote_recently(primary_cookie, authorization):
+    """¿El cliente escribió hace poco? (cookie PRIMARY_COOKIE y header Authorization)."""
+    try:
+        if float(primary_cookie or 0) > time.time():
+            return True
+    except ValueError:
+        pass
+    key = _client_key(authorization or '')
+    return key is not None and recent_writers.get(key) is not MISSING
+
+
+def _wrote_recently():
+    return wrote_recently(request.cookies.get(PRIMARY_COOKIE), request.headers.get('Authorization'))
+
+
+def read_replica(view):
+    """Marca un handler GET como apto para leer de una réplica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method in SAFE_METHODS and not _wrote_recently():
+            g._db_read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_replicas(app, db):
+    """Configura el ReplicaSet con los binds de réplica y el seguimiento de escrituras."""
+    window = app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 5)
+    recent_writers.configure(ttl=window)
+
+    with app.app_context():
+        engines = {key: engine for key, engine in db.engines.items()
+                   if key and key.startswith(REPLICA_BIND_PREFIX)}
+    # Flask-SQLAlchemy crea un MetaData por bind: las réplicas no tienen modelos, y
+    # sin quitarlo db.create_all() de otra app (sin réplicas) buscaría ese bind
+    for key in engines:
+        if not db.metadatas[key].tables:
+            del db.metadatas[key]
+    replica_set.configure(engines, health_interval=app.config.get('REPLICA_HEALTH_INTERVAL', 5))
+    if not engines:
+        return
+
+    @app.after_request
+    def remember_write(response):
+        # Después de una escritura exitosa, el mismo cliente lee del primario por un rato
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(PRIMARY_COOKIE, str(int(time.time() + window) + 1),
+                                max_age=window + 1, httponly=True, samesite='Lax')
+            key = _client_key()
+            if key is not None:
+                recent_writers.set(key, True)
+        if g.get('_db_replica_name'):
+            response.headers['X-DB-Replica'] = g._db_replica_name
+        return response
+
+
+def sync_sqlite_replicas(app, db):
+    """Copia el primario SQLite en cada réplica SQLite (para probar en local). Retorna los binds copiados."""
+    copied = []
+    with app.app_context():
+        primary = db.engine
+        if primary.dialect.name != 'sqlite':
+            raise RuntimeError("replica-sync sólo sirve con SQLite: en producción replica el motor de base.")
+        source = primary.raw_connection()
+        try:
+            for key, engine in db.engines.items():
+                if not key or not key.startswith(REPLICA_BIND_PREFIX) or engine.dialect.name != 'sqlite':
+                    continue
+                # Conexión directa, sin el listener de sólo lectura
+                target = engine.dialect.dbapi.connect(engine.url.database)
+                try:
+                    source.driver_connection.backup(target)
+                finally:
+                    target.close()
+                engine.dispose()
+                copied.append(key)
+        finally:
+            source.close()
+    return copied
@@ -3,14 +3,17 @@ from flask_login import login_user, logout_user, current_user, login_required
 from app.forms import LoginForm, RegisterForm, PostForm, ComentarioForm
 from app.models import Usuario, Post, Comentario, Categoria
 from app import db
+from app.category_cache import get_cached_categories
+from app.view_counts import record_view
 from datetime import datetime
 
 bp = Blueprint('main', __name__)
 
 # Context processor para categorías
+# Usa el caché del proceso: se invalida en las escrituras de la API de categorías
 @bp.app_context_processor
 def inject_categorias():
-    categorias = Categoria.query.all()
+    categorias = get_cached_categories()
     return dict(categorias=categorias)
 
 # ----------------------------
@@ -35,6 +38,8 @@ def login():
     if form.validate_on_submit():
         user = Usuario.query.filter_by(email=form.email.data).first()
         if user and user.check_password(form.password.data):
+            if db.session.is_modified(user):
+                db.session.commit()  # rehash con los parámetros actuales
             login_user(user, remember=form.remember_me.data)
             next_page = request.args.get('next')
             flash('Inicio de sesión exitoso', 'success')
@@ -99,6 +104,7 @@ def crear_post():
 @bp.route('/post/<int:post_id>', methods=['GET', 'POST'])
 def ver_post(post_id):
     post = Post.query.get_or_404(post_id)
+    record_view(post.id)
     form = ComentarioForm()
     
     # Cargar solo comentarios visibles
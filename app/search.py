@@ -0,0 +1,125 @@
+import re
+
+from sqlalchemy import func, literal_column, text, inspect as sa_inspect
+from sqlalchemy.dialects.mysql import match as mysql_match
+
+from .extensions import db
+
+# Búsqueda full-text sobre título y cuerpo de los posts.
+#
+# - MySQL: índice FULLTEXT (title, body) y MATCH ... AGAINST en modo lenguaje
+#   natural. InnoDB mantiene el índice solo; los hooks de abajo no hacen nada.
+# - SQLite: tabla virtual FTS5 `posts_fts` con contenido externo (content='posts').
+#   Con contenido externo el índice NO se actualiza solo: lo mantienen triggers
+#   AFTER INSERT / UPDATE OF title, body / DELETE sobre posts (los estándar de
+#   la documentación de FTS5), así cualquier escritura (API, blueprint de
+#   contenido, CLI, SQL a mano) actualiza el índice en su misma transacción.
+#
+# El puntaje (score) es mayor cuanto más relevante: en MySQL es el valor de
+# MATCH; en SQLite es -bm25() (bm25 devuelve valores menores para mejores hits).
+
+FTS_TABLE = 'posts_fts'
+
+FTS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, body ON posts BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+)
+
+# Sólo se cachean los motores con índice: si todavía no existe (migración o
+# `flask search-reindex` pendientes) se vuelve a comprobar en la próxima búsqueda.
+_backend_cache = {}
+
+
+class SearchUnavailable(RuntimeError):
+    """No hay índice full-text para el motor de base de datos actual."""
+
+
+def search_backend():
+    """'mysql', 'sqlite' o None si el índice no está disponible."""
+    engine = db.engine
+    key = engine.url.render_as_string(hide_password=True)
+    backend = _backend_cache.get(key)
+    if backend is None:
+        dialect = engine.dialect.name
+        if dialect == 'mysql':
+            backend = 'mysql'
+        elif dialect == 'sqlite' and sa_inspect(engine).has_table(FTS_TABLE):
+            backend = 'sqlite'
+        if backend is not None:
+            _backend_cache[key] = backend
+    return backend
+
+
+def _fts5_query(q):
+    """Convierte el texto del usuario en una consulta FTS5 segura.
+
+    Cada palabra va entre comillas (así no se interpretan operadores de FTS5)
+    y todas deben aparecer; la última admite prefijo.
+    """
+    words = re.findall(r'\w+', q, flags=re.UNICODE)
+    if not words:
+        return None
+    terms = ['"%s"' % w for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_hits(q):
+    """
+    Subquery (id, score) con los posts que coinciden con `q`, o None si `q`
+    no contiene términos buscables. Se arma como subquery para poder filtrar
+    y paginar por score como si fuera una columna más.
+    """
+    from .models import Post
+
+    backend = search_backend()
+    if backend == 'mysql':
+        score = mysql_match(Post.title, Post.body, against=q).in_natural_language_mode()
+        return (
+            db.select(Post.id.label('id'), score.label('score'))
+            .where(score > 0)
+            .subquery('hits')
+        )
+    if backend == 'sqlite':
+        fts_query = _fts5_query(q)
+        if fts_query is None:
+            return None
+        fts = literal_column(FTS_TABLE)
+        return (
+            db.select(
+                literal_column(f'{FTS_TABLE}.rowid').label('id'),
+                (-func.bm25(fts)).label('score'),
+            )
+            .select_from(text(FTS_TABLE))
+            .where(fts.op('MATCH')(fts_query))
+            .subquery('hits')
+        )
+    raise SearchUnavailable("La búsqueda full-text no está disponible para esta base de datos.")
+
+
+def rebuild_index():
+    """Crea (si hace falta) el índice y sus triggers, y lo reconstruye completo desde la tabla posts."""
+    engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(title, body, content='posts', content_rowid='id')"
+        ))
+        for trigger in FTS_TRIGGERS:
+            db.session.execute(text(trigger))
+        db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    elif engine.dialect.name == 'mysql':
+        if not any(ix['name'] == 'ix_posts_fulltext' for ix in sa_inspect(engine).get_indexes('posts')):
+            db.session.execute(text("CREATE FULLTEXT INDEX ix_posts_fulltext ON posts (title, body)"))
+    else:
+        raise SearchUnavailable("La búsqueda full-text no está disponible para esta base de datos.")
+    db.session.commit()
+    _backend_cache.clear()
@@ -0,0 +1,231 @@
+import itertools
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, update
+
+from .extensions import db
+from .auth.hashing import hash_password
+
+# Generador de datos sintéticos a escala (`flask seed --scale N`).
+#
+# Con --scale 1 se generan ~1.000 posts; la escala es lineal (--scale 1000 =
+# ~1 millón de posts y ~5 millones de comentarios). Las distribuciones imitan
+# un blog real:
+#   - autores, categorías y comentaristas siguen una ley de Zipf (pocos muy
+#     activos, muchos casi inactivos),
+#   - los comentarios por post tienen cola pesada (Pareto): la mayoría tiene
+#     pocos o ninguno y unos pocos acumulan cientos.
+# Todo sale de un RNG con semilla fija, así dos ejecuciones con la misma
+# semilla producen exactamente los mismos datos. Se inserta por lotes con
+# executemany e ids precalculados, sin pasar por el ORM fila a fila.
+
+POSTS_PER_SCALE = 1000
+USERS_PER_SCALE = 100
+MAX_CATEGORIES = 200
+MAX_COMMENTS_PER_POST = 1000
+
+# Todos los usuarios generados comparten esta contraseña (hashearla una vez por
+# usuario haría que el seed tarde horas).
+SEED_PASSWORD = 'password'
+
+# Las fechas se generan hacia atrás desde una fecha fija (no desde "ahora")
+# para que la misma semilla dé también los mismos timestamps.
+SEED_END_DATE = datetime(2025, 1, 1)
+
+WORDS = (
+    "flask python base datos consulta índice servidor cliente rendimiento memoria "
+    "latencia caché usuario categoría comentario post blog api token seguridad "
+    "migración esquema tabla columna fila cursor página lista búsqueda texto "
+    "proceso hilo cola lote carga prueba error respuesta petición red disco "
+    "código función módulo paquete versión despliegue producción desarrollo "
+    "ejemplo idea tutorial guía receta viaje deporte música libro película"
+).split()
+
+CATEGORY_TOPICS = (
+    "Tecnología", "Deportes", "Comida", "Viajes", "Música", "Cine", "Libros",
+    "Ciencia", "Programación", "Política", "Economía", "Salud", "Arte", "Historia",
+)
+
+
+def _zipf_cum_weights(n, s=1.1):
+    """Pesos acumulados de una distribución de Zipf sobre n elementos."""
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def _sentence(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize()
+
+
+def _paragraphs(rng, n):
+    return '\n\n'.join(
+        '. '.join(_sentence(rng, 6, 16) for _ in range(rng.randint(2, 6))) + '.'
+        for _ in range(n)
+    )
+
+
+def _next_id(model):
+    return (db.session.execute(db.select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _ensure_roles():
+    from .models import Role, RoleName
+    roles = {r.name: r.id for r in db.session.execute(db.select(Role)).scalars()}
+    for name in RoleName:
+        if name not in roles:
+            role = Role(name=name)
+            db.session.add(role)
+            db.session.flush()
+            roles[name] = role.id
+    db.session.commit()
+    return roles
+
+
+def seed_database(scale=1.0, seed=42, batch_size=5000, log=print):
+    """Genera usuarios, categorías, posts y comentarios. Retorna los totales insertados."""
+    from .models import Usuario, Category, Post, Comment, RoleName
+
+    rng = random.Random(seed)
+    n_posts = max(1, int(POSTS_PER_SCALE * scale))
+    n_users = max(10, int(USERS_PER_SCALE * scale))
+    n_categories = max(len(CATEGORY_TOPICS) // 2, min(MAX_CATEGORIES, int(20 * scale ** 0.5)))
+
+    roles = _ensure_roles()
+    password_hash = hash_password(SEED_PASSWORD)
+    start = SEED_END_DATE - timedelta(days=730)
+
+    # --- Usuarios: ~1% admin, ~9% editores (los que publican), el resto lectores
+    first_user = _next_id(Usuario)
+    users = []
+    for i in range(n_users):
+        uid = first_user + i
+        r = rng.random()
+        role = RoleName.ADMIN if r < 0.01 else RoleName.EDITOR if r < 0.10 else RoleName.READER
+        # Los primeros usuarios garantizan al menos uno de cada rol aun con escalas chicas
+        if i < len(RoleName):
+            role = list(RoleName)[i]
+        users.append({
+            "id": uid,
+            "username": f"user{uid}",
+            "email": f"user{uid}@example.com",
+            "password_hash": password_hash,
+            "role_id": roles[role],
+            "is_active": rng.random() > 0.02,
+            "created_at": start + timedelta(seconds=rng.randint(0, 730 * 86400)),
+            "post_count": 0,
+        })
+    for i in range(0, n_users, batch_size):
+        db.session.execute(db.insert(Usuario), users[i:i + batch_size])
+    db.session.commit()
+    log(f"-> usuarios: {n_users}")
+
+    # --- Categorías
+    first_category = _next_id(Category)
+    categories = []
+    for i in range(n_categories):
+        cid = first_category + i
+        topic = CATEGORY_TOPICS[i % len(CATEGORY_TOPICS)]
+        categories.append({
+            "id": cid,
+            "name": f"{topic} {cid}",
+            "description": _sentence(rng, 4, 10),
+            "post_count": 0,
+        })
+    db.session.execute(db.insert(Category), categories)
+    db.session.commit()
+    log(f"-> categorías: {n_categories}")
+
+    # Autores: sólo editores/admins, con actividad Zipf. Comentaristas: todos, también Zipf.
+    authors = [u["id"] for u in users if u["role_id"] != roles[RoleName.READER]] or [users[0]["id"]]
+    rng.shuffle(authors)
+    author_weights = _zipf_cum_weights(len(authors))
+    commenters = [u["id"] for u in users]
+    rng.shuffle(commenters)
+    commenter_weights = _zipf_cum_weights(len(commenters))
+    category_ids = [c["id"] for c in categories]
+    category_weights = _zipf_cum_weights(len(category_ids), s=0.8)
+
+    posts_per_user = dict.fromkeys(commenters, 0)
+    posts_per_category = dict.fromkeys(category_ids, 0)
+
+    # --- Posts y comentarios, en lotes
+    next_post = _next_id(Post)
+    next_comment = _next_id(Comment)
+    post_batch, comment_batch = [], []
+    total_comments = 0
+    step = timedelta(days=730) / n_posts
+
+    def flush_posts():
+        if post_batch:
+            db.session.execute(db.insert(Post), post_batch)
+            post_batch.clear()
+
+    def flush_comments():
+        if comment_batch:
+            db.session.execute(db.insert(Comment), comment_batch)
+            comment_batch.clear()
+
+    for i in range(n_posts):
+        post_id = next_post + i
+        author = rng.choices(authors, cum_weights=author_weights)[0]
+        category = rng.choices(category_ids, cum_weights=category_weights)[0]
+        # Orden cronológico aproximado con algo de ruido
+        timestamp = start + step * i + timedelta(seconds=rng.randint(0, 3600))
+        n_comments = min(MAX_COMMENTS_PER_POST, int(rng.paretovariate(1.2)) - 1)
+
+        post_batch.append({
+            "id": post_id,
+            "title": _sentence(rng, 3, 9)[:128],
+            "body": _paragraphs(rng, rng.randint(1, 5)),
+            "timestamp": timestamp,
+            "updated_at": timestamp,
+            "user_id": author,
+            "category_id": category,
+            "comment_count": n_comments,
+        })
+        posts_per_user[author] += 1
+        posts_per_category[category] += 1
+
+        for _ in range(n_comments):
+            comment_timestamp = timestamp + timedelta(seconds=rng.randint(60, 30 * 86400))
+            comment_batch.append({
+                "id": next_comment,
+                "body": _sentence(rng, 3, 30)[:256],
+                "timestamp": comment_timestamp,
+                "updated_at": comment_timestamp,
+                "user_id": rng.choices(commenters, cum_weights=commenter_weights)[0],
+                "post_id": post_id,
+                "is_visible": rng.random() > 0.03,
+            })
+            next_comment += 1
+        total_comments += n_comments
+
+        if len(post_batch) >= batch_size:
+            flush_posts()
+        # Los posts del lote deben existir antes que sus comentarios (FK)
+        if len(comment_batch) >= batch_size:
+            flush_posts()
+            flush_comments()
+            db.session.commit()
+        if (i + 1) % (batch_size * 10) == 0:
+            db.session.commit()
+            log(f"   {i + 1}/{n_posts} posts, {total_comments} comentarios")
+
+    flush_posts()
+    flush_comments()
+
+    # Contadores desnormalizados (ya conocidos: se escriben con un executemany)
+    db.session.execute(
+        update(Usuario.__table__).where(Usuario.__table__.c.id == bindparam('uid')).values(post_count=bindparam('n')),
+        [{"uid": uid, "n": n} for uid, n in posts_per_user.items() if n],
+    )
+    db.session.execute(
+        update(Category.__table__).where(Category.__table__.c.id == bindparam('cid')).values(post_count=bindparam('n')),
+        [{"cid": cid, "n": n} for cid, n in posts_per_category.items() if n],
+    )
+    db.session.commit()
+    log(f"-> posts: {n_posts}")
+    log(f"-> comentarios: {total_comments}")
+
+    return {"usuarios": n_users, "categories": n_categories, "posts": n_posts, "comments": total_comments}
@@ -0,0 +1,146 @@
+import time
+
+from flask import current_app, has_app_context
+from marshmallow import fields
+
+from .metrics import observe_serialization
+
+# Serializadores "compilados" para los schemas de Marshmallow.
+#
+# `schema.dump()` es genérico: por cada objeto y cada campo resuelve el
+# accessor, llama a serialize(), maneja `missing`, etc. En los listados eso es
+# la mayor parte del tiempo fuera de la base. Aquí, a partir de `dump_fields`
+# (ya respeta only/exclude), se genera UNA vez por schema una función Python
+# equivalente:
+#
+#     def dump_PostSchema(obj):
+#         v0 = obj.id
+#         ...
+#         return {'id': None if v0 is None else int(v0), ..., 'author': ...}
+#
+# Los Nested usan a su vez la función compilada del schema anidado. Los campos
+# de tipos no contemplados (o con atributos no triviales) delegan en
+# field.serialize(), y un schema con hooks de dump (pre_dump/post_dump) no se
+# compila: se usa su dump() de siempre. `schema.dump()` sigue siendo la
+# referencia: `flask serializers-check` compara ambas salidas y mide la mejora.
+
+_compiled = {}
+
+
+def _simple_expr(field):
+    """Expresión de conversión para `{v}` (nunca None), o None si el campo no se compila."""
+    cls = type(field)
+    if cls in (fields.Integer, fields.Int) and not field.as_string:
+        return 'int({v})'
+    if cls in (fields.Float,) and not field.as_string:
+        return 'float({v})'
+    if cls in (fields.String, fields.Str):
+        return '{v} if {v}.__class__ is str else str({v})'
+    if cls in (fields.Boolean, fields.Bool):
+        return '{v} if {v}.__class__ is bool else _bool({v})'
+    if cls is fields.DateTime and field.format in (None, 'iso', 'iso8601'):
+        return '{v}.isoformat()'
+    if cls is fields.Date and field.format in (None, 'iso', 'iso8601'):
+        return '{v}.isoformat()'
+    if cls is fields.Enum and not field.by_value:
+        return '{v}.name'
+    return None
+
+
+def _has_dump_hooks(schema):
+    hooks = getattr(schema, '_hooks', {}) or {}
+    return any(hooks.get(tag) for tag in hooks if 'dump' in str(tag))
+
+
+def _bool(value, _field=fields.Boolean()):
+    return _field._serialize(value, None, None)
+
+
+def _build(schema):
+    """Genera la función de dump de UN objeto para `schema`, o None si no se puede."""
+    if _has_dump_hooks(schema):
+        return None
+
+    name = f"dump_{type(schema).__name__}"
+    namespace = {"_bool": _bool}
+    lines = [f"def {name}(obj):"]
+    items = []
+    for i, (field_name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key or field_name
+        attr = field.attribute or field_name
+
+        if isinstance(field, fields.Nested):
+            nested = compile_schema(field.schema)
+            if nested is None or not attr.isidentifier():
+                expr = None
+            else:
+                namespace[f"_n{i}"] = nested
+                expr = f"[_n{i}(x) for x in {{v}}]" if field.many else f"_n{i}({{v}})"
+        else:
+            expr = _simple_expr(field) if attr.isidentifier() else None
+
+        if expr is None:
+            # Genérico: el mismo serialize() que usa Marshmallow
+            namespace[f"_f{i}"] = field
+            items.append(f"{key!r}: _f{i}.serialize({field_name!r}, obj)")
+        else:
+            lines.append(f"    v{i} = obj.{attr}")
+            items.append(f"{key!r}: None if v{i} is None else " + expr.format(v=f"v{i}"))
+
+    lines.append("    return {" + ", ".join(items) + "}")
+    exec(compile("\n".join(lines), f"<serializer {name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def compile_schema(schema):
+    """Función compilada dump(obj) -> dict para un objeto (ignora `many`); cacheada por schema."""
+    key = id(schema)
+    if key not in _compiled:
+        _compiled[key] = (schema, _build(schema))
+    return _compiled[key][1]
+
+
+def dump(schema, data):
+    """Igual que schema.dump(data) pero con la función compilada cuando se puede.
+
+    El tiempo de serialización se registra en las métricas (ver metrics.py).
+    """
+    start = time.perf_counter()
+    fn = compile_schema(schema)
+    if fn is None or (has_app_context() and not current_app.config.get('FAST_SERIALIZERS', True)):
+        result = schema.dump(data)
+    elif schema.many:
+        result = [fn(obj) for obj in data]
+    else:
+        result = fn(data)
+    observe_serialization(time.perf_counter() - start)
+    return result
+
+
+def check_equivalence(schema, objects):
+    """Lista de (índice, esperado, obtenido) donde la salida compilada difiere de dump()."""
+    fn = compile_schema(schema)
+    if fn is None:
+        return []
+    mismatches = []
+    for i, obj in enumerate(objects):
+        expected = schema.dump(obj) if not schema.many else schema.dump([obj])[0]
+        got = fn(obj)
+        if expected != got or list(expected) != list(got):
+            mismatches.append((i, expected, got))
+    return mismatches
+
+
+def benchmark(schema, objects, repeat=5):
+    """(segundos con dump(), segundos compilado) para serializar `objects`; el mejor de `repeat`."""
+    import timeit
+    fn = compile_schema(schema)
+    if schema.many:
+        reference_fn = lambda: schema.dump(objects)
+    else:
+        reference_fn = lambda: [schema.dump(o) for o in objects]
+    reference = min(timeit.repeat(reference_fn, number=1, repeat=repeat))
+    if fn is None:
+        return reference, reference
+    compiled = min(timeit.repeat(lambda: [fn(o) for o in objects], number=1, repeat=repeat))
+    return reference, compiled
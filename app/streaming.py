@@ -0,0 +1,48 @@
+from flask import Response, current_app, request, stream_with_context
+
+from .extensions import db
+from . import serializers
+
+# Modo "streaming" para los listados grandes (exportaciones, herramientas de admin).
+# Se activa con `Accept: application/x-ndjson` o con `?stream=1`.
+# Cada fila se serializa a medida que sale del cursor, por lo que la memoria
+# se mantiene plana y el primer byte sale sin esperar a toda la tabla.
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Cantidad de filas que se traen por vuelta del cursor (yield_per)
+STREAM_BATCH_SIZE = 500
+
+
+def wants_stream():
+    """True si el cliente pidió la respuesta como NDJSON."""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    # Sólo si el tipo aparece explícito: un `*/*` no debe activar el streaming.
+    return any(mimetype == NDJSON_MIMETYPE and quality > 0
+               for mimetype, quality in request.accept_mimetypes)
+
+
+def stream_ndjson(stmt, schema):
+    """Devuelve una respuesta NDJSON (un objeto JSON por línea) para `stmt`.
+
+    :param stmt: select() de una entidad; se ejecuta con yield_per, lo que en
+                 MySQL usa un cursor del lado del servidor.
+    :param schema: schema de Marshmallow para UN objeto (no `many=True`).
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', STREAM_BATCH_SIZE)
+
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        dumps = current_app.json.dumps
+        try:
+            for obj in result.scalars():
+                yield dumps(serializers.dump(schema, obj)) + '\n'
+        except Exception as e:
+            # El status 200 ya fue enviado: sólo podemos registrar y cortar el stream.
+            current_app.logger.exception("Error durante el streaming NDJSON: %s", e)
+            db.session.rollback()
+        finally:
+            result.close()
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
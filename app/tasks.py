@@ -0,0 +1,29 @@
+from sqlalchemy import func, select, update
+
+from .extensions import db
+from .jobs import job
+
+# Handlers de la cola de trabajos (ver app/jobs.py). Se ejecutan en `flask worker`
+# con su propia sesión; el worker hace el commit. Deben ser idempotentes: un
+# job puede ejecutarse más de una vez si el worker muere a mitad de camino.
+
+
+@job('refresh_comment_count')
+def refresh_comment_count(post_id):
+    """Recalcula posts.comment_count de un post a partir de la tabla de comentarios."""
+    from .models import Post, Comment
+    count = select(func.count(Comment.id)).where(Comment.post_id == post_id).scalar_subquery()
+    # Sólo si cambió, para no mover updated_at (y el ETag del post) de más
+    db.session.execute(
+        update(Post)
+        .where(Post.id == post_id, Post.comment_count != count)
+        .values(comment_count=count)
+        .execution_options(synchronize_session=False)
+    )
+
+
+@job('repair_counters', max_attempts=3)
+def repair_counters():
+    """Recalcula todos los contadores desnormalizados (ver counters.repair_counters)."""
+    from .counters import repair_counters as repair
+    repair()
@@ -0,0 +1,192 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, has_app_context
+from sqlalchemy import case, update
+
+from .extensions import db
+
+# Contador de visitas de los posts con escritura diferida (write-behind).
+#
+# Un `UPDATE posts SET view_count = view_count + 1` por cada vista serializa a
+# todos los lectores de un post popular sobre el lock de esa fila. En su lugar,
+# cada proceso acumula las vistas en memoria y las vuelca con UN UPDATE por
+# lote (CASE id WHEN ... THEN view_count + n), en orden de id:
+#   - cada VIEW_COUNT_FLUSH_INTERVAL segundos (hilo en segundo plano),
+#   - antes, si se juntan VIEW_COUNT_MAX_PENDING vistas,
+#   - y al terminar el proceso (atexit).
+# Pérdida acotada: si el proceso muere de golpe se pierden a lo sumo las vistas
+# de un intervalo (o VIEW_COUNT_MAX_PENDING). Si el UPDATE falla, las vistas
+# vuelven al acumulador para el próximo intento, hasta ese mismo tope.
+#
+# El UPDATE no modifica updated_at: una vista no es una edición y no debe
+# invalidar los ETag. Por eso view_count es aproximado y puede llegar
+# desactualizado en una revalidación 304, y los ETag del detalle de un post
+# son débiles (W/"..."): el cuerpo puede cambiar con el mismo ETag.
+#
+# El acumulador es uno por proceso y queda ligado a la primera app creada (la
+# que sirve). Las apps de vida corta creadas después en el mismo proceso
+# (`flask bench`, con su base temporal) no la reemplazan y sus vistas se ignoran:
+# si no, el volcado final escribiría en la base de otra app ya borrada.
+
+logger = logging.getLogger('app.view_counts')
+
+# Posts por UPDATE (el CASE crece con cada id)
+FLUSH_CHUNK_SIZE = 500
+
+
+class ViewCounter:
+    def __init__(self, flush_interval=5, max_pending=10000):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_total = 0
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enabled = True
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._wake = threading.Event()
+        self.flushed = 0
+        self.flushes = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def configure(self, app, flush_interval=None, max_pending=None, enabled=True):
+        self._app = app
+        self.enabled = enabled
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        if max_pending is not None:
+            self.max_pending = max_pending
+
+    # --- Camino del request
+
+    def hit(self, post_id):
+        """Registra una vista de `post_id` (sin tocar la base)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pending[post_id] += 1
+            self._pending_total += 1
+            full = self._pending_total >= self.max_pending
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    # --- Volcado
+
+    def _ensure_thread(self):
+        # Un hilo por proceso (un fork del servidor no hereda el hilo del padre)
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name='view-counts', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error volcando las vistas de posts")
+
+    def _take(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._pending_total = 0
+        return pending
+
+    def _give_back(self, pending):
+        """Devuelve vistas no guardadas al acumulador, sin pasar de max_pending."""
+        with self._lock:
+            for post_id, n in pending.items():
+                if self._pending_total >= self.max_pending:
+                    self.dropped += n
+                    continue
+                self._pending[post_id] += n
+                self._pending_total += n
+
+    def flush(self):
+        """Vuelca las vistas acumuladas con UPDATEs por lote. Retorna la cantidad guardada."""
+        pending = self._take()
+        if not pending or self._app is None:
+            if pending:
+                self._give_back(pending)
+            return 0
+
+        from .models import Post
+        ids = sorted(pending)
+        saved = 0
+        try:
+            with self._app.app_context():
+                with db.engine.begin() as conn:
+                    for start in range(0, len(ids), FLUSH_CHUNK_SIZE):
+                        chunk = ids[start:start + FLUSH_CHUNK_SIZE]
+                        increment = case({post_id: pending[post_id] for post_id in chunk}, value=Post.id, else_=0)
+                        conn.execute(
+                            update(Post)
+                            .where(Post.id.in_(chunk))
+                            # updated_at explícito: evita el onupdate (una vista no cambia el ETag)
+                            .values(view_count=Post.view_count + increment, updated_at=Post.updated_at)
+                            .execution_options(synchronize_session=False)
+                        )
+                        saved += sum(pending[post_id] for post_id in chunk)
+        except Exception as e:
+            self.errors += 1
+            self._give_back(pending)
+            logger.warning(json.dumps({"event": "view_count_flush_failed", "posts": len(ids), "error": str(e)}))
+            return 0
+
+        self.flushed += saved
+        self.flushes += 1
+        return saved
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": self._pending_total,
+                "pending_posts": len(self._pending),
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "flush_interval": self.flush_interval,
+                "max_pending": self.max_pending,
+            }
+
+
+view_counter = ViewCounter()
+_atexit_registered = False
+
+
+def record_view(post_id):
+    # Sin contexto de app (rutas async de aio.py) la vista es de la app que sirve
+    if has_app_context() and current_app._get_current_object() is not view_counter._app:
+        return
+    view_counter.hit(post_id)
+
+
+def init_view_counts(app):
+    global _atexit_registered
+    if view_counter._app is not None and view_counter._app is not app:
+        return
+    view_counter.configure(
+        app,
+        flush_interval=app.config.get('VIEW_COUNT_FLUSH_INTERVAL', 5),
+        max_pending=app.config.get('VIEW_COUNT_MAX_PENDING', 10000),
+        enabled=app.config.get('VIEW_COUNT_ENABLED', True),
+    )
+    if not _atexit_registered:
+        atexit.register(view_counter.flush)
+        _atexit_registered = True
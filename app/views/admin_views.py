@@ -0,0 +1,34 @@
+from flask.views import MethodView
+from flask import jsonify
+from flask_jwt_extended import jwt_required
+from .. import db
+from ..models import RoleName
+from ..decorators.auth_decorators import is_allowed
+from ..pool import pool_stats
+from ..replicas import replica_set
+from ..cache import cache_stats
+from ..view_counts import view_counter
+
+
+# ----------------------------------------------------------------------------------
+# PoolStatsAPI - GET (Estado del pool de conexiones, réplicas, cachés y contador de vistas)
+# ----------------------------------------------------------------------------------
+
+class PoolStatsAPI(MethodView):
+
+    # GET: Estadísticas en vivo (Solo ADMIN)
+    # Por engine: tamaño, conexiones en uso / libres, overflow, esperas por checkout
+    # (promedio, máxima, lentas), timeouts e invalidaciones. Un checked_out igual a
+    # size + max_overflow con slow_waits/timeouts creciendo indica pool agotado.
+    @jwt_required()
+    def get(self):
+        is_ok, user_or_response, status_code = is_allowed([RoleName.ADMIN.value])
+        if not is_ok:
+            return user_or_response, status_code
+
+        return jsonify({
+            "pools": pool_stats(db),
+            "replicas": replica_set.stats(),
+            "caches": cache_stats(),
+            "view_counts": view_counter.stats(),
+        }), 200
@@ -3,7 +3,11 @@ from flask import request, jsonify
 from .. import db  # Asume que 'db' es tu instancia de SQLAlchemy
 from ..models import Usuario, Role, RoleName  # AÑADIDO: Importamos Role y RoleName
 from ..models import usuario_schema, usuarios_schema  # Usamos los schemas del models.py
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
+from ..streaming import wants_stream, stream_ndjson
+from ..loading import loader_options
+from .. import serializers
+from ..decorators.auth_decorators import is_allowed, current_user_id
+from flask_jwt_extended import create_access_token, jwt_required
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import IntegrityError
 import datetime
@@ -12,26 +16,6 @@ import datetime
 usuario_dump_schema = usuario_schema
 usuarios_dump_schema = usuarios_schema
 
-# Función de utilidad para verificar el rol del usuario actual
-def is_allowed(allowed_roles):
-    try:
-        verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        current_user = db.session.get(Usuario, user_id)
-        
-        if not current_user:
-            return False, jsonify({"msg": "Usuario no encontrado."}), 404
-
-        user_role_name = current_user.role.name.value
-        
-        if user_role_name in allowed_roles:
-            return True, current_user, None
-        else:
-            return False, jsonify({"msg": "Acceso denegado. Rol insuficiente."}), 403
-            
-    except Exception as e:
-        return False, jsonify({"msg": "Token inválido o requerido."}), 401
-
 
 class RegisterAPI(MethodView):
     def post(self):
@@ -94,6 +78,10 @@ class LoginAPI(MethodView):
         if not user.check_password(password):
             return jsonify({"msg": "Credenciales inválidas (contraseña incorrecta)."}), 401
 
+        # Si el hash se recalculó con los parámetros actuales, guardarlo
+        if db.session.is_modified(user):
+            db.session.commit()
+
         # 🔥🔥🔥 ACÁ ESTÁ LO QUE VOS PEDISTE — TOKEN CON EMAIL INCLUIDO 🔥🔥🔥
         try:
             access_token = create_access_token(
@@ -117,13 +105,13 @@ class LoginAPI(MethodView):
 class UserDetailAPI(MethodView):
     @jwt_required()
     def get(self):
-        user_id = get_jwt_identity()
-        user = db.session.get(Usuario, user_id)
+        user_id = current_user_id()
+        user = db.session.get(Usuario, user_id, options=loader_options(usuario_dump_schema))
         
         if user is None:
             return jsonify({"msg": "Usuario no encontrado, ID del token inválido."}), 404
         
-        return jsonify(usuario_dump_schema.dump(user)), 200
+        return jsonify(serializers.dump(usuario_dump_schema, user)), 200
 
 
 class UserListAPI(MethodView):
@@ -135,9 +123,18 @@ class UserListAPI(MethodView):
         if not is_ok:
             return user_or_response, status_code
 
+        # Exportación completa en streaming (NDJSON)
+        if wants_stream():
+            stmt = db.select(Usuario).options(*loader_options(usuario_dump_schema)).order_by(Usuario.username)
+            return stream_ndjson(stmt, usuario_dump_schema)
+
         try:
-            users = db.session.execute(db.select(Usuario).order_by(Usuario.username)).scalars().all()
-            result = usuarios_dump_schema.dump(users)
+            users = db.session.execute(
+                db.select(Usuario)
+                .options(*loader_options(usuarios_dump_schema))
+                .order_by(Usuario.username)
+            ).scalars().all()
+            result = serializers.dump(usuarios_dump_schema, users)
             return jsonify(result), 200
         except Exception as e:
             db.session.rollback()
@@ -1,32 +1,16 @@
 from flask.views import MethodView
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import jwt_required
 from sqlalchemy.exc import IntegrityError
 from .. import db
-from ..models import Category, Usuario, RoleName, category_schema, categories_schema
-
-# Función de utilidad para verificar el rol del usuario actual
-# Copiada aquí para que el archivo sea autocontenido y no dependa de post_views.py
-def is_allowed(allowed_roles):
-    try:
-        verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        current_user = db.session.get(Usuario, user_id)
-        
-        if not current_user:
-            return False, jsonify({"msg": "Usuario no encontrado."}), 404
+from ..models import Category, RoleName, category_schema, categories_schema
+from ..streaming import wants_stream, stream_ndjson
+from ..replicas import read_replica
+from ..decorators.auth_decorators import is_allowed
+from ..category_cache import invalidate_categories
+from ..conditional import make_etag, not_modified, set_validators
+from .. import serializers
 
-        user_role_name = current_user.role.name.value
-        
-        if user_role_name in allowed_roles:
-            return True, current_user, None
-        else:
-            return False, jsonify({"msg": "Acceso denegado. Rol insuficiente."}), 403
-            
-    except Exception as e:
-        # Errores de JWT (token expirado, inválido, etc.)
-        print(f"Error de JWT o autenticación: {e}")
-        return False, jsonify({"msg": "Token inválido o requerido."}), 401
 
 # ----------------------------------------------------------------------------------
 # CategoryListAPI - GET (Listar Categorías) y POST (Crear Nueva Categoría)
@@ -35,10 +19,15 @@ def is_allowed(allowed_roles):
 class CategoryListAPI(MethodView):
 
     # GET: Listar todas las categorías (Acceso Público)
+    # Con `Accept: application/x-ndjson` o `?stream=1` la respuesta se envía en streaming.
+    @read_replica
     def get(self):
+        if wants_stream():
+            return stream_ndjson(db.select(Category).order_by(Category.id), category_schema)
+
         try:
             categories = db.session.execute(db.select(Category).order_by(Category.id)).scalars().all()
-            result = categories_schema.dump(categories)
+            result = serializers.dump(categories_schema, categories)
             return jsonify(result), 200
         except Exception as e:
             db.session.rollback()
@@ -72,6 +61,7 @@ class CategoryListAPI(MethodView):
         try:
             db.session.add(new_category)
             db.session.commit()
+            invalidate_categories()
             # 4. Serializar la respuesta
             return category_schema.jsonify(new_category), 201
         except IntegrityError:
@@ -89,13 +79,21 @@ class CategoryListAPI(MethodView):
 class CategoryDetailAPI(MethodView):
 
     # GET: Obtener una categoría específica (Acceso Público)
+    # Soporta GET condicional: If-None-Match / If-Modified-Since -> 304
+    @read_replica
     def get(self, category_id):
         category = db.session.get(Category, category_id)
         if category is None:
             return jsonify({"msg": "Categoría no encontrada"}), 404
-        
+
+        # La fila es chica: el ETag evita reenviar el cuerpo si no cambió
+        etag = make_etag('category', category.id, category.updated_at, category.name, category.description)
+        cached = not_modified(etag, category.updated_at)
+        if cached is not None:
+            return cached
+
         # Serializar y devolver la categoría
-        return category_schema.jsonify(category), 200
+        return set_validators(jsonify(serializers.dump(category_schema, category)), etag, category.updated_at), 200
 
     # PUT: Editar una categoría (Requiere ADMIN o EDITOR)
     @jwt_required()
@@ -127,6 +125,7 @@ class CategoryDetailAPI(MethodView):
 
         try:
             db.session.commit()
+            invalidate_categories()
             # 5. Serializar la respuesta
             return category_schema.jsonify(category), 200
         except IntegrityError:
@@ -158,6 +157,7 @@ class CategoryDetailAPI(MethodView):
         try:
             db.session.delete(category)
             db.session.commit()
+            invalidate_categories()
             return jsonify({"msg": "Categoría eliminada exitosamente"}), 200
         except Exception as e:
             db.session.rollback()
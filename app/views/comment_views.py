@@ -1,30 +1,16 @@
 from flask.views import MethodView
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import jwt_required
 from sqlalchemy.exc import IntegrityError
 from .. import db
-from ..models import Comment, Post, Usuario, RoleName, comment_schema, comments_schema
-
-# Función de utilidad para verificar el rol del usuario actual
-def is_allowed(allowed_roles):
-    try:
-        verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        current_user = db.session.get(Usuario, user_id)
-        
-        if not current_user:
-            return False, jsonify({"msg": "Usuario no encontrado."}), 404
-
-        user_role_name = current_user.role.name.value
-        
-        if user_role_name in allowed_roles:
-            return True, current_user, None
-        else:
-            return False, jsonify({"msg": "Acceso denegado. Rol insuficiente."}), 403
-            
-    except Exception as e:
-        # Errores de JWT (token expirado, inválido, etc.)
-        return False, jsonify({"msg": "Token inválido o requerido."}), 401
+from ..models import Comment, Post, RoleName, Usuario, comment_schema, comments_schema, comment_input_schema
+from ..pagination import keyset_paginate, get_page_args, page_response, InvalidCursor
+from ..loading import loader_options
+from ..replicas import read_replica
+from ..decorators.auth_decorators import is_allowed, current_user_id
+from ..conditional import make_etag, not_modified, set_validators
+from .. import counters, jobs
+from .. import serializers
 
 
 # ----------------------------------------------------------------------------------
@@ -33,21 +19,53 @@ def is_allowed(allowed_roles):
 
 class CommentListAPI(MethodView):
 
-    # GET: Listar comentarios para un post específico (Acceso Público)
+    # GET: Listar comentarios para un post específico, paginados por cursor (Acceso Público)
+    # Query string: ?limit=<n>&cursor=<token devuelto en next_cursor/prev_cursor>
+    @read_replica
     def get(self, post_id):
         post = db.session.get(Post, post_id)
         if post is None:
             return jsonify({"msg": "Post no encontrado"}), 404
-        
-        # Filtramos los comentarios por el post_id
-        comments = db.session.execute(
-            db.select(Comment)
+
+        limit, cursor = get_page_args()
+
+        # GET condicional: la versión del listado se resume con COUNT + MAX(updated_at)
+        # (cubre altas, bajas y ediciones) sin cargar ni serializar los comentarios.
+        # Cada comentario anida su autor: renombrar un autor también cambia el listado.
+        count, last_modified, commenters_updated_at = db.session.execute(
+            db.select(
+                db.func.count(Comment.id),
+                db.func.max(db.func.coalesce(Comment.updated_at, Comment.timestamp)),
+                db.func.max(Usuario.updated_at),
+            )
+            .outerjoin(Usuario, Usuario.id == Comment.user_id)
             .where(Comment.post_id == post_id)
-            .order_by(Comment.timestamp.asc())
-        ).scalars().all()
-        
-        result = comments_schema.dump(comments)
-        return jsonify(result), 200
+        ).one()
+        # Sólo ETag: MAX(updated_at) baja si se borra el comentario más nuevo, así que
+        # no sirve como Last-Modified (un If-Modified-Since daría 304 a una lista que cambió)
+        etag = make_etag('comments', post_id, count, last_modified, commenters_updated_at, limit, cursor)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        # Filtramos los comentarios por el post_id (orden cronológico, el id desempata)
+        try:
+            comments, next_cursor, prev_cursor = keyset_paginate(
+                db.session,
+                db.select(Comment)
+                .where(Comment.post_id == post_id)
+                .options(*loader_options(comments_schema)),
+                keys=[(Comment.timestamp, False), (Comment.id, False)],
+                key_fn=lambda c: (c.timestamp, c.id),
+                limit=limit,
+                cursor=cursor,
+            )
+        except InvalidCursor as e:
+            return jsonify({"msg": str(e)}), 400
+
+        result = serializers.dump(comments_schema, comments)
+        response = jsonify(page_response(result, next_cursor, prev_cursor, limit))
+        return set_validators(response, etag), 200
 
     # POST: Crear un nuevo comentario (Requiere cualquier usuario autenticado)
     @jwt_required()
@@ -57,19 +75,19 @@ class CommentListAPI(MethodView):
         if post is None:
             return jsonify({"msg": "Post no encontrado"}), 404
 
-        # 2. El usuario debe estar autenticado (jwt_required ya lo asegura)
-        user_id = get_jwt_identity()
-        current_user = db.session.get(Usuario, user_id)
-        
-        if not current_user:
-            return jsonify({"msg": "Error de autenticación. Usuario no identificado."}), 401
+        # 2. El usuario debe estar autenticado (jwt_required ya lo asegura) y seguir activo,
+        #    ya que queda registrado como autor del comentario
+        is_ok, current_user, status_code = is_allowed(check_revocation=True)
+
+        if not is_ok:
+            return current_user, status_code
         
         json_data = request.get_json()
         
         # 3. Deserializar/Validar la entrada con Marshmallow
         try:
             # Solo necesitamos el cuerpo del comentario (body)
-            comment_data = comment_schema.load(json_data, partial=True)
+            comment_data = comment_input_schema.load(json_data)
         except Exception as err:
             return jsonify(err.messages), 400
 
@@ -82,6 +100,10 @@ class CommentListAPI(MethodView):
 
         try:
             db.session.add(new_comment)
+            # Contador desnormalizado del post, en la misma transacción. El job sólo
+            # reconcilia (recuenta) fuera del request; uno pendiente por post alcanza.
+            counters.comments_changed(post_id, 1)
+            jobs.enqueue('refresh_comment_count', {"post_id": post_id}, key=f"comment_count:{post_id}")
             db.session.commit()
             # 5. Serializar la respuesta
             return comment_schema.jsonify(new_comment), 201
@@ -98,24 +120,19 @@ class CommentDetailAPI(MethodView):
 
     # PUT: Editar un comentario (Requiere ADMIN o ser el autor)
     @jwt_required()
-    def put(self, post_id, comment_id):
-        # 1. Obtener el Comentario
+    def put(self, comment_id):
+        # 1. Obtener el Comentario (la ruta es /comments/<comment_id>, sin el post)
         comment = db.session.get(Comment, comment_id)
         if comment is None:
             return jsonify({"msg": "Comentario no encontrado"}), 404
-        
-        # 2. Verificar que el comentario pertenece al post_id (coherencia de URL)
-        if comment.post_id != post_id:
-            return jsonify({"msg": "El comentario no pertenece a este post."}), 404
 
-        # 3. Verificar Permisos (Admin o Autor)
+        # 2. Verificar Permisos (Admin o Autor)
         allowed_roles = [RoleName.ADMIN.value] # Solo ADMIN tiene permiso absoluto
         is_admin_ok, user_or_response, status_code = is_allowed(allowed_roles)
 
         if not is_admin_ok:
             # Si no es ADMIN, comprobamos si es el autor del comentario
-            current_user_id = get_jwt_identity()
-            if comment.user_id != current_user_id:
+            if comment.user_id != current_user_id():
                 # El usuario no es ADMIN ni el autor
                 return jsonify({"msg": "Acceso denegado. Solo el autor del comentario o un ADMIN pueden editarlo."}), 403
             
@@ -123,18 +140,18 @@ class CommentDetailAPI(MethodView):
 
         json_data = request.get_json()
         
-        # 4. Deserializar/Validar la entrada con Marshmallow
+        # 3. Deserializar/Validar la entrada con Marshmallow
         try:
-            comment_data = comment_schema.load(json_data, partial=True)
+            comment_data = comment_input_schema.load(json_data, partial=True)
         except Exception as err:
             return jsonify(err.messages), 400
 
-        # 5. Actualizar el objeto Comment
+        # 4. Actualizar el objeto Comment
         comment.body = comment_data.get('body', comment.body)
         
         try:
             db.session.commit()
-            # 6. Serializar la respuesta
+            # 5. Serializar la respuesta
             return comment_schema.jsonify(comment), 200
         except Exception as e:
             db.session.rollback()
@@ -142,24 +159,19 @@ class CommentDetailAPI(MethodView):
 
     # DELETE: Eliminar un comentario (Requiere ADMIN o ser el autor)
     @jwt_required()
-    def delete(self, post_id, comment_id):
-        # 1. Obtener el Comentario
+    def delete(self, comment_id):
+        # 1. Obtener el Comentario (la ruta es /comments/<comment_id>, sin el post)
         comment = db.session.get(Comment, comment_id)
         if comment is None:
             return jsonify({"msg": "Comentario no encontrado"}), 404
-        
-        # 2. Verificar que el comentario pertenece al post_id (coherencia de URL)
-        if comment.post_id != post_id:
-            return jsonify({"msg": "El comentario no pertenece a este post."}), 404
 
-        # 3. Verificar Permisos (Admin o Autor)
+        # 2. Verificar Permisos (Admin o Autor)
         allowed_roles = [RoleName.ADMIN.value] # Solo ADMIN tiene permiso absoluto
         is_admin_ok, user_or_response, status_code = is_allowed(allowed_roles)
 
         if not is_admin_ok:
             # Si no es ADMIN, comprobamos si es el autor del comentario
-            current_user_id = get_jwt_identity()
-            if comment.user_id != current_user_id:
+            if comment.user_id != current_user_id():
                 # El usuario no es ADMIN ni el autor
                 return jsonify({"msg": "Acceso denegado. Solo el autor del comentario o un ADMIN pueden eliminarlo."}), 403
 
@@ -167,6 +179,9 @@ class CommentDetailAPI(MethodView):
 
         try:
             db.session.delete(comment)
+            counters.comments_changed(comment.post_id, -1)
+            jobs.enqueue('refresh_comment_count', {"post_id": comment.post_id},
+                         key=f"comment_count:{comment.post_id}")
             db.session.commit()
             return jsonify({"msg": "Comentario eliminado exitosamente"}), 200
         except Exception as e:
@@ -1,37 +1,23 @@
+import json
+from collections import Counter
 from flask.views import MethodView
-from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from marshmallow import ValidationError
 from sqlalchemy.exc import IntegrityError
 from .. import db
-from ..models import Post, Usuario, Category, RoleName, post_schema, posts_schema
-
-# Función de utilidad para verificar el rol del usuario actual
-def is_allowed(allowed_roles):
-    """
-    Verifica si el usuario autenticado tiene uno de los roles permitidos.
-    Retorna (True, current_user, None) si el rol es suficiente.
-    Retorna (False, response, status_code) si falla la autenticación o la autorización.
-    """
-    try:
-        # Asegura que haya un token JWT válido
-        verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        current_user = db.session.get(Usuario, user_id)
-        
-        if not current_user:
-            return False, jsonify({"msg": "Usuario no encontrado."}), 404
-
-        # Obtener el nombre del rol del usuario (Ej: 'admin', 'editor', 'reader')
-        user_role_name = current_user.role.name.value
-        
-        if user_role_name in allowed_roles:
-            return True, current_user, None
-        else:
-            return False, jsonify({"msg": "Acceso denegado. Rol insuficiente."}), 403
-            
-    except Exception as e:
-        # Maneja errores de JWT (token expirado, inválido, etc.)
-        return False, jsonify({"msg": "Token inválido o requerido."}), 401
+from ..models import (Post, Comment, Category, Usuario, RoleName, post_schema, posts_schema,
+                      post_input_schema, post_bulk_item_schema)
+from ..pagination import keyset_paginate, get_page_args, page_response, InvalidCursor
+from ..streaming import wants_stream, stream_ndjson, NDJSON_MIMETYPE
+from ..loading import loader_options
+from ..replicas import read_replica
+from ..fieldsets import fieldset_from_request, fieldset_tag, InvalidFieldset
+from ..decorators.auth_decorators import is_allowed, current_user_id
+from ..conditional import make_etag, latest, not_modified, set_validators
+from ..view_counts import record_view
+from .. import search, counters
+from .. import serializers
 
 
 # ----------------------------------------------------------------------------------
@@ -40,13 +26,43 @@ def is_allowed(allowed_roles):
 
 class PostListAPI(MethodView):
 
-    # GET: Listar todos los posts (Acceso Público)
+    # GET: Listar posts paginados por cursor (Acceso Público)
+    # Query string: ?limit=<n>&cursor=<token devuelto en next_cursor/prev_cursor>
+    # Sparse fieldsets: ?fields=id,title,timestamp&include=author (ver fieldsets.py);
+    # las columnas y relaciones que no se piden no se leen de la base.
+    # Con `Accept: application/x-ndjson` o `?stream=1` se devuelven todos los posts en streaming.
+    @read_replica
     def get(self):
         try:
-            # Ordenamos por timestamp descendente (los más nuevos primero)
-            posts = db.session.execute(db.select(Post).order_by(Post.timestamp.desc())).scalars().all()
-            result = posts_schema.dump(posts)
-            return jsonify(result), 200
+            schema = fieldset_from_request(posts_schema)
+        except InvalidFieldset as e:
+            return jsonify({"msg": str(e)}), 400
+
+        if wants_stream():
+            # El streaming serializa de a un objeto: schema sin many=True
+            item_schema = fieldset_from_request(post_schema)
+            stmt = (db.select(Post)
+                    .options(*loader_options(item_schema, narrow=True))
+                    .order_by(Post.timestamp.desc(), Post.id.desc()))
+            return stream_ndjson(stmt, item_schema)
+
+        limit, cursor = get_page_args()
+        try:
+            # Ordenamos por timestamp descendente (los más nuevos primero); el id desempata
+            posts, next_cursor, prev_cursor = keyset_paginate(
+                db.session,
+                # Autor, rol y categoría se cargan en el mismo SELECT (sin N+1); el
+                # timestamp se lee siempre porque forma parte del cursor
+                db.select(Post).options(*loader_options(schema, narrow=True, keep=(Post.timestamp,))),
+                keys=[(Post.timestamp, True), (Post.id, True)],
+                key_fn=lambda p: (p.timestamp, p.id),
+                limit=limit,
+                cursor=cursor,
+            )
+            result = serializers.dump(schema, posts)
+            return jsonify(page_response(result, next_cursor, prev_cursor, limit)), 200
+        except InvalidCursor as e:
+            return jsonify({"msg": str(e)}), 400
         except Exception as e:
             db.session.rollback()
             return jsonify({"msg": f"Error al recuperar posts: {e}"}), 500
@@ -57,7 +73,8 @@ class PostListAPI(MethodView):
         # 1. Verificar Permisos
         # Solo ADMIN y EDITOR pueden crear posts
         allowed_roles = [RoleName.ADMIN.value, RoleName.EDITOR.value]
-        is_ok, current_user, status_code = is_allowed(allowed_roles)
+        # El autor queda registrado en el post: confirmamos que el usuario siga activo
+        is_ok, current_user, status_code = is_allowed(allowed_roles, check_revocation=True)
         
         if not is_ok:
             # is_ok es False, devolvemos la respuesta de error y el código de estado
@@ -67,8 +84,8 @@ class PostListAPI(MethodView):
         
         # 2. Deserializar/Validar la entrada con Marshmallow
         try:
-            # Los campos user_id y category_id se esperan en la carga (load)
-            post_data = post_schema.load(json_data)
+            # title, body y category_id (el autor es siempre el usuario autenticado)
+            post_data = post_input_schema.load(json_data)
         except Exception as err:
             return jsonify(err.messages), 400
 
@@ -88,6 +105,9 @@ class PostListAPI(MethodView):
 
         try:
             db.session.add(new_post)
+            db.session.flush()
+            # Contadores desnormalizados del autor y la categoría
+            counters.posts_changed(new_post.user_id, new_post.category_id, 1)
             db.session.commit()
             # 5. Serializar la respuesta
             return post_schema.jsonify(new_post), 201
@@ -96,6 +116,166 @@ class PostListAPI(MethodView):
             return jsonify({"msg": f"Error al crear el post: {e}"}), 500
 
 
+# ----------------------------------------------------------------------------------
+# PostBulkAPI - POST (Carga masiva de posts)
+# ----------------------------------------------------------------------------------
+
+class PostBulkAPI(MethodView):
+
+    # POST: Crear muchos posts en una sola petición (Requiere ADMIN o EDITOR)
+    # Cuerpo: un array JSON, o NDJSON (un post por línea) con Content-Type application/x-ndjson.
+    # Cada item: {"title": ..., "body": ..., "category_id": ...}
+    @jwt_required()
+    def post(self):
+        # 1. Verificar Permisos
+        allowed_roles = [RoleName.ADMIN.value, RoleName.EDITOR.value]
+        is_ok, current_user, status_code = is_allowed(allowed_roles, check_revocation=True)
+
+        if not is_ok:
+            return current_user, status_code
+
+        # 2. Leer los items (los errores de parseo se reportan por item). El cuerpo se
+        #    limita en bytes (413 de werkzeug al superarlo) y el NDJSON, además, se corta
+        #    apenas supera BULK_MAX_ITEMS, sin leer el resto.
+        request.max_content_length = current_app.config.get('BULK_MAX_BYTES', 64 * 1024 * 1024)
+        max_items = current_app.config.get('BULK_MAX_ITEMS', 50000)
+        too_many = jsonify({"msg": f"Demasiados items: el máximo por petición es {max_items}."}), 413
+        errors = {}
+        if request.mimetype == NDJSON_MIMETYPE:
+            items = []
+            for line in request.stream:
+                line = line.strip()
+                if not line:
+                    continue
+                if len(items) >= max_items:
+                    return too_many
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    errors[len(items)] = {"_schema": ["JSON inválido."]}
+                    items.append(None)
+        else:
+            items = request.get_json(silent=True)
+            if not isinstance(items, list):
+                return jsonify({"msg": "Se esperaba un array JSON de posts (o NDJSON)."}), 400
+            if len(items) > max_items:
+                return too_many
+
+        if not items:
+            return jsonify({"msg": "No se recibieron posts."}), 400
+
+        # 3. Validar y deserializar cada item una sola vez con Marshmallow
+        loaded = []
+        for index, item in enumerate(items):
+            if index in errors:
+                continue
+            try:
+                loaded.append((index, post_bulk_item_schema.load(item)))
+            except ValidationError as err:
+                errors[index] = err.messages
+
+        # 4. Verificar TODAS las categorías referenciadas con un único IN (...)
+        category_ids = {item['category_id'] for _, item in loaded}
+        existing = set(db.session.execute(
+            db.select(Category.id).where(Category.id.in_(category_ids))
+        ).scalars()) if category_ids else set()
+
+        rows = []
+        for index, item in loaded:
+            if item['category_id'] not in existing:
+                errors[index] = {"category_id": [f"La categoría con ID {item['category_id']} no existe."]}
+                continue
+            rows.append((index, {
+                "title": item['title'],
+                "body": item['body'],
+                "user_id": current_user.id,  # El autor siempre es el usuario autenticado
+                "category_id": item['category_id'],
+            }))
+
+        # 5. Insertar por lotes: un executemany y un commit por lote
+        batch_size = current_app.config.get('BULK_INSERT_BATCH_SIZE', 1000)
+        created = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            values = [row for _, row in batch]
+            try:
+                # El índice full-text de SQLite lo mantienen los triggers de posts (ver search.py)
+                db.session.execute(db.insert(Post), values)
+
+                # Contadores desnormalizados: un UPDATE por categoría del lote y uno para el autor
+                for category_id, n in Counter(row['category_id'] for row in values).items():
+                    counters.posts_changed(None, category_id, n)
+                counters.posts_changed(current_user.id, None, len(values))
+
+                db.session.commit()
+                created += len(values)
+            except Exception as e:
+                db.session.rollback()
+                for index, _ in batch:
+                    errors[index] = {"_schema": [f"Error al insertar el lote: {e}"]}
+
+        # 6. Reporte: 201 si todo se creó, 207 si fue parcial, 400 si nada
+        report = {
+            "received": len(items),
+            "created": created,
+            "errors": [{"index": i, "errors": errors[i]} for i in sorted(errors)],
+        }
+        if not errors:
+            return jsonify(report), 201
+        return jsonify(report), 207 if created else 400
+
+
+# ----------------------------------------------------------------------------------
+# PostSearchAPI - GET (Búsqueda full-text por título y cuerpo)
+# ----------------------------------------------------------------------------------
+
+class PostSearchAPI(MethodView):
+
+    # GET: Buscar posts (Acceso Público) -> ?q=<texto>&limit=<n>&cursor=<token>
+    # Resultados ordenados por relevancia (score descendente, el id desempata)
+    # Admite los mismos ?fields= / ?include= que el listado.
+    @read_replica
+    def get(self):
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return jsonify({"msg": "Falta el parámetro de búsqueda 'q'."}), 400
+        try:
+            schema = fieldset_from_request(post_schema)
+        except InvalidFieldset as e:
+            return jsonify({"msg": str(e)}), 400
+
+        limit, cursor = get_page_args()
+
+        try:
+            hits = search.search_hits(q)
+        except search.SearchUnavailable as e:
+            return jsonify({"msg": str(e)}), 503
+
+        if hits is None:
+            return jsonify(page_response([], None, None, limit)), 200
+
+        try:
+            rows, next_cursor, prev_cursor = keyset_paginate(
+                db.session,
+                db.select(Post, hits.c.score)
+                .join(hits, hits.c.id == Post.id)
+                .options(*loader_options(schema, narrow=True)),
+                keys=[(hits.c.score, True), (Post.id, True)],
+                key_fn=lambda row: (row.score, row.Post.id),
+                limit=limit,
+                cursor=cursor,
+            )
+        except InvalidCursor as e:
+            return jsonify({"msg": str(e)}), 400
+
+        result = []
+        for row in rows:
+            item = serializers.dump(schema, row.Post)
+            item['score'] = row.score
+            result.append(item)
+        return jsonify(page_response(result, next_cursor, prev_cursor, limit)), 200
+
+
 # ----------------------------------------------------------------------------------
 # PostDetailAPI - GET (Post por ID), PUT (Editar Post), DELETE (Eliminar Post)
 # ----------------------------------------------------------------------------------
@@ -103,13 +283,48 @@ class PostListAPI(MethodView):
 class PostDetailAPI(MethodView):
 
     # GET: Obtener un post específico (Acceso Público)
+    # Soporta GET condicional: If-None-Match / If-Modified-Since -> 304
+    # y los mismos ?fields= / ?include= que el listado (cada representación tiene su ETag).
+    @read_replica
     def get(self, post_id):
-        post = db.session.get(Post, post_id)
+        try:
+            schema = fieldset_from_request(post_schema)
+        except InvalidFieldset as e:
+            return jsonify({"msg": str(e)}), 400
+
+        # 1. Query barata: sólo las columnas de versión, del post y de las filas que se
+        #    anidan en la respuesta (renombrar el autor o la categoría cambia el post)
+        version = db.session.execute(
+            db.select(Post.timestamp, Post.updated_at,
+                      Usuario.updated_at.label('author_updated_at'),
+                      Category.updated_at.label('category_updated_at'))
+            .outerjoin(Usuario, Usuario.id == Post.user_id)
+            .outerjoin(Category, Category.id == Post.category_id)
+            .where(Post.id == post_id)
+        ).first()
+        if version is None:
+            return jsonify({"msg": "Post no encontrado"}), 404
+
+        # Vista contada en memoria (se vuelca por lotes; también en los 304)
+        record_view(post_id)
+
+        last_modified = latest(version.updated_at or version.timestamp,
+                               version.author_updated_at, version.category_updated_at)
+        tag = fieldset_tag(schema, post_schema)
+        etag = make_etag('post', post_id, version.updated_at or version.timestamp,
+                         version.author_updated_at, version.category_updated_at, *([tag] if tag else []))
+        # ETag débil: el cuerpo incluye view_count, que cambia sin cambiar la versión
+        cached = not_modified(etag, last_modified, weak=True)
+        if cached is not None:
+            return cached
+
+        # 2. Sólo si cambió cargamos el post completo con sus relaciones
+        post = db.session.get(Post, post_id, options=loader_options(schema, narrow=True))
         if post is None:
             return jsonify({"msg": "Post no encontrado"}), 404
-        
+
         # Serializar y devolver el post
-        return post_schema.jsonify(post), 200
+        return set_validators(jsonify(serializers.dump(schema, post)), etag, last_modified, weak=True), 200
 
     # PUT: Editar un post (Requiere ADMIN o ser el autor)
     @jwt_required()
@@ -125,8 +340,7 @@ class PostDetailAPI(MethodView):
 
         if not is_admin_ok:
             # Si no es ADMIN, comprobamos si es el autor del post
-            current_user_id = get_jwt_identity()
-            if post.user_id != current_user_id:
+            if post.user_id != current_user_id():
                 # El usuario no es ADMIN ni el autor
                 return jsonify({"msg": "Acceso denegado. Solo el autor del post o un ADMIN pueden editarlo."}), 403
             
@@ -137,7 +351,7 @@ class PostDetailAPI(MethodView):
         # 3. Deserializar/Validar la entrada con Marshmallow
         try:
             # Usamos partial=True para permitir la actualización parcial de campos
-            post_data = post_schema.load(json_data, partial=True)
+            post_data = post_input_schema.load(json_data, partial=True)
         except Exception as err:
             return jsonify(err.messages), 400
 
@@ -148,12 +362,14 @@ class PostDetailAPI(MethodView):
             if category is None:
                 return jsonify({"msg": f"La categoría con ID {category_id} no existe."}), 400
 
-        # 5. Actualizar el objeto Post
+        # 5. Actualizar el objeto Post (guardamos la categoría anterior para los contadores)
+        old_category_id = post.category_id
         post.title = post_data.get('title', post.title)
         post.body = post_data.get('body', post.body)
         post.category_id = category_id if category_id is not None else post.category_id
 
         try:
+            counters.post_category_changed(old_category_id, post.category_id)
             db.session.commit()
             # 6. Serializar la respuesta
             return post_schema.jsonify(post), 200
@@ -175,16 +391,21 @@ class PostDetailAPI(MethodView):
 
         if not is_admin_ok:
             # Si no es ADMIN, comprobamos si es el autor del post
-            current_user_id = get_jwt_identity()
-            if post.user_id != current_user_id:
+            if post.user_id != current_user_id():
                 # El usuario no es ADMIN ni el autor
                 return jsonify({"msg": "Acceso denegado. Solo el autor del post o un ADMIN pueden eliminarlo."}), 403
 
         # Si llegamos aquí, es ADMIN o el AUTOR.
 
         try:
-            # Debido a 'cascade="all, delete-orphan"' en Comment, los comentarios
-            # asociados se eliminarán automáticamente.
+            # Los comentarios se borran con un único DELETE (el cascade del ORM los
+            # cargaba y borraba de a uno). Van en la misma transacción: la FK de
+            # comments.post_id no permite borrar el post antes.
+            db.session.execute(
+                db.delete(Comment).where(Comment.post_id == post.id)
+                .execution_options(synchronize_session=False)
+            )
+            counters.posts_changed(post.user_id, post.category_id, -1)
             db.session.delete(post)
             db.session.commit()
             return jsonify({"msg": "Post eliminado exitosamente"}), 200
@@ -0,0 +1,7 @@
+from app import create_app
+from app.aio import AsyncReadApp
+
+# Punto de entrada ASGI: los GET públicos de lectura se atienden en modo async
+# (ver app/aio.py) y el resto de la API pasa a la app Flask.
+#   uvicorn asgi:application --workers 2
+application = AsyncReadApp(create_app())
@@ -11,4 +11,123 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'super-secreto-jwt-api'
     # Tiempo de expiración de los tokens de acceso (24 horas, según consigna)
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24) 
-    # Asegúrate de que timedelta esté importado arriba
\ No newline at end of file
+    # Asegúrate de que timedelta esté importado arriba
+
+    # --- STREAMING NDJSON ---
+    # Filas por vuelta del cursor (yield_per) en los listados con ?stream=1
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 500))
+
+    # --- INSTRUMENTACIÓN SQL ---
+    # Headers X-DB-Queries / X-DB-Time / Server-Timing y log de queries lentas
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '1') == '1'
+    # Umbral (ms) a partir del cual una sentencia se registra en el logger 'app.sql.slow'
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 200))
+    # Cantidad de sentencias más lentas que se guardan por request
+    SQL_KEEP_SLOWEST = int(os.environ.get('SQL_KEEP_SLOWEST', 5))
+
+    # --- AUTORIZACIÓN ---
+    # Si es True, cada chequeo de rol confirma en la DB que el usuario siga existiendo
+    # y activo (revocación). Si es False, el rol se resuelve sólo con los claims del JWT.
+    AUTH_CHECK_REVOCATION = os.environ.get('AUTH_CHECK_REVOCATION', '0') == '1'
+
+    # --- CACHÉ DE USUARIOS (lookup de JWT) ---
+    # Cantidad máxima de usuarios cacheados por proceso y segundos de vida de cada entrada
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # --- CACHÉ DE CATEGORÍAS (páginas HTML) ---
+    # Segundos máximos que un cambio hecho en otro worker tarda en verse
+    CATEGORY_CACHE_TTL = int(os.environ.get('CATEGORY_CACHE_TTL', 300))
+
+    # --- CARGA MASIVA DE POSTS (/api/v1/posts/bulk) ---
+    # Máximo de items por petición y filas por INSERT/commit
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 50000))
+    BULK_INSERT_BATCH_SIZE = int(os.environ.get('BULK_INSERT_BATCH_SIZE', 1000))
+    # Tamaño máximo del cuerpo (bytes): un array JSON se parsea entero antes de contar items
+    BULK_MAX_BYTES = int(os.environ.get('BULK_MAX_BYTES', 64 * 1024 * 1024))
+
+    # --- HASHING DE CONTRASEÑAS ---
+    # Método de werkzeug ('scrypt', 'pbkdf2:sha256:600000', ...). Al cambiarlo, los
+    # hashes existentes se recalculan en el siguiente login exitoso de cada usuario.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    # Procesos del pool (0 = en el hilo del request), operaciones en vuelo antes de
+    # responder 503 y segundos máximos de espera por operación
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+    # --- COMPRESIÓN DE RESPUESTAS (gzip) ---
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') == '1'
+    # Nivel de zlib (1 = rápido, 9 = máximo) y tamaño mínimo (bytes) para comprimir
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    # En streaming: bytes sin comprimir acumulados antes de forzar un flush al cliente
+    COMPRESS_STREAM_FLUSH_BYTES = int(os.environ.get('COMPRESS_STREAM_FLUSH_BYTES', 16384))
+    # Archivos estáticos comprimidos que se mantienen en memoria
+    COMPRESS_STATIC_CACHE_SIZE = int(os.environ.get('COMPRESS_STATIC_CACHE_SIZE', 256))
+
+    # --- SERIALIZACIÓN ---
+    # Usar los serializadores compilados (app/serializers.py) en los endpoints de lectura.
+    # Con 0 se vuelve a schema.dump() (la referencia); ver `flask serializers-check`.
+    FAST_SERIALIZERS = os.environ.get('FAST_SERIALIZERS', '1') == '1'
+
+    # --- RÉPLICAS DE LECTURA ---
+    # URIs separadas por coma (p. ej. 'sqlite:///replica.db' para probar en local,
+    # sincronizando con `flask replica-sync`). Vacío = todo va al primario.
+    SQLALCHEMY_REPLICA_URIS = os.environ.get('SQLALCHEMY_REPLICA_URIS', '')
+    # Segundos entre chequeos de salud (SELECT 1, en un hilo aparte) de cada réplica
+    REPLICA_HEALTH_INTERVAL = float(os.environ.get('REPLICA_HEALTH_INTERVAL', 5))
+    # Después de escribir, el mismo cliente lee del primario durante estos segundos
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', 5))
+
+    # --- POOL DE CONEXIONES ---
+    # Conexiones permanentes, extra en picos, segundos de espera por una conexión
+    # antes de fallar y segundos de vida de cada conexión (menor que wait_timeout de MySQL)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    # Verificar cada conexión al sacarla del pool (descarta las que cerró el servidor)
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    # Conexiones que se abren al arrancar (0 = ninguna)
+    DB_POOL_WARMUP = int(os.environ.get('DB_POOL_WARMUP', 0))
+    # Esperas por una conexión (ms) a partir de las cuales se registra en 'app.sql.pool'
+    DB_POOL_WAIT_WARN_MS = float(os.environ.get('DB_POOL_WAIT_WARN_MS', 100))
+
+    # --- MÉTRICAS (GET /metrics, formato Prometheus) ---
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    # Con varios procesos (gunicorn -w N): directorio compartido donde cada proceso
+    # vuelca sus totales cada METRICS_FLUSH_INTERVAL segundos para agregarlos en el scrape
+    METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR', '')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+
+    # --- LECTURAS ASYNC (asgi.py) ---
+    # URI con driver async para los GET atendidos por app/aio.py. Vacío = la URI
+    # principal con el driver equivalente (mysql+aiomysql, sqlite+aiosqlite). Las
+    # réplicas de SQLALCHEMY_REPLICA_URIS se leen con el mismo cambio de driver.
+    SQLALCHEMY_ASYNC_DATABASE_URI = os.environ.get('SQLALCHEMY_ASYNC_DATABASE_URI', '')
+
+    # --- COLA DE TRABAJOS (flask worker) ---
+    # Hilos del worker y segundos entre consultas con la cola vacía
+    JOBS_WORKER_THREADS = int(os.environ.get('JOBS_WORKER_THREADS', 4))
+    JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 1.0))
+    # Reintentos: intentos máximos y backoff exponencial (segundos base y tope)
+    JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))
+    JOBS_BACKOFF_BASE = float(os.environ.get('JOBS_BACKOFF_BASE', 5))
+    JOBS_BACKOFF_MAX = float(os.environ.get('JOBS_BACKOFF_MAX', 3600))
+    # Segundos tras los cuales un job 'running' se considera abandonado y se reencola
+    JOBS_STALE_AFTER = int(os.environ.get('JOBS_STALE_AFTER', 600))
+    # Horas que se conservan los jobs terminados
+    JOBS_RETENTION_HOURS = int(os.environ.get('JOBS_RETENTION_HOURS', 24))
+    # Ejecutar los jobs en el momento, dentro del request (desarrollo sin worker).
+    # Con 0 (por defecto) los jobs esperan a `flask worker`; los contadores no
+    # dependen de ellos (se actualizan en el request, el job sólo reconcilia).
+    JOBS_INLINE = os.environ.get('JOBS_INLINE', '0') == '1'
+
+    # --- CONTADOR DE VISTAS (escritura diferida) ---
+    # Las vistas se acumulan en memoria por proceso y se vuelcan con un UPDATE por lote
+    VIEW_COUNT_ENABLED = os.environ.get('VIEW_COUNT_ENABLED', '1') == '1'
+    # Segundos entre volcados: es también la pérdida máxima si el proceso muere
+    VIEW_COUNT_FLUSH_INTERVAL = float(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', 5))
+    # Vistas pendientes que fuerzan un volcado anticipado (y tope de lo que se reintenta)
+    VIEW_COUNT_MAX_PENDING = int(os.environ.get('VIEW_COUNT_MAX_PENDING', 10000))
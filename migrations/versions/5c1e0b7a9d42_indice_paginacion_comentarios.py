@@ -0,0 +1,26 @@
+"""Índice compuesto para paginación por cursor de comentarios
+
+Revision ID: 5c1e0b7a9d42
+Revises: 281f8a884386
+Create Date: 2026-10-17 10:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e0b7a9d42'
+down_revision = '281f8a884386'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_post_id_timestamp', ['post_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_post_id_timestamp')
@@ -0,0 +1,53 @@
+"""Índice full-text de posts (FULLTEXT en MySQL, FTS5 en SQLite)
+
+Revision ID: b27e94d1f6a3
+Revises: 8f3d2a61c0be
+Create Date: 2026-10-17 12:26:51.730915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b27e94d1f6a3'
+down_revision = '8f3d2a61c0be'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.create_index('ix_posts_fulltext', 'posts', ['title', 'body'], unique=False, mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        # Tabla FTS5 de contenido externo: indexa posts.title/body sin duplicar el texto
+        op.execute("CREATE VIRTUAL TABLE posts_fts USING fts5(title, body, content='posts', content_rowid='id')")
+        op.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+        # Contenido externo: el índice se mantiene con triggers sobre posts
+        op.execute("""
+            CREATE TRIGGER posts_fts_ai AFTER INSERT ON posts BEGIN
+                INSERT INTO posts_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER posts_fts_ad AFTER DELETE ON posts BEGIN
+                INSERT INTO posts_fts(posts_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER posts_fts_au AFTER UPDATE OF title, body ON posts BEGIN
+                INSERT INTO posts_fts(posts_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+                INSERT INTO posts_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+            END
+        """)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ix_posts_fulltext', table_name='posts')
+    elif dialect == 'sqlite':
+        for trigger in ('posts_fts_ai', 'posts_fts_ad', 'posts_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE posts_fts")
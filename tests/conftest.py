@@ -0,0 +1,67 @@
+import pytest
+
+from app import create_app
+from app.counters import repair_counters
+from app.extensions import db
+from app.models import Role, RoleName, Usuario, Category, Post, Comment
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = 'test'
+    JWT_SECRET_KEY = 'test-jwt-secret-key-de-al-menos-32-bytes'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Hashing en el mismo proceso y barato: los tests no miden contraseñas
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    # Sin hilos de fondo ni archivos compartidos entre tests
+    METRICS_MULTIPROC_DIR = None
+    VIEW_COUNT_ENABLED = False
+    JOBS_INLINE = True
+
+
+def make_config(**overrides):
+    """Subclase de TestConfig con los valores dados (p. ej. la URI de la base)."""
+    return type('TestConfig', (TestConfig,), overrides)
+
+
+def seed(posts=10, comments_per_post=3):
+    """Roles, un usuario por rol, dos categorías, posts y comentarios con sus contadores (dentro de un app context)."""
+    roles = {name: Role(name=name) for name in RoleName}
+    db.session.add_all(roles.values())
+    users = []
+    for name in RoleName:
+        user = Usuario(username=name.value.lower(), email=f'{name.value.lower()}@example.com', role=roles[name])
+        user.set_password('secreto')
+        users.append(user)
+    categories = [Category(name='Tech', description='Tecnología'), Category(name='Vida', description=None)]
+    db.session.add_all(users + categories)
+    db.session.flush()
+
+    for i in range(posts):
+        post = Post(title=f'Post {i}', body=f'Cuerpo del post {i}',
+                    author=users[i % len(users)], category=categories[i % len(categories)])
+        db.session.add(post)
+        for j in range(comments_per_post):
+            db.session.add(Comment(body=f'Comentario {j}', commenter=users[j % len(users)], post=post))
+    db.session.commit()
+    # Contadores desnormalizados alineados con las filas sembradas
+    repair_counters()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(make_config(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'test.db'}"))
+    with app.app_context():
+        db.create_all()
+        seed()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
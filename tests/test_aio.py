@@ -0,0 +1,91 @@
+import asyncio
+import gzip
+
+import pytest
+
+from app import create_app
+from app.aio import AsyncReadApp
+from app.extensions import db
+from app.replicas import replica_set, sync_sqlite_replicas
+
+from .conftest import make_config, seed
+
+
+# El camino async (app/aio.py) contra la app Flask: mismo cuerpo, mismo ETag y
+# los headers que en Flask agregan los after_request (gzip, Vary, X-DB-*).
+
+def _call(asgi_app, path, query='', headers=()):
+    scope = {
+        'type': 'http', 'method': 'GET', 'http_version': '1.1', 'scheme': 'http',
+        'server': ('localhost', 80), 'root_path': '', 'path': path,
+        'query_string': query.encode(),
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers],
+    }
+    result = {'body': b''}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+            result['headers'] = {k.decode(): v.decode() for k, v in message['headers']}
+        else:
+            result['body'] += message.get('body', b'')
+
+    async def run():
+        try:
+            await asgi_app(scope, receive, send)
+        finally:
+            await asgi_app.dispose()
+
+    asyncio.run(run())
+    return result
+
+
+@pytest.mark.parametrize('path,query', [
+    ('/api/v1/posts', 'limit=5'),
+    ('/api/v1/posts/1', ''),
+    ('/api/v1/posts/1/comments', 'limit=2'),
+])
+@pytest.mark.parametrize('encoding', ['gzip', None])
+def test_async_matches_flask(app, client, path, query, encoding):
+    headers = [('Accept-Encoding', encoding)] if encoding else []
+    result = _call(AsyncReadApp(app), path, query, headers)
+    expected = client.get(f'{path}?{query}', headers=headers)
+
+    assert result['headers']['x-read-path'] == 'async'
+    assert result['status'] == expected.status_code
+    assert result['headers'].get('etag') == expected.headers.get('ETag')
+    assert result['headers'].get('content-encoding') == expected.headers.get('Content-Encoding')
+    assert result['headers'].get('vary') == expected.headers.get('Vary') == 'Accept-Encoding'
+    body, expected_body = result['body'], expected.get_data()
+    if path == '/api/v1/posts' and encoding:
+        assert result['headers']['content-encoding'] == 'gzip'
+    if result['headers'].get('content-encoding') == 'gzip':
+        body, expected_body = gzip.decompress(body), gzip.decompress(expected_body)
+    assert body == expected_body
+    assert result['headers']['x-db-queries'] == expected.headers['X-DB-Queries']
+    assert 'server-timing' in result['headers']
+
+
+def test_async_reads_from_replica(tmp_path):
+    app = create_app(make_config(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_REPLICA_URIS=f"sqlite:///{tmp_path / 'replica.db'}",
+    ))
+    with app.app_context():
+        db.create_all()
+        seed()
+    sync_sqlite_replicas(app, db)
+    try:
+        asgi_app = AsyncReadApp(app)
+        assert _call(asgi_app, '/api/v1/posts/1')['headers']['x-db-replica'] == 'replica_0'
+        # Quien escribió hace poco lee del primario
+        future = 'db_primary_until=9999999999'
+        assert 'x-db-replica' not in _call(asgi_app, '/api/v1/posts/1', headers=[('Cookie', future)])['headers']
+    finally:
+        replica_set.configure({})
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
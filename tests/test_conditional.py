@@ -0,0 +1,45 @@
+from app.extensions import db
+from app.models import Comment
+
+
+# GET condicional: el detalle de un post incluye view_count, que cambia sin
+# cambiar la versión, así que su ETag es débil; If-None-Match compara débil.
+
+
+def test_post_detail_etag_is_weak(client):
+    response = client.get('/api/v1/posts/1')
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('W/"')
+    assert 'view_count' in response.get_json()
+
+    revalidated = client.get('/api/v1/posts/1', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == response.headers['ETag']
+
+
+def test_gzip_variant_of_weak_etag(client):
+    response = client.get('/api/v1/posts/1', headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+    revalidated = client.get('/api/v1/posts/1', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+
+
+def test_weak_comparison_for_strong_etags(client):
+    # El recurso tiene ETag fuerte; el cliente lo manda como débil: If-None-Match compara débil
+    etag = client.get('/api/v1/posts/1/comments').headers['ETag']
+    assert not etag.startswith('W/')
+    response = client.get('/api/v1/posts/1/comments', headers={'If-None-Match': f'W/{etag}'})
+    assert response.status_code == 304
+
+
+def test_renaming_a_commenter_changes_the_comment_list_etag(app, client):
+    etag = client.get('/api/v1/posts/1/comments').headers['ETag']
+    with app.app_context():
+        commenter = db.session.get(Comment, 1).commenter
+        commenter.username = 'renombrado'
+        db.session.commit()
+
+    response = client.get('/api/v1/posts/1/comments', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'renombrado' in {c['commenter']['username'] for c in response.get_json()['items']}
@@ -0,0 +1,80 @@
+from app.extensions import db
+from app.models import Category, Post, Usuario
+
+
+# Contadores desnormalizados (app/counters.py) a través de la API: alta y baja
+# de posts y comentarios.
+
+def _login(client, email):
+    response = client.post('/api/v1/auth/login', json={"email": email, "password": "secreto"})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+def _counts(app, post_id=None, user_email='editor@example.com', category_id=1):
+    with app.app_context():
+        user = db.session.execute(db.select(Usuario).where(Usuario.email == user_email)).scalar_one()
+        post = db.session.get(Post, post_id) if post_id is not None else None
+        return {
+            "user": user.post_count,
+            "category": db.session.get(Category, category_id).post_count,
+            "comments": post.comment_count if post is not None else None,
+        }
+
+
+def test_post_create_and_delete_update_post_counts(app, client):
+    editor = _login(client, 'editor@example.com')
+    before = _counts(app)
+
+    response = client.post('/api/v1/posts', headers=editor,
+                           json={"title": "Nuevo", "body": "Cuerpo", "category_id": 1})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    post_id = response.get_json()['id']
+    after_create = _counts(app, post_id)
+    assert after_create["user"] == before["user"] + 1
+    assert after_create["category"] == before["category"] + 1
+
+    response = client.delete(f'/api/v1/posts/{post_id}', headers=_login(client, 'admin@example.com'))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    after_delete = _counts(app)
+    assert after_delete["user"] == before["user"]
+    assert after_delete["category"] == before["category"]
+
+
+def test_comment_create_and_delete_update_comment_count(app, client):
+    # Sin worker (el valor por defecto): el contador no espera al job de reconciliación
+    app.config['JOBS_INLINE'] = False
+    reader = _login(client, 'reader@example.com')
+    before = _counts(app, 1)["comments"]
+
+    response = client.post('/api/v1/posts/1/comments', headers=reader, json={"body": "Hola"})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    comment_id = response.get_json()['id']
+    assert _counts(app, 1)["comments"] == before + 1
+
+    response = client.delete(f'/api/v1/comments/{comment_id}', headers=reader)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert _counts(app, 1)["comments"] == before
+
+
+def test_invalid_input_is_rejected(app, client):
+    editor = _login(client, 'editor@example.com')
+    assert client.post('/api/v1/posts', headers=editor, json={"title": "Sin categoría"}).status_code == 400
+    assert client.post('/api/v1/posts/1/comments', headers=editor, json={}).status_code == 400
+
+
+def test_auth_me_sees_post_count_after_create(app, client):
+    # El lookup de JWT cachea las columnas del usuario (auth/user_cache.py); el
+    # contador cambia con un UPDATE de Core y debe invalidar esa entrada
+    editor = _login(client, 'editor@example.com')
+    before = client.get('/api/v1/auth/me', headers=editor).get_json()['post_count']
+
+    response = client.post('/api/v1/posts', headers=editor,
+                           json={"title": "Nuevo", "body": "Cuerpo", "category_id": 1})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    assert client.get('/api/v1/auth/me', headers=editor).get_json()['post_count'] == before + 1
+
+    response = client.post('/api/v1/posts/bulk', headers=editor,
+                           json=[{"title": "Bulk", "body": "Cuerpo", "category_id": 1}])
+    assert response.status_code == 201, response.get_data(as_text=True)
+    assert client.get('/api/v1/auth/me', headers=editor).get_json()['post_count'] == before + 2
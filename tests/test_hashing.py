@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from app.auth.hashing import HashingBusy, PasswordHasher
+
+
+def test_pool_is_created_at_configure_without_fork():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    hasher.configure(workers=1)
+    try:
+        executor = hasher._executor
+        assert executor is not None
+        assert executor._mp_context.get_start_method() == 'forkserver'
+
+        pwhash = hasher.hash('secreto')
+        assert hasher.verify(pwhash, 'secreto') == (True, None)
+        assert hasher._executor is executor
+    finally:
+        hasher.configure(workers=0)
+    assert hasher._executor is None
+
+
+def test_rejections_are_counted_under_concurrency():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    hasher.configure(workers=0, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(_):
+        started.set()
+        release.wait(5)
+
+    holder = threading.Thread(target=hasher._run, args=(slow, None))
+    holder.start()
+    assert started.wait(5)
+
+    def reject():
+        for _ in range(50):
+            with pytest.raises(HashingBusy):
+                hasher._run(slow, None)
+
+    threads = [threading.Thread(target=reject) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    release.set()
+    holder.join()
+    assert hasher.stats()["rejected"] == 200
@@ -0,0 +1,79 @@
+import threading
+
+from sqlalchemy import event
+
+from app import jobs
+from app.extensions import db
+from app.models import Comment, Job, Post
+
+
+KEY = 'comment_count:1'
+
+
+def _enqueue():
+    return jobs.enqueue('refresh_comment_count', {"post_id": 1}, key=KEY)
+
+
+def _pending():
+    return db.session.execute(db.select(db.func.count(Job.id)).where(Job.status == 'pending')).scalar()
+
+
+def test_dedupe_until_claimed(app):
+    app.config['JOBS_INLINE'] = False
+    with app.app_context():
+        assert _enqueue() is not None
+        db.session.commit()
+        assert _enqueue() is None
+        db.session.commit()
+        assert _pending() == 1
+
+        # Tomado el job, la clave se libera: un cambio posterior vuelve a encolar
+        assert len(jobs.claim('test', 10)) == 1
+        assert _enqueue() is not None
+        db.session.commit()
+        assert _pending() == 1
+
+
+def test_claim_waits_for_the_enqueuing_transaction(app):
+    # El request encuentra el job pendiente y no encola otro; si el worker lo
+    # tomara antes del commit del request, contaría sin su comentario
+    app.config['JOBS_INLINE'] = False
+    with app.app_context():
+        _enqueue()
+        db.session.commit()
+
+        assert _enqueue() is None
+        db.session.add(Comment(body='nuevo', user_id=1, post_id=1))
+        engine = db.engine
+
+        claiming, claimed = threading.Event(), threading.Event()
+        result = {}
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            if threading.current_thread() is thread and statement.lstrip().upper().startswith('UPDATE JOBS'):
+                claiming.set()
+
+        def worker():
+            with app.app_context():
+                result['claimed'] = jobs.claim('test', 10)
+                claimed.set()
+                for job_id in result['claimed']:
+                    jobs.run_job(job_id)
+
+        event.listen(engine, 'before_cursor_execute', on_execute)
+        thread = threading.Thread(target=worker)
+        try:
+            thread.start()
+            # El worker llega al UPDATE del claim con la transacción del request abierta...
+            assert claiming.wait(5)
+            # ...y queda bloqueado por el job tocado hasta el commit
+            assert not claimed.wait(0.3)
+            db.session.commit()
+            thread.join(5)
+        finally:
+            event.remove(engine, 'before_cursor_execute', on_execute)
+        assert claimed.is_set() and len(result['claimed']) == 1
+
+    with app.app_context():
+        expected = db.session.execute(db.select(db.func.count(Comment.id)).where(Comment.post_id == 1)).scalar()
+        assert db.session.get(Post, 1).comment_count == expected
@@ -0,0 +1,17 @@
+from app.loadtest import DEFAULT_MIX, parse_mix, run_loadtest
+
+
+# Sin carga, ninguna operación de la mezcla por defecto debe fallar: si no, la
+# tasa de errores del reporte mide un bug y no la carga. Se corren todas con el
+# mismo peso para que las poco frecuentes (comment_post=2) no queden sin muestrear.
+
+def test_default_mix_has_no_baseline_errors(app):
+    operations = [name for name, _ in parse_mix(DEFAULT_MIX)]
+    with app.app_context():
+        report = run_loadtest(app, users=2, duration=30, mix=",".join(operations),
+                              password='secreto', max_requests=40)
+
+    assert set(report["operations"]) == set(operations)
+    errors = {name: op["errors"] for name, op in report["operations"].items() if op["errors"]}
+    assert errors == {}
+    assert report["total"]["error_rate"] == 0
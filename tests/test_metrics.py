@@ -0,0 +1,63 @@
+import json
+import subprocess
+import sys
+import threading
+
+from app.metrics import MetricsRegistry, RETIRED_FILE
+
+
+def _request(registry):
+    registry.request_started()
+    registry.request_finished('posts', 'GET', 200, 0.001)
+
+
+def _total(data, endpoint='posts'):
+    return sum(n for (e, _, _), n in data["requests"].items() if e == endpoint)
+
+
+def test_short_lived_threads_are_all_counted():
+    # Un hilo por request, uno detrás de otro: los idents se reutilizan
+    registry = MetricsRegistry()
+    for _ in range(200):
+        thread = threading.Thread(target=_request, args=(registry,))
+        thread.start()
+        thread.join()
+    totals = registry.collect()
+    assert totals.requests[('posts', 'GET', 200)] == 200
+    assert totals.started - totals.finished == 0
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def _write_process_file(directory, name, pid, n):
+    registry = MetricsRegistry()
+    for _ in range(n):
+        _request(registry)
+    snapshot = registry.snapshot()
+    snapshot["pid"] = pid
+    snapshot["in_flight"] = 1
+    (directory / name).write_text(json.dumps(snapshot))
+
+
+def test_dead_process_files_are_retired(tmp_path):
+    pid = _dead_pid()
+    _write_process_file(tmp_path, f'{pid}-aaaa.json', pid, 3)
+    # Mismo pid, otro proceso (pid reutilizado): otro archivo, no se pisan
+    _write_process_file(tmp_path, f'{pid}-bbbb.json', pid, 4)
+
+    registry = MetricsRegistry()
+    registry.configure(multiproc_dir=str(tmp_path))
+    _request(registry)
+
+    data = registry.aggregate()
+    assert _total(data) == 8
+    assert data["in_flight"] == 0
+    assert data["processes"] == 1
+    assert sorted(p.name for p in tmp_path.glob('*.json')) == sorted([RETIRED_FILE, registry._process_file()])
+
+    # Los contadores consolidados se conservan y no se cuentan dos veces
+    assert _total(registry.aggregate()) == 8
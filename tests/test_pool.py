@@ -0,0 +1,14 @@
+from app.extensions import db
+from app.pool import init_pool, pool_stats
+
+
+def test_init_pool_twice_does_not_double_count(app):
+    # create_app ya llamó a init_pool una vez
+    init_pool(app, db)
+    with app.app_context():
+        engine = db.engine
+        engine.dispose()
+        before = pool_stats(db)['primary']['connects']
+        with engine.connect():
+            pass
+        assert pool_stats(db)['primary']['connects'] == before + 1
@@ -0,0 +1,51 @@
+import pytest
+
+from app.extensions import db
+from app.models import Post, Comment, Usuario, Category
+
+
+# Cantidad de sentencias SQL por request (header X-DB-Queries, que cuenta
+# instrumentation.py con los eventos del engine). Las opciones de carga que arma
+# loading.loader_options() deben mantenerla constante: si una relación anidada
+# del schema vuelve a cargarse en lazy, el número crece con las filas (N+1).
+
+def _queries(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return int(response.headers['X-DB-Queries'])
+
+
+def _add_rows(app, posts, comments_per_post):
+    """Más posts y comentarios en el post 1, cada uno con su propio autor (y categoría):
+    con carga lazy cada autor nuevo sería una query más."""
+    with app.app_context():
+        role = db.session.execute(db.select(Usuario)).scalars().first().role
+        first = db.session.get(Post, 1)
+        for i in range(max(posts, comments_per_post)):
+            user = Usuario(username=f'extra{i}', email=f'extra{i}@example.com', role=role)
+            user.set_password('secreto')
+            if i < posts:
+                category = Category(name=f'Extra {i}')
+                db.session.add(Post(title=f'Extra {i}', body='extra', author=user, category=category))
+            if i < comments_per_post:
+                db.session.add(Comment(body=f'Extra {i}', commenter=user, post=first))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('/api/v1/posts?limit=20', 1),
+    ('/api/v1/posts/1', 2),
+    ('/api/v1/posts/1/comments?limit=20', 3),
+])
+def test_query_count_is_fixed(client, url, expected):
+    assert _queries(client, url) == expected
+
+
+@pytest.mark.parametrize('url', [
+    '/api/v1/posts?limit=20',
+    '/api/v1/posts/1/comments?limit=20',
+])
+def test_query_count_does_not_grow_with_rows(app, client, url):
+    before = _queries(client, url)
+    _add_rows(app, posts=15, comments_per_post=15)
+    assert _queries(client, url) == before
@@ -0,0 +1,79 @@
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.replicas import replica_set, sync_sqlite_replicas
+
+from .conftest import make_config, seed
+
+
+# Primario y réplica como dos archivos SQLite: la réplica es una copia del
+# primario (sync_sqlite_replicas) que ya no se actualiza, así que un post
+# borrado en el primario sigue visible sólo si el request leyó de la réplica.
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(make_config(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_REPLICA_URIS=f"sqlite:///{tmp_path / 'replica.db'}",
+    ))
+    with app.app_context():
+        db.create_all()
+        seed()
+    assert sync_sqlite_replicas(app, db) == ['replica_0']
+    yield app
+    replica_set.configure({})
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _login(client, email='admin@example.com'):
+    response = client.post('/api/v1/auth/login', json={"email": email, "password": "secreto"})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+def test_reads_go_to_the_replica(app):
+    response = app.test_client().get('/api/v1/posts/1')
+    assert response.status_code == 200
+    assert response.headers['X-DB-Replica'] == 'replica_0'
+    assert replica_set.stats()['replica_0']['reads'] == 1
+
+
+def test_read_your_writes(app):
+    writer = app.test_client()
+    headers = _login(writer)
+    assert writer.delete('/api/v1/posts/1', headers=headers).status_code == 200
+
+    # Quien escribió lee del primario (cookie y token): el post ya no está
+    response = writer.get('/api/v1/posts/1', headers=headers)
+    assert response.status_code == 404
+    assert 'X-DB-Replica' not in response.headers
+
+    # Otro cliente sigue leyendo de la réplica, que todavía no se sincronizó
+    response = app.test_client().get('/api/v1/posts/1')
+    assert response.status_code == 200
+    assert response.headers['X-DB-Replica'] == 'replica_0'
+
+
+def test_unhealthy_replica_falls_back_to_primary(app):
+    replica_set.mark_down('replica_0', 'caída')
+    response = app.test_client().get('/api/v1/posts/1')
+    assert response.status_code == 200
+    assert 'X-DB-Replica' not in response.headers
+
+    # El chequeo de salud (el mismo que corre el hilo de fondo) la vuelve a la rotación
+    replica_set.check_health()
+    assert replica_set.stats()['replica_0']['healthy']
+    assert app.test_client().get('/api/v1/posts/1').headers['X-DB-Replica'] == 'replica_0'
+
+
+def test_configure_does_not_duplicate_listeners(app):
+    with app.app_context():
+        engine = db.engines['replica_0']
+    before = len(engine.dialect.dispatch.handle_error)
+    replica_set.configure({'replica_0': engine})
+    replica_set.configure({'replica_0': engine})
+    assert len(engine.dialect.dispatch.handle_error) == before
@@ -0,0 +1,67 @@
+import pytest
+
+from app.extensions import db
+from app.models import Post
+from app.search import rebuild_index
+
+
+# Búsqueda full-text con SQLite: índice FTS5 de contenido externo que mantienen
+# los triggers de posts (ver app/search.py).
+
+@pytest.fixture
+def indexed(app):
+    with app.app_context():
+        rebuild_index()
+    return app
+
+
+def _ids(client, q):
+    response = client.get('/api/v1/posts/search', query_string={'q': q})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [item['id'] for item in response.get_json()['items']]
+
+
+def test_search_without_index_is_unavailable(client):
+    response = client.get('/api/v1/posts/search?q=post')
+    assert response.status_code == 503
+
+
+def test_rebuild_indexes_existing_posts(indexed, client):
+    assert _ids(client, 'Post 3') != []
+    assert _ids(client, 'inexistente') == []
+
+
+def test_triggers_follow_insert_update_delete(indexed, client):
+    with indexed.app_context():
+        post = Post(title='Zanahorias', body='Receta de zanahorias', user_id=1, category_id=1)
+        db.session.add(post)
+        db.session.commit()
+        post_id = post.id
+    assert _ids(client, 'zanahorias') == [post_id]
+
+    with indexed.app_context():
+        db.session.get(Post, post_id).title = 'Berenjenas'
+        db.session.get(Post, post_id).body = 'Receta de berenjenas'
+        db.session.commit()
+    assert _ids(client, 'zanahorias') == []
+    assert _ids(client, 'berenjenas') == [post_id]
+
+    with indexed.app_context():
+        db.session.delete(db.session.get(Post, post_id))
+        db.session.commit()
+    assert _ids(client, 'berenjenas') == []
+
+
+def test_results_are_ranked_by_relevance(indexed, client):
+    with indexed.app_context():
+        once = Post(title='Notas', body='Una mención de tomates entre muchas otras palabras del cuerpo',
+                    user_id=1, category_id=1)
+        often = Post(title='Tomates', body='Tomates, tomates y más tomates', user_id=1, category_id=1)
+        db.session.add_all([once, often])
+        db.session.commit()
+        expected = [often.id, once.id]
+
+    response = client.get('/api/v1/posts/search?q=tomates')
+    items = response.get_json()['items']
+    assert [item['id'] for item in items] == expected
+    assert items[0]['score'] > items[1]['score']
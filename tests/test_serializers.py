@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+
+from app import serializers
+from app.fieldsets import sparse_schema
+from app.models import (
+    Role, RoleName, Usuario, Category, Post, Comment,
+    usuario_schema, usuarios_schema, post_schema, posts_schema,
+    comment_schema, comments_schema, category_schema, categories_schema,
+)
+
+
+# Los serializadores compilados (serializers.py) deben producir exactamente lo
+# mismo que schema.dump(), con las mismas claves en el mismo orden. Los objetos
+# son instancias de los modelos sin sesión ni base de datos.
+
+def _objects():
+    editor = Role(id=2, name=RoleName.EDITOR)
+    author = Usuario(id=1, username='ana', email='ana@example.com', role=editor, post_count=2)
+    # Usuario sin rol: el Nested recibe None
+    orphan = Usuario(id=2, username='sin-rol', email=None, role=None, post_count=0)
+    tech = Category(id=1, name='Tech', description='Tecnología', post_count=1)
+    empty = Category(id=2, name='Vacía', description=None, post_count=0)
+
+    posts = [
+        Post(id=1, title='Hola', body='Cuerpo', timestamp=datetime(2026, 1, 2, 3, 4, 5, 678901),
+             comment_count=1, view_count=10, author=author, category=tech),
+        # Autor y categoría None, y columnas None
+        Post(id=2, title=None, body='', timestamp=None, comment_count=0, view_count=0, author=None, category=None),
+        Post(id=3, title='Ñandú ✓', body='x' * 1000, timestamp=datetime(2026, 5, 6),
+             comment_count=0, view_count=0, author=orphan, category=empty),
+    ]
+    comments = [
+        Comment(id=1, body='Bien', timestamp=datetime(2026, 1, 3), user_id=1, post_id=1, commenter=author),
+        Comment(id=2, body=None, timestamp=None, user_id=None, post_id=1, commenter=None),
+    ]
+    return {
+        'usuarios': [author, orphan],
+        'categories': [tech, empty],
+        'posts': posts,
+        'comments': comments,
+    }
+
+
+def _assert_same(schema, data):
+    expected = schema.dump(data)
+    got = serializers.dump(schema, data)
+    assert got == expected
+    rows = zip(got, expected) if schema.many else [(got, expected)]
+    for got_row, expected_row in rows:
+        assert list(got_row) == list(expected_row)
+
+
+@pytest.mark.parametrize('kind, single, many', [
+    ('usuarios', usuario_schema, usuarios_schema),
+    ('categories', category_schema, categories_schema),
+    ('posts', post_schema, posts_schema),
+    ('comments', comment_schema, comments_schema),
+])
+def test_compiled_dump_matches_marshmallow(kind, single, many):
+    objects = _objects()[kind]
+    assert serializers.compile_schema(single) is not None
+    _assert_same(many, objects)
+    for obj in objects:
+        _assert_same(single, obj)
+
+
+@pytest.mark.parametrize('only, include', [
+    (['id', 'title'], None),
+    (['id', 'timestamp'], ['author']),
+    (None, ['category']),
+    (['title', 'view_count'], ['author', 'category']),
+])
+def test_compiled_dump_matches_marshmallow_with_sparse_fieldsets(only, include):
+    posts = _objects()['posts']
+    _assert_same(sparse_schema(posts_schema, only, include), posts)
+    for post in posts:
+        _assert_same(sparse_schema(post_schema, only, include), post)
+
+
+def test_check_equivalence_reports_no_mismatches():
+    objects = _objects()
+    for kind, schema in [('usuarios', usuarios_schema), ('categories', categories_schema),
+                         ('posts', posts_schema), ('comments', comments_schema)]:
+        assert serializers.check_equivalence(schema, objects[kind]) == []
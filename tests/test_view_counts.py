@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, view_counts
+from app.extensions import db
+from app.models import Post
+from app.view_counts import ViewCounter, init_view_counts, record_view, view_counter
+
+from .conftest import make_config
+
+
+@pytest.fixture
+def counter(app):
+    # Instancia propia, sin volcados del hilo de fondo durante el test
+    counter = ViewCounter()
+    counter.configure(app, flush_interval=3600, max_pending=1000)
+    return counter
+
+
+@pytest.fixture
+def statements(app):
+    """UPDATEs de posts ejecutados mientras dura el test."""
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('UPDATE POSTS'):
+            captured.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    yield captured
+    event.remove(engine, 'before_cursor_execute', on_execute)
+
+
+def _post_state(app, post_id):
+    with app.app_context():
+        post = db.session.get(Post, post_id)
+        return post.view_count, post.updated_at
+
+
+def test_flush_is_one_case_update_that_keeps_updated_at(app, counter, statements):
+    before = {post_id: _post_state(app, post_id) for post_id in (1, 2)}
+    for post_id in (1, 1, 1, 2):
+        counter.hit(post_id)
+    assert statements == []
+
+    assert counter.flush() == 4
+    assert len(statements) == 1
+    assert 'CASE' in statements[0].upper()
+
+    for post_id, n in ((1, 3), (2, 1)):
+        view_count, updated_at = _post_state(app, post_id)
+        assert view_count == before[post_id][0] + n
+        assert updated_at == before[post_id][1]
+    assert counter.stats()["pending"] == 0
+    assert counter.stats()["flushed"] == 4
+
+
+def _fail_post_updates(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith('UPDATE POSTS'):
+        raise RuntimeError('base caída')
+
+
+def test_failed_flush_puts_the_counts_back(app, counter):
+    before = _post_state(app, 1)[0]
+    for post_id in (1, 1, 2):
+        counter.hit(post_id)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _fail_post_updates)
+    try:
+        assert counter.flush() == 0
+    finally:
+        event.remove(engine, 'before_cursor_execute', _fail_post_updates)
+
+    stats = counter.stats()
+    assert stats["errors"] == 1
+    assert stats["pending"] == 3 and stats["pending_posts"] == 2
+    assert _post_state(app, 1)[0] == before
+
+    assert counter.flush() == 3
+    assert _post_state(app, 1)[0] == before + 2
+
+
+def test_give_back_over_max_pending_counts_dropped(app, counter):
+    for post_id in (1, 1, 1, 2, 2):
+        counter.hit(post_id)
+    counter.max_pending = 3
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _fail_post_updates)
+    try:
+        assert counter.flush() == 0
+    finally:
+        event.remove(engine, 'before_cursor_execute', _fail_post_updates)
+
+    stats = counter.stats()
+    assert stats["pending"] == 3
+    assert stats["dropped"] == 2
+
+
+def test_short_lived_app_keeps_the_serving_binding(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr(view_counts, 'atexit', SimpleNamespace(register=registered.append))
+    monkeypatch.setattr(view_counts, '_atexit_registered', False)
+    monkeypatch.setattr(view_counter, '_app', None)
+    monkeypatch.setattr(view_counter, 'enabled', True)
+
+    init_view_counts(app)
+    # Una app de vida corta (como la de `flask bench`) en el mismo proceso
+    other = create_app(make_config(SQLALCHEMY_DATABASE_URI='sqlite://', VIEW_COUNT_ENABLED=True))
+
+    assert view_counter._app is app
+    assert registered == [view_counter.flush]
+
+    pending = view_counter.stats()["pending"]
+    with other.test_request_context():
+        record_view(1)
+    assert view_counter.stats()["pending"] == pending